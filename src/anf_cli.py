@@ -0,0 +1,346 @@
+# anf_cli.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Command line for scripted use, from the src folder:
+#
+#   python anf_cli.py provision -g anf01-rg -l eastus2 -a account01 \
+#       -p pool01 -v vol01 --subnet-id <subnet resource id>
+#   python anf_cli.py provision-batch volumes.yaml --report report.csv
+#   python anf_cli.py list -g anf01-rg
+#   python anf_cli.py wait <resource id> [<resource id> ...] [--absent]
+#   python anf_cli.py snapshot -g anf01-rg --keep-last 7
+#   python anf_cli.py teardown -g anf01-rg -a account01
+#
+# Only argparse is imported when the module loads. Every subcommand imports
+# the SDK modules it needs when it runs, so e.g. list does not pay for the
+# model classes used by provision, and --help does not import the SDK at
+# all. benchmarks/import_budget.py keeps these imports within budget.
+
+import argparse
+import sys
+
+POOL_SIZE_IN_TIB = 4
+VOLUME_SIZE_IN_GIB = 100
+SERVICE_LEVEL = 'Standard'
+
+
+def _netapp_client(args):
+    import client_factory
+    import sample_utils
+
+    credentials, subscription_id = sample_utils.get_credentials(
+        args.token_cache)
+    return client_factory.default_factory().netapp_client(
+        credentials, args.subscription_id or subscription_id)
+
+
+def provision(args, client):
+    """Creates an account, optionally with a capacity pool and a volume"""
+    import anf_resources
+    import sample_utils
+
+    resources = [anf_resources.create_account(
+        client, args.resource_group, args.account, args.location)]
+    if args.pool:
+        resources.append(anf_resources.create_capacitypool_async(
+            client, args.resource_group, args.account, args.pool,
+            args.service_level,
+            sample_utils.get_tib_in_bytes(args.pool_size), args.location))
+    if args.pool and args.volume:
+        resources.append(anf_resources.create_volume(
+            client, args.resource_group, args.account, args.pool,
+            args.volume, args.volume_size * 1024 ** 3, args.service_level,
+            args.subnet_id, args.location))
+
+    for resource in resources:
+        print(resource.id)
+    return 0
+
+
+def provision_batch(args, client):
+    """Creates the volumes of a YAML or CSV spec file concurrently"""
+    import batch_provision
+    import preflight
+
+    defaults = dict((field, getattr(args, field)) for field in (
+        'resource_group', 'account', 'pool', 'size_gib', 'service_level',
+        'subnet_id', 'location') if getattr(args, field))
+    try:
+        specs = batch_provision.load_specs(args.spec_file, defaults)
+    except ValueError as ex:
+        print(ex, file=sys.stderr)
+        return 2
+
+    # Every spec is checked before the first volume is submitted. With
+    # --check-capacity the deployed pools and volumes are listed as well, so
+    # that missing pools and pools too small for their volumes are reported
+    existing = None
+    if args.check_capacity:
+        import listing
+        existing = listing.walk_anf_resources(
+            [(client, resource_group) for resource_group in sorted(set(
+                spec.resource_group for spec in specs))], deepest='volume')
+    violations = preflight.validate(volumes=specs, existing=existing)
+    if violations:
+        for violation in violations:
+            print(violation, file=sys.stderr)
+        return 2
+
+    def progress(result, finished_count, total):
+        print('[{}/{}] {} {} {}'.format(
+            finished_count, total, result.spec.name,
+            'created in {:.1f}s'.format(result.duration)
+            if result.succeeded else 'failed',
+            result.volume_id or str(result.error).splitlines()[0]),
+            flush=True)
+
+    resizer = None
+    if args.auto_resize:
+        import pool_resizer
+        resizer = pool_resizer.PoolResizer(client)
+    try:
+        results = batch_provision.provision_volumes(
+            client, specs, max_concurrency=args.max_concurrency,
+            per_pool_concurrency=args.per_pool_concurrency,
+            on_progress=progress, resizer=resizer)
+    finally:
+        if resizer is not None:
+            resizer.close()
+    if args.report:
+        batch_provision.write_report(results, args.report)
+
+    failed = sum(1 for result in results if not result.succeeded)
+    print('{} volumes created, {} failed'.format(len(results) - failed,
+                                                  failed))
+    return 1 if failed else 0
+
+
+def list_resources(args, client):
+    """Prints the ids of all ANF resources of a resource group"""
+    import listing
+
+    for resource in listing.walk_anf_resources(
+            [(client, args.resource_group)],
+            anf_account_names=args.account or None):
+        print(resource.id)
+    return 0
+
+
+def wait(args, client):
+    """Waits for resources to exist, or to be gone with --absent"""
+    import math
+    import sample_utils
+
+    try:
+        reached = sample_utils.wait_for_many(
+            client, args.resource_ids, present=not args.absent,
+            interval_in_sec=args.interval,
+            retries=max(1, math.ceil(args.timeout / args.interval)))
+    except ValueError as ex:
+        print(ex, file=sys.stderr)
+        return 2
+    pending = [resource_id for resource_id, done in reached.items()
+               if not done]
+    for resource_id in pending:
+        print('Timed out waiting for {}'.format(resource_id),
+              file=sys.stderr)
+    return 1 if pending else 0
+
+
+def snapshot_fleet(args, client):
+    """Snapshots every volume of a resource group, then prunes old snapshots"""
+    import listing
+    import snapshot_scheduler
+
+    policy = None
+    if args.keep_last is not None or args.max_age_days is not None:
+        policy = snapshot_scheduler.RetentionPolicy(
+            keep_last=args.keep_last,
+            max_age_in_sec=None if args.max_age_days is None
+            else args.max_age_days * 86400,
+            prefix=args.prefix)
+    volumes = [resource for resource in listing.walk_anf_resources(
+        [(client, args.resource_group)], deepest='volume',
+        anf_account_names=args.account or None)
+        if resource.type.lower().endswith('/volumes')]
+
+    fleet = snapshot_scheduler.create_fleet_snapshot(
+        client, volumes,
+        name=snapshot_scheduler.snapshot_name(args.prefix),
+        max_concurrency=args.max_concurrency)
+    for volume in fleet.volumes:
+        if volume.succeeded:
+            print('{} issued +{:.3f}s skew {:.3f}s'.format(
+                volume.volume_id, volume.issued - fleet.started,
+                volume.skew or 0.0))
+        else:
+            print('{} failed: {}'.format(volume.volume_id, volume.error),
+                  file=sys.stderr)
+    print('{} snapshots of {} volumes in {:.1f}s, issued within {:.3f}s, '
+          'max skew {:.3f}s'.format(
+              fleet.name, len(fleet.volumes) - len(fleet.failed),
+              fleet.duration or 0.0, fleet.issue_window or 0.0,
+              fleet.max_skew or 0.0))
+
+    if policy is not None:
+        pruned = snapshot_scheduler.prune_snapshots(
+            client, [volume.id for volume in volumes], policy,
+            max_concurrency=args.max_concurrency, dry_run=args.dry_run)
+        print('{} expired snapshots {}'.format(
+            len(pruned), 'found' if args.dry_run else 'deleted'))
+    return 1 if fleet.failed else 0
+
+
+def teardown_resources(args, client):
+    """Deletes the given resources, or all of a resource group or account"""
+    import teardown
+
+    resource_ids = args.resource_ids
+    if not resource_ids:
+        resource_ids = teardown.collect_resource_ids(
+            client, args.resource_group, args.account or None)
+    on_deleted = print
+    resizer = None
+    if args.shrink_pools:
+        import pool_resizer
+        resizer = pool_resizer.PoolResizer(client)
+        on_deleted = resizer.teardown_hook(resource_ids, print)
+    try:
+        teardown.teardown(client, resource_ids, on_deleted=on_deleted)
+    finally:
+        if resizer is not None:
+            resizer.close()
+    return 0
+
+
+def build_parser():
+    """Builds the argument parser of the command line
+
+    Returns:
+        ArgumentParser: Returns the parser, the handler of the chosen
+            subcommand is stored in the func attribute of the parsed
+            arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='anf', description='Azure NetApp Files sample command line')
+    parser.add_argument(
+        '--subscription-id', help='Defaults to the subscription of the '
+        'AZURE_AUTH_LOCATION credential file')
+    parser.add_argument(
+        '--token-cache', help='Token cache file, defaults to '
+        'AZURE_TOKEN_CACHE_LOCATION')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    provision_parser = subparsers.add_parser(
+        'provision', help='Creates an account, capacity pool and volume')
+    provision_parser.add_argument('-g', '--resource-group', required=True)
+    provision_parser.add_argument('-l', '--location', required=True)
+    provision_parser.add_argument('-a', '--account', required=True)
+    provision_parser.add_argument('-p', '--pool')
+    provision_parser.add_argument('-v', '--volume')
+    provision_parser.add_argument('--service-level', default=SERVICE_LEVEL)
+    provision_parser.add_argument('--pool-size', type=int,
+                                  default=POOL_SIZE_IN_TIB, help='TiB')
+    provision_parser.add_argument('--volume-size', type=int,
+                                  default=VOLUME_SIZE_IN_GIB, help='GiB')
+    provision_parser.add_argument('--subnet-id')
+    provision_parser.set_defaults(func=provision)
+
+    batch_parser = subparsers.add_parser(
+        'provision-batch', help='Creates the volumes of a YAML or CSV spec '
+        'file concurrently, exits with 1 if any failed')
+    batch_parser.add_argument('spec_file')
+    batch_parser.add_argument('--report', help='Per volume results, CSV if '
+                              'the name ends with .csv, JSON otherwise')
+    batch_parser.add_argument('--max-concurrency', type=int, default=16)
+    batch_parser.add_argument('--per-pool-concurrency', type=int, default=4)
+    batch_parser.add_argument('--check-capacity', action='store_true',
+                              help='Lists the deployed pools and volumes to '
+                              'check that the volumes fit their pool')
+    batch_parser.add_argument('--auto-resize', action='store_true',
+                              help='Grows the capacity pools the volumes do '
+                              'not fit in')
+    for flags in (('-g', '--resource-group'), ('-a', '--account'),
+                  ('-p', '--pool'), ('-l', '--location'), ('--size-gib',),
+                  ('--service-level',), ('--subnet-id',)):
+        batch_parser.add_argument(
+            *flags, help='Default for volumes not setting it')
+    batch_parser.set_defaults(func=provision_batch)
+
+    list_parser = subparsers.add_parser(
+        'list', help='Prints the ids of the ANF resources of a resource '
+        'group')
+    list_parser.add_argument('-g', '--resource-group', required=True)
+    list_parser.add_argument('-a', '--account', action='append')
+    list_parser.set_defaults(func=list_resources)
+
+    wait_parser = subparsers.add_parser(
+        'wait', help='Waits for resources to exist, exits with 1 on timeout')
+    wait_parser.add_argument('resource_ids', nargs='+')
+    wait_parser.add_argument('--absent', action='store_true',
+                             help='Waits for the resources to be gone')
+    wait_parser.add_argument('--interval', type=float, default=10)
+    wait_parser.add_argument('--timeout', type=float, default=600)
+    wait_parser.set_defaults(func=wait)
+
+    snapshot_parser = subparsers.add_parser(
+        'snapshot', help='Snapshots all volumes of a resource group at once '
+        'and prunes expired snapshots, exits with 1 if any snapshot failed')
+    snapshot_parser.add_argument('-g', '--resource-group', required=True)
+    snapshot_parser.add_argument('-a', '--account', action='append')
+    snapshot_parser.add_argument('--prefix', default='fleet',
+                                 help='Snapshot name prefix, retention only '
+                                 'prunes snapshots named after it')
+    snapshot_parser.add_argument('--keep-last', type=int,
+                                 help='Snapshots kept per volume')
+    snapshot_parser.add_argument('--max-age-days', type=float,
+                                 help='Age past which snapshots are pruned')
+    snapshot_parser.add_argument('--max-concurrency', type=int, default=64)
+    snapshot_parser.add_argument('--dry-run', action='store_true',
+                                 help='Only reports the expired snapshots')
+    snapshot_parser.set_defaults(func=snapshot_fleet)
+
+    teardown_parser = subparsers.add_parser(
+        'teardown', help='Deletes resources in dependency order')
+    teardown_parser.add_argument('resource_ids', nargs='*')
+    teardown_parser.add_argument('-g', '--resource-group')
+    teardown_parser.add_argument('-a', '--account', action='append')
+    teardown_parser.add_argument('--shrink-pools', action='store_true',
+                                 help='Shrinks the capacity pools left in '
+                                 'place as their volumes are deleted')
+    teardown_parser.set_defaults(func=teardown_resources)
+
+    return parser
+
+
+def main(argv=None, client=None):
+    """Runs the command line
+
+    Args:
+        argv (list): Optional. Arguments, defaults to sys.argv
+        client (NetAppManagementClient): Optional. Client to be used instead
+            of one authenticated with the AZURE_AUTH_LOCATION credentials
+
+    Returns:
+        int: Returns the process exit code
+    """
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'provision' and args.volume and \
+            not (args.pool and args.subnet_id):
+        parser.error('--volume requires --pool and --subnet-id')
+    if args.command == 'teardown' and not (args.resource_ids or
+                                           args.resource_group):
+        parser.error('teardown requires resource ids or --resource-group')
+
+    return args.func(args, client or _netapp_client(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
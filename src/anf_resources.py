@@ -0,0 +1,227 @@
+# anf_resources.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Functions creating ANF accounts, capacity pools, volumes and snapshots,
+# shared by example.py, anf_cli.py and batch_provision.py. They only import
+# the SDK models, not the sample's own dependencies.
+
+import tracing
+from azure.mgmt.netapp.models import NetAppAccount, \
+    CapacityPool, \
+    Volume, \
+    Snapshot
+
+
+@tracing.traced()
+def create_account(client, resource_group_name, anf_account_name,
+                   location, tags=None):
+    """Creates an Azure NetApp Files Account
+
+    Function that creates an Azure NetApp Account, which requires building the
+    account body object first.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            account will be created
+        location (string): Azure short name of the region where resource will
+            be deployed
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        NetAppAccount: Returns the newly created NetAppAccount resource
+    """
+
+    account_body = NetAppAccount(location=location, tags=tags)
+
+    return client.accounts.begin_create_or_update(resource_group_name,
+                                            anf_account_name,
+                                            account_body).result()
+
+
+@tracing.traced()
+def create_capacitypool_async(client, resource_group_name,
+                              anf_account_name, capacitypool_name,
+                              service_level, size, location, tags=None):
+    """Creates a capacity pool within an account
+
+    Function that creates a Capacity Pool, capacity pools are needed to define
+    maximum service level and capacity.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            capacity pool will be created, it needs to be the same as the
+            Account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool will be created
+        capacitypool_name (string): Capacity pool name
+        service_level (string): Desired service level for this new capacity
+            pool, valid values are "Ultra","Premium","Standard"
+        size (long): Capacity pool size, values range from 4398046511104
+            (4TiB) to 549755813888000 (500TiB)
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        CapacityPool: Returns the newly created capacity pool resource
+    """
+
+    capacitypool_body = CapacityPool(
+        location=location,
+        service_level=service_level,
+        size=size,
+        tags=tags)
+
+    return client.pools.begin_create_or_update(resource_group_name, 
+                                               anf_account_name,  
+                                               capacitypool_name,
+                                               capacitypool_body).result()
+
+
+@tracing.traced()
+def create_volume(client, resource_group_name, anf_account_name,
+                  capacitypool_name, volume_name, volume_usage_quota,
+                  service_level, subnet_id, location, tags=None,
+                  protocol_types=None):
+    """Creates a volume within a capacity pool
+
+    Function that in this example creates a NFSv3 volume within a capacity
+    pool, as a note service level needs to be the same as the capacity pool.
+    This function also defines the volume body as the configuration settings
+    of the new volume.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            volume will be created, it needs to be the same as the account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool holding the volume exists
+        capacitypool_name (string): Capacity pool name where volume will be
+            created
+        volume_name (string): Volume name
+        volume_usage_quota (long): Volume size in bytes, minimum value is
+            107374182400 (100GiB), maximum value is 109951162777600 (100TiB)
+        service_level (string): Volume service level, needs to be the same as
+            the capacity pool, valid values are "Ultra","Premium","Standard"
+        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
+            subnet
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+        protocol_types (list): Optional. Volume protocols, default value is
+            ["NFSv3"]
+
+    Returns:
+        Volume: Returns the newly created volume resource
+    """
+
+    volume_body = Volume(
+        usage_threshold=volume_usage_quota,
+        creation_token=volume_name,
+        location=location,
+        service_level=service_level,
+        subnet_id=subnet_id,
+        protocol_types=protocol_types or ["NFSv3"],
+        tags=tags)
+
+    return client.volumes.begin_create_or_update(resource_group_name,
+                                           anf_account_name,
+                                           capacitypool_name,
+                                           volume_name,
+                                           volume_body).result()
+
+
+@tracing.traced()
+def create_volume_from_snapshot(client, resource_group_name, anf_account_name,
+                                capacitypool_name, volume, snapshot_id,
+                                volume_name, tags=None):
+    """Creates a volume from a snapshot
+
+    Function that creates a volume from an existing snapshot. This example use
+    the previous created volume that had a snapshot taken to gather some
+    important information to create a new volume from the snapshot, noted in
+    the volume_body object.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            volume will be created, it needs to be the same as the account
+        anf_account_name (string): Name of the Azure NetApp Files Account
+            where the capacity pool holding the volume exists
+        capacitypool_name (string): Capacity pool name where volume will be
+            created
+        volume (Volume): Original volume object where the snapshot was taken
+        snapshot_id (string): UUID v4 name of the snapshot
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        Volume: Returns the newly created volume resource
+    """
+
+
+    volume_body = Volume(
+        snapshot_id=snapshot_id,
+        export_policy=volume.export_policy,
+        usage_threshold=volume.usage_threshold,
+        creation_token=volume_name,
+        location=volume.location,
+        service_level=volume.service_level,
+        subnet_id=volume.subnet_id,
+        protocol_types=volume.protocol_types,
+        tags=tags)
+
+    return client.volumes.begin_create_or_update(resource_group_name,
+                                           anf_account_name,
+                                           capacitypool_name,
+                                           volume_name,
+                                           volume_body).result()
+
+
+@tracing.traced()
+def create_snapshot(client, resource_group_name, anf_account_name,
+                    capacitypool_name, volume_name, snapshot_name,
+                    location):
+    """Creates a volume snapshot
+
+    Function that creates a volume snapshot.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider 
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            snapshot will be created, it needs to be the same as the account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool holding the volume exists
+        capacitypool_name (string): Capacity pool name where volume to be taken
+            the snapshot exists
+        volume_name (string): Name of the volume to take the snapshot
+        snapshot_name (string): Snapshot name
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+
+    Returns:
+        Snapshot: Returns the newly created snapshot resource
+    """
+
+    snapshot_body = Snapshot(location=location)
+
+    return client.snapshots.begin_create(resource_group_name,
+                                   anf_account_name,
+                                   capacitypool_name,
+                                   volume_name,
+                                   snapshot_name,
+                                   snapshot_body).result()
@@ -0,0 +1,500 @@
+# async_example.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import asyncio
+import polling
+import sample_utils
+import resource_uri_utils
+import throttling
+from haikunator import Haikunator
+from azure.core.exceptions import AzureError, HttpResponseError, \
+    ResourceNotFoundError
+from azure.mgmt.netapp.aio import NetAppManagementClient
+from azure.mgmt.resource.resources.aio import ResourceManagementClient
+from azure.mgmt.netapp.models import NetAppAccount, \
+    CapacityPool, \
+    Volume, \
+    Snapshot, \
+    CapacityPoolPatch, \
+    VolumePatch
+from sample_utils import console_output, print_header
+
+# Variables to be changed to be in accordance to the environment where this sample will be executed
+LOCATION = 'eastus2'
+RESOURCE_GROUP_NAME = 'anf01-rg'
+VNET_NAME = 'vnet-02'
+SUBNET_NAME = 'anf-sn'
+VNET_RESOURCE_GROUP_NAME = 'anf01-rg'
+CAPACITYPOOL_NAME = "Pool01"
+CAPACITYPOOL_SERVICE_LEVEL = "Standard"
+CAPACITYPOOL_SIZE = 4398046511104  # 4TiB
+VOLUME_USAGE_QUOTA = 107374182400  # 100GiB
+# Number of independent account->pool->volume->snapshot->clone workflows
+# driven concurrently by the event loop
+WORKFLOW_COUNT = 2
+
+# Resource SDK related (change only if API version is not supported anymore)
+VIRTUAL_NETWORKS_SUBNET_API_VERSION = '2018-11-01'
+
+
+async def create_account(client, resource_group_name, anf_account_name,
+                         location, tags=None):
+    """Creates an Azure NetApp Files Account
+
+    Asyncio version of example.create_account.
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            account will be created
+        anf_account_name (string): Name of the account
+        location (string): Azure short name of the region where resource will
+            be deployed
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        NetAppAccount: Returns the newly created NetAppAccount resource
+    """
+
+    account_body = NetAppAccount(location=location, tags=tags)
+
+    poller = await client.accounts.begin_create_or_update(resource_group_name,
+                                                          anf_account_name,
+                                                          account_body)
+    return await poller.result()
+
+
+async def create_capacitypool(client, resource_group_name, anf_account_name,
+                              capacitypool_name, service_level, size,
+                              location, tags=None):
+    """Creates a capacity pool within an account
+
+    Asyncio version of example.create_capacitypool_async.
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            capacity pool will be created, it needs to be the same as the
+            Account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool will be created
+        capacitypool_name (string): Capacity pool name
+        service_level (string): Desired service level for this new capacity
+            pool, valid values are "Ultra","Premium","Standard"
+        size (long): Capacity pool size, values range from 4398046511104
+            (4TiB) to 549755813888000 (500TiB)
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        CapacityPool: Returns the newly created capacity pool resource
+    """
+
+    capacitypool_body = CapacityPool(
+        location=location,
+        service_level=service_level,
+        size=size,
+        tags=tags)
+
+    poller = await client.pools.begin_create_or_update(resource_group_name,
+                                                       anf_account_name,
+                                                       capacitypool_name,
+                                                       capacitypool_body)
+    return await poller.result()
+
+
+async def create_volume(client, resource_group_name, anf_account_name,
+                        capacitypool_name, volume_name, volume_usage_quota,
+                        service_level, subnet_id, location, tags=None):
+    """Creates a volume within a capacity pool
+
+    Asyncio version of example.create_volume, creates a NFSv3 volume.
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            volume will be created, it needs to be the same as the account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool holding the volume exists
+        capacitypool_name (string): Capacity pool name where volume will be
+            created
+        volume_name (string): Volume name
+        volume_usage_quota (long): Volume size in bytes, minimum value is
+            107374182400 (100GiB), maximum value is 109951162777600 (100TiB)
+        service_level (string): Volume service level, needs to be the same as
+            the capacity pool, valid values are "Ultra","Premium","Standard"
+        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
+            subnet
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        Volume: Returns the newly created volume resource
+    """
+
+    volume_body = Volume(
+        usage_threshold=volume_usage_quota,
+        creation_token=volume_name,
+        location=location,
+        service_level=service_level,
+        subnet_id=subnet_id,
+        protocol_types=["NFSv3"],
+        tags=tags)
+
+    poller = await client.volumes.begin_create_or_update(resource_group_name,
+                                                         anf_account_name,
+                                                         capacitypool_name,
+                                                         volume_name,
+                                                         volume_body)
+    return await poller.result()
+
+
+async def create_volume_from_snapshot(client, resource_group_name,
+                                      anf_account_name, capacitypool_name,
+                                      volume, snapshot_id, volume_name,
+                                      tags=None):
+    """Creates a volume from a snapshot
+
+    Asyncio version of example.create_volume_from_snapshot.
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            volume will be created, it needs to be the same as the account
+        anf_account_name (string): Name of the Azure NetApp Files Account
+            where the capacity pool holding the volume exists
+        capacitypool_name (string): Capacity pool name where volume will be
+            created
+        volume (Volume): Original volume object where the snapshot was taken
+        snapshot_id (string): UUID v4 name of the snapshot
+        volume_name (string): Name of the new volume
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        Volume: Returns the newly created volume resource
+    """
+
+    volume_body = Volume(
+        snapshot_id=snapshot_id,
+        export_policy=volume.export_policy,
+        usage_threshold=volume.usage_threshold,
+        creation_token=volume_name,
+        location=volume.location,
+        service_level=volume.service_level,
+        subnet_id=volume.subnet_id,
+        protocol_types=volume.protocol_types,
+        tags=tags)
+
+    poller = await client.volumes.begin_create_or_update(resource_group_name,
+                                                         anf_account_name,
+                                                         capacitypool_name,
+                                                         volume_name,
+                                                         volume_body)
+    return await poller.result()
+
+
+async def create_snapshot(client, resource_group_name, anf_account_name,
+                          capacitypool_name, volume_name, snapshot_name,
+                          location):
+    """Creates a volume snapshot
+
+    Asyncio version of example.create_snapshot.
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            snapshot will be created, it needs to be the same as the account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool holding the volume exists
+        capacitypool_name (string): Capacity pool name where volume to be taken
+            the snapshot exists
+        volume_name (string): Name of the volume to take the snapshot
+        snapshot_name (string): Snapshot name
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+
+    Returns:
+        Snapshot: Returns the newly created snapshot resource
+    """
+
+    snapshot_body = Snapshot(location=location)
+
+    poller = await client.snapshots.begin_create(resource_group_name,
+                                                 anf_account_name,
+                                                 capacitypool_name,
+                                                 volume_name,
+                                                 snapshot_name,
+                                                 snapshot_body)
+    return await poller.result()
+
+
+async def update_capacitypool_size(client, resource_group_name,
+                                   anf_account_name, capacity_pool, size):
+    """Changes the size of a capacity pool
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group of the pool
+        anf_account_name (string): Name of the account holding the pool
+        capacity_pool (CapacityPool): Capacity pool to be resized
+        size (long): New capacity pool size in bytes
+
+    Returns:
+        CapacityPool: Returns the updated capacity pool resource
+    """
+
+    capacity_pool_patch = CapacityPoolPatch(location=capacity_pool.location,
+                                            size=size)
+
+    poller = await client.pools.begin_update(
+        resource_group_name,
+        anf_account_name,
+        resource_uri_utils.get_anf_capacity_pool(capacity_pool.id),
+        capacity_pool_patch)
+    return await poller.result()
+
+
+async def update_volume_size(client, resource_group_name, anf_account_name,
+                             volume, size):
+    """Changes the usage threshold (size) of a volume
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group of the volume
+        anf_account_name (string): Name of the account holding the volume
+        volume (Volume): Volume to be resized
+        size (long): New volume size in bytes
+
+    Returns:
+        Volume: Returns the updated volume resource
+    """
+
+    volume_patch = VolumePatch(location=volume.location,
+                               service_level=volume.service_level,
+                               usage_threshold=size)
+
+    poller = await client.volumes.begin_update(
+        resource_group_name,
+        anf_account_name,
+        resource_uri_utils.get_anf_capacity_pool(volume.id),
+        resource_uri_utils.get_anf_volume(volume.id),
+        volume_patch)
+    return await poller.result()
+
+
+async def resource_exists(resource_client, resource_id, api_version):
+    """Checks if an Azure resource exists
+
+    Asyncio version of sample_utils.resource_exists.
+
+    Args:
+        resource_client (aio.ResourceManagementClient): Azure Resource
+            Manager Client
+        resource_id (string): Resource Id of the resource to be checked upon
+        api_version (string): Resource provider specific API version
+
+    Returns:
+        boolean: Returns True if the resource exists
+    """
+
+    try:
+        return await resource_client.resources.check_existence_by_id(
+            resource_id, api_version)
+    except HttpResponseError as e:
+        if e.status_code == 405:  # HEAD not supported
+            try:
+                await resource_client.resources.get_by_id(resource_id,
+                                                          api_version)
+                return True
+            except HttpResponseError as he:
+                if he.status_code == 404:
+                    return False
+        raise  # If not 405 or 404, not expected
+
+
+async def wait_for_anf_resource(client, resource_id, interval_in_sec=10,
+                                retries=60, backoff=None, **poll_kwargs):
+    """Waits for specific anf resource start existing
+
+    Asyncio version of sample_utils.wait_for_anf_resource, other workflows
+    keep running while this one waits.
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be checked upon
+        interval_in_sec (int): Maximum interval used between checks
+        retries (int): Number of maximum intervals before giving up
+        backoff (Backoff): Optional. Custom delay schedule
+        poll_kwargs: Optional keyword arguments for
+            polling.poll_until_async, e.g. clock and sleep
+
+    Returns:
+        PollResult: Returns the polling outcome
+    """
+
+    async def probe():
+        try:
+            await sample_utils.get_anf_resource(client, resource_id)
+            return True, None
+        except ResourceNotFoundError as ex:
+            return False, polling.get_retry_after(ex.response)
+
+    return await polling.poll_until_async(
+        probe,
+        backoff=backoff or polling.Backoff(maximum_in_sec=interval_in_sec),
+        timeout_in_sec=interval_in_sec * retries,
+        **poll_kwargs)
+
+
+async def run_workflow(client, resource_group_name, anf_account_name,
+                       subnet_id, location):
+    """Provisions one account, pool, volume, snapshot and clone
+
+    Steps that depend on each other are awaited in sequence, the final pool
+    and volume resizes are independent and their pollers are awaited
+    concurrently.
+
+    Args:
+        client (aio.NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group
+        anf_account_name (string): Name of the account to be created
+        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
+            subnet
+        location (string): Azure short name of the region
+
+    Returns:
+        list: Returns the account, capacity pool, volume, snapshot and volume
+            from snapshot resources, in that order
+    """
+
+    account = await create_account(client, resource_group_name,
+                                   anf_account_name, location)
+    console_output('\t{}: account created'.format(anf_account_name))
+
+    capacity_pool = await create_capacitypool(client, resource_group_name,
+                                              account.name,
+                                              CAPACITYPOOL_NAME,
+                                              CAPACITYPOOL_SERVICE_LEVEL,
+                                              CAPACITYPOOL_SIZE, location)
+    pool_name = resource_uri_utils.get_anf_capacity_pool(capacity_pool.id)
+    console_output('\t{}: capacity pool created'.format(anf_account_name))
+
+    volume_name = 'Vol-{}-{}'.format(anf_account_name, pool_name)
+    volume = await create_volume(client, resource_group_name, account.name,
+                                 pool_name, volume_name, VOLUME_USAGE_QUOTA,
+                                 CAPACITYPOOL_SERVICE_LEVEL, subnet_id,
+                                 location)
+    console_output('\t{}: volume created'.format(anf_account_name))
+
+    snapshot_name = 'Snapshot-{}'.format(volume_name)
+    snapshot = await create_snapshot(client, resource_group_name,
+                                     account.name, pool_name, volume_name,
+                                     snapshot_name, location)
+    await wait_for_anf_resource(client, snapshot.id)
+    console_output('\t{}: snapshot created'.format(anf_account_name))
+
+    volume_from_snapshot = await create_volume_from_snapshot(
+        client, resource_group_name, account.name, pool_name, volume,
+        snapshot.snapshot_id, 'Vol-{}'.format(snapshot_name))
+    console_output('\t{}: volume from snapshot created'.format(
+        anf_account_name))
+
+    capacity_pool, volume = await asyncio.gather(
+        update_capacitypool_size(client, resource_group_name, account.name,
+                                 capacity_pool,
+                                 sample_utils.get_tib_in_bytes(10)),
+        update_volume_size(client, resource_group_name, account.name,
+                           volume, sample_utils.get_tib_in_bytes(1)))
+    console_output('\t{}: capacity pool and volume updated'.format(
+        anf_account_name))
+
+    return [account, capacity_pool, volume, snapshot, volume_from_snapshot]
+
+
+async def run_example(workflow_count=WORKFLOW_COUNT):
+    """Azure NetApp Files SDK asyncio management example."""
+
+    print_header("Azure NetAppFiles Python SDK Sample - asyncio sample "
+        "project that provisions several independent ANF hierarchies "
+        "concurrently")
+
+    credentials, subscription_id = sample_utils.get_async_credentials()
+    subnet_id = '/subscriptions/{}/resourceGroups/{}/providers/Microsoft.Network/virtualNetworks/{}/subnets/{}'\
+                .format(subscription_id,
+                        VNET_RESOURCE_GROUP_NAME,
+                        VNET_NAME,
+                        SUBNET_NAME)
+
+    account_names = [Haikunator().haikunate(delimiter='')
+                     for i in range(workflow_count)]
+
+    governor = throttling.default_governor(subscription_id)
+    async with credentials, \
+            NetAppManagementClient(
+                credentials, subscription_id,
+                per_retry_policies=[throttling.AsyncThrottlingPolicy(governor)]
+            ) as anf_client, \
+            ResourceManagementClient(
+                credentials, subscription_id,
+                per_retry_policies=[throttling.AsyncThrottlingPolicy(governor)]
+            ) as resources_client:
+
+        # Checking if vnet/subnet information leads to a valid resource
+        if not await resource_exists(resources_client, subnet_id,
+                                     VIRTUAL_NETWORKS_SUBNET_API_VERSION):
+            console_output("ERROR: Subnet not with id {} not found".format(
+                subnet_id))
+            raise Exception("Subnet not found error. Subnet Id {}".format(
+                subnet_id))
+
+        console_output('Running {} workflows concurrently ...'.format(
+            workflow_count))
+        results = await asyncio.gather(
+            *[run_workflow(anf_client, RESOURCE_GROUP_NAME, account_name,
+                           subnet_id, LOCATION)
+              for account_name in account_names],
+            return_exceptions=True)
+
+    failures = 0
+    for account_name, result in zip(account_names, results):
+        if isinstance(result, AzureError):
+            failures += 1
+            console_output('\t{}: an error ocurred. Error details: {}'.format(
+                account_name, result.message))
+        elif isinstance(result, Exception):
+            raise result
+        else:
+            console_output('\t{}: completed, resource ids: {}'.format(
+                account_name, ', '.join(r.id for r in result)))
+
+    if failures:
+        raise Exception('{} of {} workflows failed'.format(failures,
+                                                           workflow_count))
+
+
+# This script expects that the following environment var are set:
+#
+# AZURE_AUTH_LOCATION: contains path for azureauth.json file
+
+if __name__ == "__main__":
+
+    asyncio.run(run_example())
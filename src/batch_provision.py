@@ -0,0 +1,328 @@
+# batch_provision.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import contextvars
+import csv
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import anf_resources
+import tracing
+
+# Maximum number of volumes created at once, across all pools
+MAX_CONCURRENCY = 16
+# Maximum number of volumes created at once within one capacity pool
+PER_POOL_CONCURRENCY = 4
+
+SPEC_FIELDS = ('name', 'resource_group', 'account', 'pool', 'size_gib',
+               'service_level', 'subnet_id', 'location', 'protocol_types')
+REPORT_FIELDS = ('name', 'resource_group', 'account', 'pool', 'size_gib',
+                 'status', 'volume_id', 'duration_sec', 'error')
+_REQUIRED_FIELDS = ('name', 'resource_group', 'account', 'pool', 'size_gib',
+                    'service_level', 'subnet_id', 'location')
+
+
+class VolumeSpec(object):
+    """Settings of one volume to be created
+
+    Args:
+        name (string): Volume name, also used as creation token
+        resource_group (string): Resource group of the account
+        account (string): Azure NetApp Files account name
+        pool (string): Capacity pool name
+        size_gib (int): Volume size in GiB
+        service_level (string): Service level of the capacity pool
+        subnet_id (string): Resource id of the delegated subnet
+        location (string): Azure short name of the region of the account
+        protocol_types (list): Optional. Protocols, defaults to ["NFSv3"]
+        tags (dict): Optional. Key-value pairs to tag the volume
+    """
+
+    __slots__ = SPEC_FIELDS + ('tags',)
+
+    def __init__(self, name, resource_group, account, pool, size_gib,
+                 service_level, subnet_id, location, protocol_types=None,
+                 tags=None):
+        self.name = name
+        self.resource_group = resource_group
+        self.account = account
+        self.pool = pool
+        self.size_gib = int(size_gib)
+        self.service_level = service_level
+        self.subnet_id = subnet_id
+        self.location = location
+        self.protocol_types = protocol_types or ['NFSv3']
+        self.tags = tags
+
+    @property
+    def pool_key(self):
+        """tuple: Lower case (resource group, account, pool)"""
+        return (self.resource_group.lower(), self.account.lower(),
+                self.pool.lower())
+
+
+class VolumeResult(object):
+    """Outcome of the creation of one volume
+
+    Attributes:
+        spec (VolumeSpec): Requested volume
+        volume_id (string): Resource id of the created volume, None on error
+        error (Exception): Error raised by the creation, None on success
+        started (float): Clock time the creation started
+        finished (float): Clock time the creation ended
+    """
+
+    __slots__ = ('spec', 'volume_id', 'error', 'started', 'finished')
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.volume_id = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def succeeded(self):
+        """boolean: True if the volume was created"""
+        return self.finished is not None and self.error is None
+
+    @property
+    def duration(self):
+        """float: Seconds the creation took, None if it did not run"""
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def to_dict(self):
+        """Returns the result as a flat, JSON serializable dict"""
+        return OrderedDict(zip(REPORT_FIELDS, (
+            self.spec.name,
+            self.spec.resource_group,
+            self.spec.account,
+            self.spec.pool,
+            self.spec.size_gib,
+            'succeeded' if self.succeeded else
+            'failed' if self.error is not None else 'not started',
+            self.volume_id,
+            None if self.duration is None else round(self.duration, 3),
+            None if self.error is None else str(self.error))))
+
+
+def _parse_tags(tags, source, index):
+    # CSV cells hold tags as "key=value;key2=value2"
+    if tags is None or isinstance(tags, dict):
+        return tags
+    if not isinstance(tags, str):
+        raise ValueError('{} entry {}: tags must be a mapping or '
+                         'key=value;key2=value2'.format(source, index))
+    parsed = {}
+    for pair in tags.split(';'):
+        if not pair.strip():
+            continue
+        key, separator, value = pair.partition('=')
+        if not separator or not key.strip():
+            raise ValueError('{} entry {}: tag {!r} is not key=value'.format(
+                source, index, pair.strip()))
+        parsed[key.strip()] = value.strip()
+    return parsed
+
+
+def _build_specs(entries, defaults, source):
+    specs = []
+    seen = set()
+    for index, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError('{} entry {}: expected a mapping of volume '
+                             'fields, got {!r}'.format(source, index, entry))
+        values = dict(defaults or {})
+        values.update(dict((key, value) for key, value in entry.items()
+                           if value not in (None, '')))
+        missing = [field for field in _REQUIRED_FIELDS if field not in values]
+        if missing:
+            raise ValueError('{} entry {}: missing {}'.format(
+                source, index, ', '.join(missing)))
+        unknown = set(values) - set(VolumeSpec.__slots__)
+        if unknown:
+            raise ValueError('{} entry {}: unknown fields {}'.format(
+                source, index, ', '.join(sorted(unknown))))
+        if isinstance(values.get('protocol_types'), str):
+            values['protocol_types'] = [
+                protocol.strip()
+                for protocol in values['protocol_types'].split(',')]
+        if 'tags' in values:
+            values['tags'] = _parse_tags(values['tags'], source, index)
+        try:
+            values['size_gib'] = int(values['size_gib'])
+        except (TypeError, ValueError):
+            raise ValueError('{} entry {}: size_gib must be a whole number '
+                             'of GiB, got {!r}'.format(
+                                 source, index, values['size_gib']))
+
+        spec = VolumeSpec(**values)
+        key = spec.pool_key + (spec.name.lower(),)
+        if key in seen:
+            raise ValueError('{} entry {}: volume {} is declared twice'.format(
+                source, index, spec.name))
+        seen.add(key)
+        specs.append(spec)
+    return specs
+
+
+def load_specs(path, defaults=None):
+    """Reads volume specs from a YAML or CSV file
+
+    CSV files have a header row naming the VolumeSpec fields, protocol_types
+    being comma separated and tags written as key=value;key2=value2. YAML
+    files hold either a list of volumes or a mapping with a volumes list and
+    optional defaults applied to every volume. YAML support requires PyYAML.
+
+    Args:
+        path (string): .yaml, .yml or .csv file
+        defaults (dict): Optional. Field values used when a volume does not
+            set them, e.g. the resource group, overridden by YAML defaults
+
+    Returns:
+        list: Returns the VolumeSpec objects in file order
+    """
+
+    defaults = dict(defaults or {})
+    extension = os.path.splitext(path)[1].lower()
+
+    with open(path, newline='') as spec_file:
+        if extension == '.csv':
+            entries = list(csv.DictReader(spec_file))
+        elif extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError('PyYAML is required to read {}, install it '
+                                  'with pip install pyyaml'.format(path))
+            document = yaml.safe_load(spec_file) or []
+            if isinstance(document, dict):
+                defaults.update(document.get('defaults') or {})
+                document = document.get('volumes') or []
+            entries = document
+        else:
+            raise ValueError('Unsupported spec file {}, expected .yaml, .yml '
+                             'or .csv'.format(path))
+
+    return _build_specs(entries, defaults, path)
+
+
+def _create(client, spec, resizer, reservation):
+    try:
+        if reservation is not None:
+            reservation.result()
+        return anf_resources.create_volume(
+            client, spec.resource_group, spec.account, spec.pool, spec.name,
+            spec.size_gib * 1024 ** 3, spec.service_level, spec.subnet_id,
+            spec.location, tags=spec.tags,
+            protocol_types=spec.protocol_types).id
+    finally:
+        if resizer is not None:
+            resizer.unreserve(spec.resource_group, spec.account, spec.pool,
+                              spec.name)
+
+
+def provision_volumes(client, specs, max_concurrency=MAX_CONCURRENCY,
+                      per_pool_concurrency=PER_POOL_CONCURRENCY,
+                      on_progress=None, resizer=None, clock=time.monotonic):
+    """Creates many volumes concurrently
+
+    Volumes are started in spec order as long as fewer than max_concurrency
+    creations run in total and fewer than per_pool_concurrency run in their
+    capacity pool. A volume waiting for its pool does not hold up volumes
+    of other pools. A failed creation is reported and does not stop the
+    others.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        specs (list): VolumeSpec objects, see load_specs
+        max_concurrency (int): Maximum number of creations at once
+        per_pool_concurrency (int): Maximum number of creations at once
+            within one capacity pool
+        on_progress (function): Optional. Called with the VolumeResult, the
+            number of finished volumes and the total every time a volume
+            finishes
+        resizer (PoolResizer): Optional. Grows the capacity pools before
+            volumes are created in them, see pool_resizer
+        clock (function): Optional. Clock used to time the creations,
+            defaults to time.monotonic
+
+    Returns:
+        list: Returns the VolumeResult objects in spec order
+    """
+
+    results = [VolumeResult(spec) for spec in specs]
+    # Every volume is reserved upfront, so that each pool is resized at most
+    # once for the whole batch
+    reservations = {}
+    if resizer is not None:
+        reservations = dict((result, resizer.reserve(
+            result.spec.resource_group, result.spec.account, result.spec.pool,
+            result.spec.name, result.spec.size_gib * 1024 ** 3))
+            for result in results)
+    pending = OrderedDict()
+    for result in results:
+        pending.setdefault(result.spec.pool_key, deque()).append(result)
+    running = {}
+    running_per_pool = dict.fromkeys(pending, 0)
+    finished_count = 0
+
+    with tracing.span('provision_volumes', volume_count=len(results)), \
+            ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while pending or running:
+            for pool_key in list(pending):
+                waiting = pending[pool_key]
+                while waiting and len(running) < max_concurrency and \
+                        running_per_pool[pool_key] < per_pool_concurrency:
+                    result = waiting.popleft()
+                    result.started = clock()
+                    running_per_pool[pool_key] += 1
+                    running[executor.submit(contextvars.copy_context().run,
+                                            _create, client, result.spec,
+                                            resizer,
+                                            reservations.get(result))] = \
+                        result
+                if not waiting:
+                    del pending[pool_key]
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                result = running.pop(future)
+                result.finished = clock()
+                running_per_pool[result.spec.pool_key] -= 1
+                try:
+                    result.volume_id = future.result()
+                except Exception as ex:
+                    result.error = ex
+                finished_count += 1
+                if on_progress is not None:
+                    on_progress(result, finished_count, len(results))
+
+    return results
+
+
+def write_report(results, path):
+    """Writes the per volume results to a CSV or JSON file
+
+    Args:
+        results (list): VolumeResult objects, see provision_volumes
+        path (string): Output file, CSV if it ends with .csv, JSON otherwise
+    """
+
+    rows = [result.to_dict() for result in results]
+    with open(path, 'w', newline='') as report_file:
+        if path.lower().endswith('.csv'):
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, report_file, indent=2)
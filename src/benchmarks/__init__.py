@@ -0,0 +1,10 @@
+# benchmarks package
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Benchmarks are executed from the src folder, e.g.:
+#
+#   python -m benchmarks.uri_parsing
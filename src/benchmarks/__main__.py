@@ -0,0 +1,57 @@
+# benchmarks command line
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks run --output baseline.json
+#   python -m benchmarks run --output current.json
+#   python -m benchmarks compare baseline.json current.json
+
+import argparse
+import sys
+from benchmarks import suite
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser(
+        'run', help='Runs the suite and writes the results to JSON')
+    run_parser.add_argument('--output', required=True)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--scale', type=float, default=1.0)
+    run_parser.add_argument('--lro-latency', type=float,
+                            default=suite.LRO_LATENCY)
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compares two result files, exits with 1 if any '
+        'benchmark regressed')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float,
+                                default=suite.REGRESSION_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = suite.run_suite(args.repeat, args.scale, args.lro_latency)
+        suite.save(results, args.output)
+        for name, result in results['results'].items():
+            print('{:<45} {:10.4f}s'.format(name, result['median']))
+        return 0
+
+    rows = suite.compare(suite.load(args.baseline), suite.load(args.current),
+                         args.threshold)
+    for name, before, after, change, regressed in rows:
+        print('{:<45} {:10.4f}s {:10.4f}s {:+7.1%}{}'.format(
+            name, before, after, change, '  REGRESSION' if regressed else ''))
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# arm_quota.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Runs concurrent readers against a fake resource provider with a small
+# subscription read quota, with and without a shared ThrottlingGovernor,
+# and reports the number of 429 responses and the duration.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks.arm_quota [threads] [reads per thread]
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+import throttling
+from fake_anf_server import FakeAnfServer, create_clients
+
+THREADS = 16
+READS_PER_THREAD = 50
+# Fake quota: READ_LIMIT reads per RATELIMIT_WINDOW seconds
+READ_LIMIT = 200
+RATELIMIT_WINDOW = 2
+RETRY_AFTER = 1
+
+
+class _ThrottledCounter(SansIOHTTPPolicy):
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def on_response(self, request, response):
+        if response.http_response.status_code == 429:
+            with self._lock:
+                self.count += 1
+
+
+def measure(governed, threads=THREADS, reads_per_thread=READS_PER_THREAD):
+    """Runs the readers once
+
+    Args:
+        governed (boolean): True to pace the readers with a governor sized
+            after the fake quota
+        threads (int): Number of concurrent readers
+        reads_per_thread (int): Number of accounts.get calls per reader
+
+    Returns:
+        int: Returns the number of 429 responses
+        float: Returns the duration in seconds
+    """
+
+    counter = _ThrottledCounter()
+    policies = [counter]
+    if governed:
+        governor = throttling.ThrottlingGovernor(reads=throttling.TokenBucket(
+            READ_LIMIT, READ_LIMIT / RATELIMIT_WINDOW, reserve_ratio=0))
+        policies.insert(0, throttling.ThrottlingPolicy(governor))
+
+    with FakeAnfServer(lro_latency=0, read_limit=READ_LIMIT,
+                       ratelimit_window=RATELIMIT_WINDOW,
+                       retry_after=RETRY_AFTER) as fake:
+        anf_client, _ = create_clients(fake.base_url,
+                                       per_retry_policies=policies)
+        anf_client.accounts.begin_create_or_update(
+            'rg', 'account', {'location': 'eastus'}).result()
+
+        def reader(_):
+            for _ in range(reads_per_thread):
+                anf_client.accounts.get('rg', 'account')
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(reader, range(threads)))
+        return counter.count, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else THREADS
+    reads = int(sys.argv[2]) if len(sys.argv) > 2 else READS_PER_THREAD
+    for governed in (False, True):
+        throttled, elapsed = measure(governed, threads, reads)
+        print('{:<13} {:>5} reads  {:>4} throttled  {:6.2f}s'.format(
+            'governed' if governed else 'ungoverned', threads * reads,
+            throttled, elapsed))
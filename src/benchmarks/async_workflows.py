@@ -0,0 +1,127 @@
+# async_workflows.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Runs the run_example creation and update steps against a local fake
+# resource provider, once workflow after workflow with the sync
+# NetAppManagementClient and the example helpers, and once concurrently
+# with the azure.mgmt.netapp.aio client and async_example.run_workflow.
+# Both clients go through their full HTTP pipeline, long running operation
+# pollers included, so the measurement covers the aiohttp transport.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks.async_workflows [workflow count ...]
+
+import asyncio
+import sys
+import time
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+from azure.mgmt.netapp.aio import NetAppManagementClient
+from azure.mgmt.netapp.models import CapacityPoolPatch, VolumePatch
+import async_example
+import example
+import sample_utils
+from fake_anf_server import FAKE_SUBSCRIPTION_ID, FakeAnfServer, \
+    FakeCredential, create_clients
+
+# Duration of every long running operation of the fake, in seconds
+LRO_LATENCY = 0.1
+# Interval of the long running operation pollers of both clients
+POLLING_INTERVAL = 0.05
+WORKFLOW_COUNTS = (1, 4, 16, 64)
+SUBNET_ID = '/subscriptions/s/resourceGroups/rg/providers' \
+    '/Microsoft.Network/virtualNetworks/vnet/subnets/anf'
+
+
+def create_async_client(base_url):
+    """Creates an aio NetAppManagementClient pointing at a FakeAnfServer"""
+    return NetAppManagementClient(FakeCredential(), FAKE_SUBSCRIPTION_ID,
+                                  base_url=base_url,
+                                  polling_interval=POLLING_INTERVAL,
+                                  authentication_policy=SansIOHTTPPolicy())
+
+
+def run_sync_workflow(client, account_name):
+    """Runs the run_example creation and update steps with the sync helpers"""
+    account = example.create_account(client, 'rg', account_name, 'eastus2')
+    pool = example.create_capacitypool_async(
+        client, 'rg', account_name, 'Pool01', 'Standard',
+        example.CAPACITYPOOL_SIZE, 'eastus2')
+    volume_name = 'Vol-{}-Pool01'.format(account_name)
+    volume = example.create_volume(client, 'rg', account_name, 'Pool01',
+                                   volume_name, example.VOLUME_USAGE_QUOTA,
+                                   'Standard', SUBNET_ID, 'eastus2')
+    snapshot = example.create_snapshot(client, 'rg', account_name, 'Pool01',
+                                       volume_name, 'snap', 'eastus2')
+    sample_utils.wait_for_anf_resource(client, snapshot.id)
+    example.create_volume_from_snapshot(client, 'rg', account_name, 'Pool01',
+                                        volume, snapshot.snapshot_id,
+                                        'Vol-snap')
+    client.pools.begin_update(
+        'rg', account_name, 'Pool01',
+        CapacityPoolPatch(location=pool.location,
+                          size=sample_utils.get_tib_in_bytes(10))).result()
+    client.volumes.begin_update(
+        'rg', account_name, 'Pool01', volume_name,
+        VolumePatch(location=volume.location,
+                    service_level=volume.service_level,
+                    usage_threshold=sample_utils.get_tib_in_bytes(1))).result()
+    return account
+
+
+def measure_sync(workflow_count, latency=LRO_LATENCY):
+    """Returns the seconds taken by workflow_count sequential sync workflows"""
+    with FakeAnfServer(lro_latency=latency) as fake:
+        client, _ = create_clients(fake.base_url,
+                                   polling_interval=POLLING_INTERVAL)
+        start = time.perf_counter()
+        for i in range(workflow_count):
+            run_sync_workflow(client, 'account{}'.format(i))
+        return time.perf_counter() - start
+
+
+def measure_async(workflow_count, latency=LRO_LATENCY):
+    """Returns the seconds taken by workflow_count concurrent aio workflows"""
+
+    async def run_all(base_url):
+        async with create_async_client(base_url) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*[
+                async_example.run_workflow(client, 'rg',
+                                           'account{}'.format(i), SUBNET_ID,
+                                           'eastus2')
+                for i in range(workflow_count)])
+            return time.perf_counter() - start
+
+    with FakeAnfServer(lro_latency=latency) as fake:
+        return asyncio.run(run_all(fake.base_url))
+
+
+def run(workflow_counts=WORKFLOW_COUNTS, latency=LRO_LATENCY):
+    """Runs the benchmark
+
+    Args:
+        workflow_counts (iterable): Numbers of concurrent workflows to try
+        latency (float): Long running operation duration of the fake
+
+    Returns:
+        dict: Returns workflow count -> (sync workflows/s, async workflows/s)
+    """
+    results = {}
+    for count in workflow_counts:
+        results[count] = (count / measure_sync(count, latency),
+                          count / measure_async(count, latency))
+    return results
+
+
+if __name__ == '__main__':
+    # Workflow progress messages are not part of the measurement
+    async_example.console_output = lambda message: None
+    counts = [int(c) for c in sys.argv[1:]] or WORKFLOW_COUNTS
+    for count, (sync_rate, async_rate) in run(counts).items():
+        print('{:>4} workflows  sync: {:7.2f}/s  async: {:7.2f}/s'.format(
+            count, sync_rate, async_rate))
@@ -0,0 +1,118 @@
+# capacity_plan.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Times capacity_planning.analyze and required_pool_sizes on a generated
+# fleet against the same computations written as Python loops over the
+# scalar sample_utils helpers, and checks that both agree. Requires NumPy.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks.capacity_plan [volume count] [pool count]
+
+import math
+import random
+import argparse
+import sys
+import time
+import capacity_planning
+import preflight
+import sample_utils
+
+VOLUME_COUNT = 50000
+POOL_COUNT = 500
+_RATES = dict(zip(preflight.SERVICE_LEVELS,
+                  capacity_planning.THROUGHPUT_MIBPS_PER_TIB.tolist()))
+
+
+def generate(volume_count=VOLUME_COUNT, pool_count=POOL_COUNT, seed=0):
+    """Builds a random fleet
+
+    Returns:
+        list: Returns the pool sizes in bytes
+        list: Returns the pool service level names
+        list: Returns the pool index of every volume
+        list: Returns the volume quotas in bytes
+    """
+
+    rand = random.Random(seed)
+    pool_size = [sample_utils.get_tib_in_bytes(rand.randint(4, 100))
+                 for _ in range(pool_count)]
+    pool_service_level = [rand.choice(preflight.SERVICE_LEVELS)
+                          for _ in range(pool_count)]
+    volume_pool = [rand.randrange(pool_count) for _ in range(volume_count)]
+    volume_quota = [rand.randint(100, 4096) * 1024 ** 3
+                    for _ in range(volume_count)]
+    return pool_size, pool_service_level, volume_pool, volume_quota
+
+
+def scalar(pool_size, pool_service_level, volume_pool, volume_quota):
+    """Computes headroom, volume throughput and required sizes in loops"""
+    allocated = [0] * len(pool_size)
+    volume_throughput = []
+    for pool, quota in zip(volume_pool, volume_quota):
+        allocated[pool] += quota
+        volume_throughput.append(sample_utils.get_bytes_in_tib(quota) *
+                                 _RATES[pool_service_level[pool]])
+    headroom = [size - used for size, used in zip(pool_size, allocated)]
+    required = [max(preflight.MIN_POOL_SIZE_TIB,
+                    math.ceil(sample_utils.get_bytes_in_tib(used)))
+                for used in allocated]
+    return headroom, volume_throughput, required
+
+
+def vectorized(pool_size, pool_service_level, volume_pool, volume_quota):
+    """Computes headroom, volume throughput and required sizes with NumPy"""
+    fleet = capacity_planning.Fleet(pool_size, pool_service_level,
+                                    volume_pool, volume_quota)
+    report = capacity_planning.analyze(fleet)
+    required = capacity_planning.required_pool_sizes(
+        fleet.volume_quota, fleet.volume_pool, fleet.pool_service_level)
+    return report.headroom, report.volume_throughput_mibps, required
+
+
+def measure(compute, fleet, repeat=5):
+    """Returns the best duration of compute in seconds and its result"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = compute(*fleet)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.capacity_plan')
+    parser.add_argument('volume_count', nargs='?', type=int,
+                        default=VOLUME_COUNT,
+                        help='Number of volumes in the fleet')
+    parser.add_argument('pool_count', nargs='?', type=int, default=POOL_COUNT,
+                        help='Number of capacity pools in the fleet')
+    args = parser.parse_args(argv)
+    if args.volume_count < 1:
+        parser.error('volume_count must be at least 1')
+    if args.pool_count < 1:
+        parser.error('pool_count must be at least 1')
+    volume_count, pool_count = args.volume_count, args.pool_count
+    fleet = generate(volume_count, pool_count)
+
+    results = {}
+    for compute in (scalar, vectorized):
+        elapsed, results[compute.__name__] = measure(compute, fleet)
+        print('{:<11} {:>7} volumes {:>5} pools  {:8.2f} ms'.format(
+            compute.__name__, volume_count, pool_count, elapsed * 1000))
+
+    expected, actual = results['scalar'], results['vectorized']
+    assert list(actual[0]) == expected[0], 'headroom differs'
+    assert all(math.isclose(a, e) for a, e in zip(actual[1], expected[1])), \
+        'volume throughput differs'
+    assert list(actual[2]) == expected[2], 'required pool sizes differ'
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# classification.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import argparse
+import sys
+import timeit
+import resource_uri_utils
+
+ID_COUNT = 100000
+
+ACCOUNT_ID_FORMAT = '/subscriptions/{0:08x}-0000-0000-0000-000000000000' \
+    '/resourceGroups/anf-rg/providers/Microsoft.NetApp' \
+    '/netAppAccounts/account{1}'
+
+
+def build_inventory(count):
+    """Builds a mixed account/pool/volume/snapshot inventory of ids"""
+    resource_ids = []
+    for i in range(count):
+        resource_id = ACCOUNT_ID_FORMAT.format(i % 4, i % 20)
+        depth = i % 4
+        if depth > 0:
+            resource_id += '/capacityPools/pool{}'.format(i % 8)
+        if depth > 1:
+            resource_id += '/volumes/vol{}'.format(i)
+        if depth > 2:
+            resource_id += '/snapshots/snap{}'.format(i)
+        resource_ids.append(resource_id)
+    return resource_ids
+
+
+def legacy_kind(resource_uri):
+    """Classification as performed by the original find/rfind helpers"""
+    if resource_uri.find('/providers/Microsoft.NetApp/netAppAccounts') == -1:
+        return None
+    is_snapshot = resource_uri.rfind('/snapshots/') > -1
+    is_volume = not is_snapshot and resource_uri.rfind('/volumes/') > -1
+    if is_snapshot:
+        return 'snapshot'
+    if is_volume:
+        return 'volume'
+    if resource_uri.rfind('/capacityPools/') > -1:
+        return 'capacity_pool'
+    if resource_uri.rfind('/backupPolicies/') == -1:
+        return 'account'
+    return None
+
+
+def per_id_functions(resource_ids):
+    """Classifies and parses each id with the per-id helpers"""
+    kinds = []
+    for resource_id in resource_ids:
+        kinds.append(legacy_kind(resource_id))
+        resource_uri_utils.get_resource_value(resource_id, '/resourceGroups')
+        resource_uri_utils.get_resource_value(resource_id, '/netAppAccounts')
+        resource_uri_utils.get_resource_value(resource_id, '/capacityPools')
+        resource_uri_utils.get_resource_value(resource_id, '/volumes')
+    return kinds
+
+
+def batch_function(resource_ids):
+    """Classifies and parses all ids with classify_resource_ids"""
+    return [parsed.kind for parsed
+            in resource_uri_utils.classify_resource_ids(resource_ids)]
+
+
+def run(id_count=ID_COUNT, repeat=3):
+    """Runs the benchmark
+
+    Args:
+        id_count (int): Number of ids in the inventory
+        repeat (int): Number of runs, the best one is reported
+
+    Returns:
+        dict: Returns "per_id" and "batch" best wall clock seconds
+    """
+    resource_ids = build_inventory(id_count)
+    assert per_id_functions(resource_ids) == batch_function(resource_ids)
+
+    return {
+        'per_id': min(timeit.repeat(lambda: per_id_functions(resource_ids),
+                                    number=1, repeat=repeat)),
+        'batch': min(timeit.repeat(lambda: batch_function(resource_ids),
+                                   number=1, repeat=repeat)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.classification')
+    parser.add_argument('count', nargs='?', type=int, default=ID_COUNT,
+                        help='Number of resource ids classified')
+    args = parser.parse_args(argv)
+    if args.count < 1:
+        parser.error('count must be at least 1')
+    result = run(args.count)
+    print('per id: {:.3f}s  batch: {:.3f}s  speedup: {:.1f}x'.format(
+        result['per_id'], result['batch'],
+        result['per_id'] / result['batch']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# export_lookup.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Measures the lookups per second of export_policy.ExportPolicyIndex, for
+# addresses given as integers and as strings, against a linear scan of the
+# rules with the ipaddress module, on generated 5 rule policies, and checks
+# that all of them agree.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks.export_lookup [lookup count]
+
+import ipaddress
+import random
+import argparse
+import sys
+import time
+from azure.mgmt.netapp.models import ExportPolicyRule
+import export_policy
+
+LOOKUP_COUNT = 1000000
+NETWORKS_PER_RULE = 20
+
+
+def generate_rules(rand):
+    """Builds 5 rules of NETWORKS_PER_RULE random CIDRs within 10.0.0.0/8"""
+    rules = []
+    for rule_index in range(1, 6):
+        networks = ['{}/{}'.format(
+            ipaddress.IPv4Address(0x0a000000 + rand.randrange(1 << 24)),
+            rand.randint(16, 30)) for _ in range(NETWORKS_PER_RULE)]
+        rules.append(ExportPolicyRule(
+            rule_index=rule_index, allowed_clients=','.join(networks),
+            unix_read_only=rule_index % 2 == 0,
+            unix_read_write=rule_index % 2 == 1, cifs=False, nfsv3=True,
+            nfsv41=False))
+    return rules
+
+
+def linear_scan(rules):
+    """Returns a lookup function scanning the rules in index order"""
+    parsed = [(rule, [ipaddress.IPv4Network(client, strict=False)
+                      for client in rule.allowed_clients.split(',')])
+              for rule in sorted(rules, key=lambda rule: rule.rule_index)]
+
+    def match(address):
+        address = ipaddress.IPv4Address(address)
+        for rule, networks in parsed:
+            if any(address in network for network in networks):
+                return rule
+        return None
+    return match
+
+
+def rate(match, addresses):
+    """Returns the lookups per second of match over addresses"""
+    start = time.perf_counter()
+    for address in addresses:
+        match(address)
+    return len(addresses) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.export_lookup')
+    parser.add_argument('lookup_count', nargs='?', type=int,
+                        default=LOOKUP_COUNT,
+                        help='Number of client addresses looked up')
+    args = parser.parse_args(argv)
+    if args.lookup_count < 1:
+        parser.error('lookup_count must be at least 1')
+    lookup_count = args.lookup_count
+    rand = random.Random(0)
+    rules = generate_rules(rand)
+    index = export_policy.ExportPolicyIndex(rules)
+    integers = [0x0a000000 + rand.randrange(1 << 24)
+                for _ in range(lookup_count)]
+    strings = [str(ipaddress.IPv4Address(address)) for address in integers]
+
+    scan = linear_scan(rules)
+    for address in strings[:10000]:
+        assert index.match(address) is scan(address), address
+    compiled = export_policy.compile_rules(rules)
+    compiled_index = export_policy.ExportPolicyIndex(compiled)
+    for address in integers[:10000]:
+        expected = index.match_int(address)
+        actual = compiled_index.match_int(address)
+        assert (expected is None) == (actual is None) and (
+            expected is None or export_policy._access(expected) ==
+            export_policy._access(actual)), address
+
+    print('{} rules, {} CIDRs compiled to {} rules, {} CIDRs, {} '
+          'intervals'.format(
+              len(rules), len(rules) * NETWORKS_PER_RULE, len(compiled),
+              sum(len(rule.allowed_clients.split(','))
+                  for rule in compiled), len(index.starts)))
+    print('{:<18} {:>12,.0f} lookups/s'.format(
+        'index, integers', rate(index.match_int, integers)))
+    print('{:<18} {:>12,.0f} lookups/s'.format(
+        'index, strings', rate(index.match, strings)))
+    print('{:<18} {:>12,.0f} lookups/s'.format(
+        'linear scan', rate(scan, strings[:max(1, lookup_count // 100)])))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
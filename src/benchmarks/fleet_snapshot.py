@@ -0,0 +1,88 @@
+# fleet_snapshot.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Snapshots every volume of a fake resource provider, once volume after
+# volume with example.create_snapshot, the way the sample takes a single
+# snapshot, and once with snapshot_scheduler.create_fleet_snapshot. Reports
+# how long it took, the window the requests were sent in, the largest skew
+# between the creation times of the snapshots and the number of requests.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks.fleet_snapshot [volume count]
+
+import sys
+import time
+import example
+import polling
+import snapshot_scheduler
+from fake_anf_server import FakeAnfServer, create_clients
+
+VOLUME_COUNT = 100
+LRO_LATENCY = 0.5
+
+
+def _volumes(client, volume_count):
+    example.create_account(client, 'rg', 'account', 'eastus')
+    example.create_capacitypool_async(client, 'rg', 'account', 'pool',
+                                      'Standard', 100 * 1024 ** 4, 'eastus')
+    return [example.create_volume(client, 'rg', 'account', 'pool',
+                                  'vol{}'.format(index), 100 * 1024 ** 3,
+                                  'Standard', '/subnet', 'eastus')
+            for index in range(volume_count)]
+
+
+def sequential(client, volumes):
+    """Snapshots the volumes one after the other
+
+    Returns:
+        float: Returns the window the requests were sent in, in seconds
+        list: Returns the creation times of the snapshots
+    """
+
+    issued = []
+    created = []
+    for volume in volumes:
+        issued.append(time.perf_counter())
+        created.append(example.create_snapshot(
+            client, 'rg', 'account', 'pool', volume.name.rsplit('/', 1)[-1],
+            'sequential', 'eastus').created)
+    return issued[-1] - issued[0], created
+
+
+def scheduled(client, volumes):
+    """Snapshots the volumes with create_fleet_snapshot
+
+    Returns:
+        float: Returns the window the requests were sent in, in seconds
+        list: Returns the creation times of the snapshots
+    """
+
+    fleet = snapshot_scheduler.create_fleet_snapshot(
+        client, volumes, name='scheduled', interval_in_sec=1,
+        backoff=polling.Backoff(LRO_LATENCY, 1))
+    assert not fleet.failed, fleet.failed[0].error
+    return fleet.issue_window, [volume.created for volume in fleet.volumes]
+
+
+if __name__ == '__main__':
+    volume_count = int(sys.argv[1]) if len(sys.argv) > 1 else VOLUME_COUNT
+    print('{} volumes, {}s per snapshot'.format(volume_count, LRO_LATENCY))
+    for name, snapshot in (('sequential', sequential),
+                           ('scheduler', scheduled)):
+        with FakeAnfServer(lro_latency={'snapshot': LRO_LATENCY}) as fake:
+            client, _ = create_clients(fake.base_url, polling_interval=0.05)
+            volumes = _volumes(client, volume_count)
+            before = sum(fake.request_counts.values())
+            start = time.perf_counter()
+            window, created = snapshot(client, volumes)
+            elapsed = time.perf_counter() - start
+            print('{:<10} {:7.2f}s  issued within {:7.3f}s  max skew {:7.3f}s'
+                  '  {:5} requests'.format(
+                      name, elapsed, window,
+                      (max(created) - min(created)).total_seconds(),
+                      sum(fake.request_counts.values()) - before))
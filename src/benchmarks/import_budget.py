@@ -0,0 +1,125 @@
+# import_budget.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Checks the import time of the anf_cli entry point and of each group of
+# subcommands with python -X importtime, exits with 1 when a budget is
+# exceeded or a module that should be loaded lazily shows up. Meant to run
+# in CI, from the src folder:
+#
+#   python -m benchmarks.import_budget [--scale 1.5]
+
+import argparse
+import os
+import subprocess
+import sys
+
+RUNS = 5
+
+# (name, code run by the interpreter, budget in milliseconds, modules that
+# must not be imported)
+BUDGETS = [
+    ('cli', 'import anf_cli; anf_cli.build_parser()', 15,
+     ('azure', 'haikunator', 'requests', 'cryptography')),
+    ('list, wait, teardown',
+     'import anf_cli, client_factory, listing, sample_utils, teardown',
+     300,
+     ('azure.identity', 'azure.mgmt.resource', 'haikunator', 'msal')),
+    ('provision',
+     'import anf_cli, client_factory, sample_utils, anf_resources', 300, ('azure.identity', 'azure.mgmt.resource', 'haikunator', 'msal')),
+]
+
+
+def _parse(stderr):
+    # Lines look like "import time:  self [us] | cumulative | <indent>name",
+    # top level imports have a single space of indentation
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        imports[name.strip()] = (int(cumulative), not name.startswith('  '))
+    return imports
+
+
+def measure(code, runs=RUNS, argv=None):
+    """Measures the import time of code in fresh interpreters
+
+    Modules already loaded by a bare interpreter start are not counted.
+
+    Args:
+        code (string): Python code to run, e.g. 'import anf_cli'
+        runs (int): Number of interpreters started, the fastest counts
+        argv (list): Optional. Script and arguments run instead of code,
+            e.g. ['anf_cli.py', '--help']
+
+    Returns:
+        float: Returns the import time in milliseconds
+        set: Returns the names of the imported modules
+    """
+
+    def run(arguments):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime'] + arguments,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            universal_newlines=True, check=True)
+        return _parse(completed.stderr)
+
+    startup = set(run(['-c', 'pass']))
+    timings = []
+    for _ in range(runs):
+        imports = run(argv or ['-c', code])
+        timings.append(sum(cumulative for name, (cumulative, top_level)
+                           in imports.items()
+                           if top_level and name not in startup) / 1000)
+    return min(timings), set(imports) - startup
+
+
+def check(scale=1.0, runs=RUNS):
+    """Measures every entry of BUDGETS
+
+    Args:
+        scale (float): Multiplier applied to the budgets, for slow machines
+        runs (int): Number of interpreters started per entry
+
+    Returns:
+        list: Returns (name, milliseconds, budget, forbidden modules found)
+            tuples
+    """
+
+    results = []
+    for name, code, budget, forbidden in BUDGETS:
+        milliseconds, modules = measure(code, runs)
+        found = sorted(module for module in modules
+                       if any(module == prefix or
+                              module.startswith(prefix + '.')
+                              for prefix in forbidden))
+        results.append((name, milliseconds, budget * scale, found))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.import_budget')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplier applied to the budgets')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, milliseconds, budget, found in check(args.scale, args.runs):
+        over = milliseconds > budget
+        failed = failed or over or bool(found)
+        print('{:<22} {:7.1f} ms  budget {:6.1f} ms  {}'.format(
+            name, milliseconds, budget, 'OVER' if over else 'ok'))
+        for module in found:
+            print('    imports {}, expected to be loaded lazily'.format(
+                module))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# listing_memory.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Compares peak memory and duration of walking every volume of a large
+# fleet with fully materialized list() calls and with
+# listing.walk_anf_resources. The backend is an in-process fake serving
+# pages of 100 resources, generated on demand so that the fake itself does
+# not hold the fleet in memory.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks.listing_memory [volume count]
+
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from azure.core.paging import ItemPaged
+from azure.mgmt.netapp.models import CapacityPool, NetAppAccount, Volume
+import listing
+
+VOLUME_COUNT = 100000
+ACCOUNT_COUNT = 10
+POOLS_PER_ACCOUNT = 10
+PAGE_SIZE = 100
+# Simulated duration of every page request, in seconds
+PAGE_LATENCY = 0.001
+
+_BASE = '/subscriptions/00000000-0000-0000-0000-000000000000' \
+    '/resourceGroups/{}/providers/Microsoft.NetApp/netAppAccounts/{}'
+
+
+def _paged(count, build, latency):
+    def get_next(continuation_token=None):
+        time.sleep(latency)
+        return continuation_token or 0
+
+    def extract_data(start):
+        end = min(start + PAGE_SIZE, count)
+        return (end if end < count else None,
+                iter([build(i) for i in range(start, end)]))
+
+    return ItemPaged(get_next, extract_data)
+
+
+def fake_client(volume_count=VOLUME_COUNT, latency=PAGE_LATENCY):
+    """Builds a client object serving a fleet of generated resources
+
+    Args:
+        volume_count (int): Number of volumes, spread evenly across
+            ACCOUNT_COUNT accounts of POOLS_PER_ACCOUNT pools
+        latency (float): Seconds every page request takes
+
+    Returns:
+        object: Returns an object with the accounts, pools, volumes and
+            snapshots list operations of NetAppManagementClient
+    """
+
+    volumes_per_pool = volume_count // (ACCOUNT_COUNT * POOLS_PER_ACCOUNT)
+
+    def account(resource_group_name, i):
+        resource = NetAppAccount(location='eastus')
+        resource.id = _BASE.format(resource_group_name, 'account{}'.format(i))
+        resource.name = 'account{}'.format(i)
+        return resource
+
+    def pool(resource_group_name, account_name, i):
+        resource = CapacityPool(location='eastus', size=4 * 1024 ** 4,
+                                service_level='Standard')
+        resource.name = '{}/pool{}'.format(account_name, i)
+        resource.id = '{}/capacityPools/pool{}'.format(
+            _BASE.format(resource_group_name, account_name), i)
+        return resource
+
+    def volume(resource_group_name, account_name, pool_name, i):
+        resource = Volume(location='eastus', creation_token='vol{}'.format(i),
+                          usage_threshold=100 * 1024 ** 3,
+                          subnet_id='/subscriptions/00000000-0000-0000-0000-'
+                          '000000000000/resourceGroups/{}/providers/'
+                          'Microsoft.Network/virtualNetworks/vnet/subnets/'
+                          'anf'.format(resource_group_name))
+        resource.name = '{}/{}/vol{}'.format(account_name, pool_name, i)
+        resource.id = '{}/capacityPools/{}/volumes/vol{}'.format(
+            _BASE.format(resource_group_name, account_name), pool_name, i)
+        return resource
+
+    return SimpleNamespace(
+        accounts=SimpleNamespace(list=lambda rg: _paged(
+            ACCOUNT_COUNT, lambda i: account(rg, i), latency)),
+        pools=SimpleNamespace(list=lambda rg, a: _paged(
+            POOLS_PER_ACCOUNT, lambda i: pool(rg, a, i), latency)),
+        volumes=SimpleNamespace(list=lambda rg, a, p: _paged(
+            volumes_per_pool, lambda i: volume(rg, a, p, i), latency)),
+        snapshots=SimpleNamespace(list=lambda rg, a, p, v: _paged(
+            0, None, latency)))
+
+
+def materialized(client, resource_group_name):
+    """Walks the fleet the way run_example lists it, with list() calls"""
+    resources = []
+    for account in list(client.accounts.list(resource_group_name)):
+        resources.append(account)
+        for pool in list(client.pools.list(resource_group_name,
+                                           account.name)):
+            resources.append(pool)
+            volumes = list(client.volumes.list(
+                resource_group_name, account.name,
+                pool.name.split('/')[-1]))
+            resources.extend(volumes)
+    return len(resources)
+
+
+def streamed(client, resource_group_name):
+    """Walks the fleet with listing.walk_anf_resources"""
+    return sum(1 for _ in listing.walk_anf_resources(
+        [(client, resource_group_name)], deepest='volume'))
+
+
+def measure(walk, client):
+    """Runs a walk under tracemalloc
+
+    Returns:
+        int: Returns the number of resources walked
+        float: Returns the peak traced memory in MiB
+        float: Returns the duration in seconds
+    """
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = walk(client, 'anf01-rg')
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak / 1024 ** 2, elapsed
+
+
+def run(volume_count=VOLUME_COUNT, latency=PAGE_LATENCY):
+    """Runs the benchmark
+
+    Returns:
+        dict: Returns walk name -> (resources, peak MiB, seconds)
+    """
+
+    client = fake_client(volume_count, latency)
+    return dict((walk.__name__, measure(walk, client))
+                for walk in (materialized, streamed))
+
+
+if __name__ == '__main__':
+    volume_count = int(sys.argv[1]) if len(sys.argv) > 1 else VOLUME_COUNT
+    for name, (count, peak, elapsed) in run(volume_count).items():
+        print('{:<13} {:>7} resources  peak {:8.1f} MiB  {:6.2f}s'.format(
+            name, count, peak, elapsed))
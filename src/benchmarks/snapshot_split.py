@@ -0,0 +1,84 @@
+# snapshot_split.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Deletes a snapshot right after a volume was created from it, against a
+# fake resource provider with various split times, once after a fixed
+# delay, the former behavior of the sample clean up scaled down from 60
+# seconds, and once with teardown.wait_for_snapshot_split. Reports whether
+# the deletion was accepted and how long the clean up took.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks.snapshot_split [fixed delay in seconds]
+
+import sys
+import time
+from azure.core.exceptions import HttpResponseError
+import example
+import polling
+import teardown
+from fake_anf_server import FakeAnfServer, create_clients
+
+SPLIT_LATENCIES = (0.2, 0.5, 1.0, 2.0, 3.0)
+FIXED_DELAY = 1.0
+
+
+def _snapshot_with_clone(client):
+    example.create_account(client, 'rg', 'account', 'eastus')
+    example.create_capacitypool_async(client, 'rg', 'account', 'pool',
+                                      'Standard', 4 * 1024 ** 4, 'eastus')
+    volume = example.create_volume(client, 'rg', 'account', 'pool', 'vol',
+                                   100 * 1024 ** 3, 'Standard', '/subnet',
+                                   'eastus')
+    snapshot = example.create_snapshot(client, 'rg', 'account', 'pool', 'vol',
+                                       'snap', 'eastus')
+    example.create_volume_from_snapshot(client, 'rg', 'account', 'pool',
+                                        volume, snapshot.snapshot_id, 'clone')
+    return snapshot.id
+
+
+def measure(split_latency, fixed_delay=None):
+    """Deletes a snapshot used by a volume being split from it
+
+    Args:
+        split_latency (float): Seconds the fake takes to split the volume
+        fixed_delay (float): Seconds to wait before a single deletion
+            attempt, None to wait with teardown.wait_for_snapshot_split
+
+    Returns:
+        boolean: Returns True if the snapshot was deleted
+        float: Returns the duration in seconds
+    """
+
+    with FakeAnfServer(lro_latency=0.02,
+                       split_latency=split_latency) as fake:
+        client, _ = create_clients(fake.base_url, polling_interval=0.02)
+        snapshot_id = _snapshot_with_clone(client)
+
+        start = time.perf_counter()
+        try:
+            if fixed_delay is None:
+                teardown.wait_for_snapshot_split(
+                    client, backoff=polling.Backoff(0.05, 1))(snapshot_id)
+            else:
+                time.sleep(fixed_delay)
+            client.snapshots.begin_delete(
+                'rg', 'account', 'pool', 'vol', 'snap').wait()
+        except HttpResponseError:
+            return False, time.perf_counter() - start
+        return True, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    fixed_delay = float(sys.argv[1]) if len(sys.argv) > 1 else FIXED_DELAY
+    for split_latency in SPLIT_LATENCIES:
+        for name, delay in (('fixed delay', fixed_delay),
+                            ('split wait', None)):
+            deleted, elapsed = measure(split_latency, delay)
+            print('split {:4.1f}s  {:<11} {:<8} {:5.2f}s'.format(
+                split_latency, name, 'deleted' if deleted else 'locked',
+                elapsed))
@@ -0,0 +1,259 @@
+# suite.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+import example
+import inventory
+import resource_uri_utils
+import sample_utils
+import teardown
+from azure.mgmt.netapp.models import CapacityPoolPatch, VolumePatch
+from benchmarks import classification, uri_parsing
+from fake_anf_server import FakeAnfServer, FAKE_SUBSCRIPTION_ID, \
+    create_clients
+
+RESULTS_VERSION = 1
+# Relative slowdown above which compare() reports a regression
+REGRESSION_THRESHOLD = 0.10
+# Simulated long running operation duration of the fake backend, in seconds
+LRO_LATENCY = 0.2
+
+RESOURCE_GROUP_NAME = 'anf01-rg'
+SUBNET_ID = '/subscriptions/{}/resourceGroups/{}/providers/Microsoft.Network' \
+    '/virtualNetworks/vnet-02/subnets/anf-sn'.format(FAKE_SUBSCRIPTION_ID,
+                                                    RESOURCE_GROUP_NAME)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def workflow_phases(anf_client, account_name):
+    """Times each phase of run_example against the given client
+
+    Performs the same calls as example.run_example: create, snapshot, clone,
+    update, retrieve and cleanup.
+
+    Args:
+        anf_client (NetAppManagementClient): Client, usually pointing at a
+            FakeAnfServer
+        account_name (string): Name of the account to be created
+
+    Returns:
+        dict: Returns phase name -> seconds
+    """
+
+    resources = {}
+
+    def create():
+        resources['account'] = example.create_account(
+            anf_client, RESOURCE_GROUP_NAME, account_name, example.LOCATION)
+        resources['pool'] = example.create_capacitypool_async(
+            anf_client, RESOURCE_GROUP_NAME, account_name,
+            example.CAPACITYPOOL_NAME, example.CAPACITYPOOL_SERVICE_LEVEL,
+            example.CAPACITYPOOL_SIZE, example.LOCATION)
+        resources['volume'] = example.create_volume(
+            anf_client, RESOURCE_GROUP_NAME, account_name,
+            example.CAPACITYPOOL_NAME, 'vol', example.VOLUME_USAGE_QUOTA,
+            example.CAPACITYPOOL_SERVICE_LEVEL, SUBNET_ID, example.LOCATION)
+
+    def snapshot():
+        resources['snapshot'] = example.create_snapshot(
+            anf_client, RESOURCE_GROUP_NAME, account_name,
+            example.CAPACITYPOOL_NAME, 'vol', 'snap', example.LOCATION)
+        sample_utils.wait_for_anf_resource(anf_client,
+                                           resources['snapshot'].id)
+
+    def clone():
+        resources['clone'] = example.create_volume_from_snapshot(
+            anf_client, RESOURCE_GROUP_NAME, account_name,
+            example.CAPACITYPOOL_NAME, resources['volume'],
+            resources['snapshot'].snapshot_id, 'vol-snap')
+
+    def update():
+        anf_client.pools.begin_update(
+            RESOURCE_GROUP_NAME, account_name, example.CAPACITYPOOL_NAME,
+            CapacityPoolPatch(location=example.LOCATION,
+                              size=sample_utils.get_tib_in_bytes(10))
+        ).result()
+        anf_client.volumes.begin_update(
+            RESOURCE_GROUP_NAME, account_name, example.CAPACITYPOOL_NAME,
+            'vol',
+            VolumePatch(location=example.LOCATION,
+                        usage_threshold=sample_utils.get_tib_in_bytes(1))
+        ).result()
+
+    def retrieve():
+        inventory.InventoryCache(anf_client).get(RESOURCE_GROUP_NAME)
+        anf_client.accounts.get(RESOURCE_GROUP_NAME, account_name)
+        anf_client.pools.get(RESOURCE_GROUP_NAME, account_name,
+                             example.CAPACITYPOOL_NAME)
+        anf_client.volumes.get(RESOURCE_GROUP_NAME, account_name,
+                               example.CAPACITYPOOL_NAME, 'vol')
+        anf_client.snapshots.get(RESOURCE_GROUP_NAME, account_name,
+                                 example.CAPACITYPOOL_NAME, 'vol', 'snap')
+
+    def cleanup():
+        teardown.teardown(anf_client, [
+            resources[name].id for name in
+            ('snapshot', 'volume', 'clone', 'pool', 'account')])
+
+    return dict((name, _timed(phase)[0]) for name, phase in [
+        ('create', create), ('snapshot', snapshot), ('clone', clone),
+        ('update', update), ('retrieve', retrieve), ('cleanup', cleanup)])
+
+
+def _micro_benchmarks(scale):
+    id_count = int(100000 * scale)
+    parsing = uri_parsing.run(id_count)
+    classifying = classification.run(id_count)
+    sizes = list(range(1, id_count + 1))
+
+    return {
+        'resource_uri_utils.getters': parsing['distinct'][1],
+        'resource_uri_utils.getters_polling': parsing['polling'][1],
+        'resource_uri_utils.classify_resource_ids': classifying['batch'],
+        'sample_utils.get_bytes_in_tib': _timed(
+            lambda: [sample_utils.get_bytes_in_tib(size)
+                     for size in sizes])[0],
+        'sample_utils.get_tib_in_bytes': _timed(
+            lambda: [sample_utils.get_tib_in_bytes(size)
+                     for size in sizes])[0],
+    }
+
+
+def _waiter_benchmarks(anf_client, run_index):
+    account_name = 'waiters{}'.format(run_index)
+    example.create_account(anf_client, RESOURCE_GROUP_NAME, account_name,
+                           example.LOCATION)
+    example.create_capacitypool_async(
+        anf_client, RESOURCE_GROUP_NAME, account_name,
+        example.CAPACITYPOOL_NAME, example.CAPACITYPOOL_SERVICE_LEVEL,
+        example.CAPACITYPOOL_SIZE, example.LOCATION)
+    pool_id = '/subscriptions/{}/resourceGroups/{}/providers/' \
+        'Microsoft.NetApp/netAppAccounts/{}/capacityPools/{}'.format(
+            FAKE_SUBSCRIPTION_ID, RESOURCE_GROUP_NAME, account_name,
+            example.CAPACITYPOOL_NAME)
+
+    volume_ids = []
+    for i in range(20):
+        volume_name = 'vol{}'.format(i)
+        anf_client.volumes.begin_create_or_update(
+            RESOURCE_GROUP_NAME, account_name, example.CAPACITYPOOL_NAME,
+            volume_name,
+            example.Volume(usage_threshold=example.VOLUME_USAGE_QUOTA,
+                           creation_token=volume_name,
+                           location=example.LOCATION,
+                           service_level=example.CAPACITYPOOL_SERVICE_LEVEL,
+                           subnet_id=SUBNET_ID,
+                           protocol_types=['NFSv3']))
+        volume_ids.append('{}/volumes/{}'.format(pool_id, volume_name))
+
+    results = {
+        'waiters.wait_for_anf_resource': _timed(
+            sample_utils.wait_for_anf_resource, anf_client,
+            volume_ids[0])[0],
+    }
+
+    # Deletions complete after lro_latency, the time above that is the
+    # latency added by the polling schedule
+    for volume_id in volume_ids:
+        anf_client.volumes.begin_delete(
+            RESOURCE_GROUP_NAME, account_name, example.CAPACITYPOOL_NAME,
+            resource_uri_utils.get_anf_volume(volume_id))
+    results['waiters.wait_for_many'] = _timed(
+        lambda: sample_utils.wait_for_many(anf_client, volume_ids,
+                                           present=False))[0]
+
+    teardown.teardown(anf_client, [pool_id,
+                                   pool_id.rsplit('/capacityPools/', 1)[0]])
+    return results
+
+
+def run_suite(repeat=3, scale=1.0, lro_latency=LRO_LATENCY):
+    """Runs every benchmark of the suite
+
+    Args:
+        repeat (int): Number of runs of every benchmark
+        scale (float): Multiplier applied to the micro benchmark sizes
+        lro_latency (float): Simulated long running operation duration
+
+    Returns:
+        dict: Returns the results document, see compare()
+    """
+
+    samples = {}
+
+    def record(measurements):
+        for name, seconds in measurements.items():
+            samples.setdefault(name, []).append(seconds)
+
+    with FakeAnfServer(lro_latency=lro_latency) as fake:
+        anf_client, _ = create_clients(fake.base_url)
+        for i in range(repeat):
+            record(_micro_benchmarks(scale))
+            record(dict(('workflow.{}'.format(name), seconds)
+                        for name, seconds in workflow_phases(
+                            anf_client, 'bench{}'.format(i)).items()))
+            record(_waiter_benchmarks(anf_client, i))
+
+    return {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'repeat': repeat, 'scale': scale,
+                     'lro_latency': lro_latency},
+        'results': dict((name, {
+            'median': statistics.median(values),
+            'min': min(values),
+            'runs': values,
+        }) for name, values in sorted(samples.items())),
+    }
+
+
+def save(results, path):
+    """Writes a results document to a JSON file"""
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def load(path):
+    """Reads a results document from a JSON file"""
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Compares two results documents
+
+    Benchmarks are compared by median, a benchmark regresses when it is more
+    than threshold slower than the baseline.
+
+    Args:
+        baseline (dict): Results document of the reference run
+        current (dict): Results document of the run to be checked
+        threshold (float): Relative slowdown tolerated, e.g. 0.1 for 10%
+
+    Returns:
+        list: Returns (name, baseline median, current median, relative
+            change, is regression) tuples, sorted by name
+    """
+
+    rows = []
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        before = baseline['results'][name]['median']
+        after = current['results'][name]['median']
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
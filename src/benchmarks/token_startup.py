@@ -0,0 +1,154 @@
+# token_startup.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Measures the startup cost of getting a management token in a new process,
+# with an empty (cold) and a populated (warm) token cache. Tokens are served
+# by a local stub of the AAD token endpoint.
+#
+# Usage, from the src folder:
+#
+#   python -m benchmarks.token_startup [runs]
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+from azure.core.credentials import AccessToken
+
+# Simulated AAD token request duration, in seconds
+TOKEN_LATENCY = 0.3
+RUNS = 5
+SCOPE = 'https://management.azure.com/.default'
+TENANT_ID = '00000000-0000-0000-0000-000000000001'
+CLIENT_ID = '00000000-0000-0000-0000-000000000002'
+CLIENT_SECRET = 'stub-secret'
+
+
+class StubTokenEndpoint(object):
+    """Local HTTP server answering client credential token requests
+
+    Args:
+        latency (float): Seconds every token request takes
+    """
+
+    def __init__(self, latency=TOKEN_LATENCY):
+        endpoint = self
+        self.latency = latency
+        self.request_count = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                endpoint.request_count += 1
+                time.sleep(endpoint.latency)
+                body = json.dumps({
+                    'token_type': 'Bearer',
+                    'expires_in': 3599,
+                    'access_token': 'stub-token-{}'.format(
+                        endpoint.request_count),
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}/{}/oauth2/v2.0/token'.format(
+            self._server.server_address[1], TENANT_ID)
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever,
+                         daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class StubTokenCredential(object):
+    """Credential requesting tokens from a StubTokenEndpoint"""
+
+    def __init__(self, url):
+        self._url = url
+
+    def get_token(self, *scopes, **kwargs):
+        request = Request(self._url, data='grant_type=client_credentials'
+                          '&scope={}'.format(' '.join(scopes)).encode('utf-8'))
+        with urlopen(request) as response:
+            body = json.load(response)
+        return AccessToken(body['access_token'],
+                           int(time.time()) + body['expires_in'])
+
+
+def _child(url, cache_path):
+    import token_cache
+    credential = StubTokenCredential(url)
+    if cache_path:
+        credential = token_cache.CachedTokenCredential(
+            credential, cache_path, TENANT_ID, CLIENT_ID, CLIENT_SECRET)
+    credential.get_token(SCOPE)
+
+
+def _startup(url, cache_path):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'benchmarks.token_startup',
+                    '--child', url, cache_path], check=True)
+    return time.perf_counter() - start
+
+
+def run(runs=RUNS, latency=TOKEN_LATENCY):
+    """Runs the benchmark
+
+    Args:
+        runs (int): Number of processes started per case
+        latency (float): Simulated token request duration
+
+    Returns:
+        dict: Returns case -> (median seconds to first token, token requests
+            sent to the endpoint)
+    """
+
+    results = {}
+    with StubTokenEndpoint(latency) as endpoint, \
+            tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, 'tokens.json')
+        cases = [
+            ('no cache', '', lambda: None),
+            ('cold cache', cache_path, lambda: os.path.exists(cache_path)
+             and os.remove(cache_path)),
+            ('warm cache', cache_path, lambda: None),
+        ]
+        for name, path, prepare in cases:
+            before = endpoint.request_count
+            timings = []
+            for _ in range(runs):
+                prepare()
+                timings.append(_startup(endpoint.url, path))
+            results[name] = (statistics.median(timings),
+                             endpoint.request_count - before)
+    return results
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        _child(sys.argv[2], sys.argv[3])
+    else:
+        runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+        for name, (seconds, requests) in run(runs).items():
+            print('{:<11} {:7.1f} ms  token requests: {}'.format(
+                name, seconds * 1000, requests))
@@ -0,0 +1,100 @@
+# uri_parsing.py Benchmark
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import argparse
+import sys
+import timeit
+import resource_uri_utils
+
+ID_COUNT = 100000
+WORKING_SET = 500
+
+SNAPSHOT_ID_FORMAT = '/subscriptions/{0:08x}-0000-0000-0000-000000000000' \
+    '/resourceGroups/anf{1}-rg/providers/Microsoft.NetApp' \
+    '/netAppAccounts/account{1}/capacityPools/pool{2}/volumes/vol{0}' \
+    '/snapshots/snap{0}'
+
+
+def build_ids(count):
+    """Builds a list of distinct snapshot resource ids
+
+    Args:
+        count (int): Number of ids to generate
+
+    Returns:
+        list: Returns the generated resource ids
+    """
+    return [SNAPSHOT_ID_FORMAT.format(i, i % 50, i % 7) for i in range(count)]
+
+
+def legacy_getters(resource_ids):
+    """Extracts all segments with the scan based get_resource_value"""
+    for resource_id in resource_ids:
+        resource_uri_utils.get_resource_value(resource_id, '/resourceGroups')
+        resource_uri_utils.get_resource_value(resource_id, '/netAppAccounts')
+        resource_uri_utils.get_resource_value(resource_id, '/capacityPools')
+        resource_uri_utils.get_resource_value(resource_id, '/volumes')
+        resource_uri_utils.get_resource_value(resource_id, '/snapshots')
+
+
+def parsed_getters(resource_ids):
+    """Extracts all segments through the public getters"""
+    for resource_id in resource_ids:
+        resource_uri_utils.get_resource_group(resource_id)
+        resource_uri_utils.get_anf_account(resource_id)
+        resource_uri_utils.get_anf_capacity_pool(resource_id)
+        resource_uri_utils.get_anf_volume(resource_id)
+        resource_uri_utils.get_anf_snapshot(resource_id)
+
+
+def measure(func, resource_ids, repeat=3):
+    """Returns the best wall clock time of func over repeat runs"""
+    def run():
+        resource_uri_utils.parse_resource_id.cache_clear()
+        func(resource_ids)
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def run(id_count=ID_COUNT, working_set=WORKING_SET):
+    """Runs the benchmark
+
+    Two scenarios are measured: every id distinct (cache misses only) and the
+    polling pattern where a small working set of ids is parsed repeatedly.
+
+    Args:
+        id_count (int): Number of ids processed per scenario
+        working_set (int): Number of distinct ids in the polling scenario
+
+    Returns:
+        dict: Returns scenario name -> (legacy seconds, parsed seconds)
+    """
+    distinct_ids = build_ids(id_count)
+    hot_ids = build_ids(working_set) * (id_count // working_set)
+
+    return {
+        'distinct': (measure(legacy_getters, distinct_ids),
+                     measure(parsed_getters, distinct_ids)),
+        'polling': (measure(legacy_getters, hot_ids),
+                    measure(parsed_getters, hot_ids)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.uri_parsing')
+    parser.add_argument('count', nargs='?', type=int, default=ID_COUNT,
+                        help='Number of resource ids parsed')
+    args = parser.parse_args(argv)
+    if args.count < 1:
+        parser.error('count must be at least 1')
+    for scenario, (legacy, parsed) in run(args.count).items():
+        print('{:<10} legacy: {:.3f}s  parsed: {:.3f}s  speedup: {:.1f}x'
+              .format(scenario, legacy, parsed, legacy / parsed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# capacity_planning.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from collections import namedtuple
+import preflight
+import resource_uri_utils
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError('NumPy is required by capacity_planning, install it '
+                      'with pip install numpy')
+
+# Throughput limit of volumes with automatic QoS, per TiB of quota, in the
+# order of preflight.SERVICE_LEVELS (Standard, Premium, Ultra)
+THROUGHPUT_MIBPS_PER_TIB = np.array([16.0, 64.0, 128.0])
+
+_TIB = float(1024 ** 4)
+
+PoolReport = namedtuple('PoolReport', ['allocated', 'headroom', 'utilization',
+                                       'throughput_mibps',
+                                       'volume_throughput_mibps'])
+PoolReport.__doc__ = """Outcome of analyze, arrays indexed like the fleet
+
+Attributes:
+    allocated (ndarray): Summed volume quotas of every pool, in bytes
+    headroom (ndarray): Pool size minus allocated, in bytes, negative when
+        the volumes do not fit
+    utilization (ndarray): Allocated over pool size
+    throughput_mibps (ndarray): Throughput limit of every pool, in MiB/s
+    volume_throughput_mibps (ndarray): Throughput limit of every volume, in
+        MiB/s
+"""
+
+
+def service_level_codes(service_levels):
+    """Converts service level names to indices into preflight.SERVICE_LEVELS
+
+    Args:
+        service_levels (list): Service level names, case insensitive
+
+    Returns:
+        ndarray: Returns the int8 codes, e.g. 0 for Standard
+    """
+
+    names, inverse = np.unique(np.asarray(service_levels, dtype=str),
+                               return_inverse=True)
+    lookup = dict((level.lower(), code)
+                  for code, level in enumerate(preflight.SERVICE_LEVELS))
+    unknown = [name for name in names if name.lower() not in lookup]
+    if unknown:
+        raise ValueError('Unknown service levels {}, expected one of '
+                         '{}'.format(', '.join(unknown),
+                                     ', '.join(preflight.SERVICE_LEVELS)))
+    codes = np.array([lookup[name.lower()] for name in names], dtype=np.int8)
+    return codes[inverse.reshape(-1)]
+
+
+class Fleet(object):
+    """Capacity pools and volumes as columns of NumPy arrays
+
+    Args:
+        pool_size (array): Size of every pool, in bytes
+        pool_service_level (array): Service level names or codes, see
+            service_level_codes
+        volume_pool (array): Index into the pool arrays of the pool of every
+            volume
+        volume_quota (array): Quota (usage threshold) of every volume, in
+            bytes
+        pool_ids (list): Optional. Resource ids of the pools
+        volume_ids (list): Optional. Resource ids of the volumes
+    """
+
+    __slots__ = ('pool_size', 'pool_service_level', 'volume_pool',
+                 'volume_quota', 'pool_ids', 'volume_ids')
+
+    def __init__(self, pool_size, pool_service_level, volume_pool,
+                 volume_quota, pool_ids=None, volume_ids=None):
+        self.pool_size = np.asarray(pool_size, dtype=np.float64)
+        pool_service_level = np.asarray(pool_service_level)
+        if pool_service_level.dtype.kind in 'US':
+            pool_service_level = service_level_codes(pool_service_level)
+        self.pool_service_level = pool_service_level.astype(np.int8)
+        self.volume_pool = np.asarray(volume_pool, dtype=np.intp)
+        self.volume_quota = np.asarray(volume_quota, dtype=np.float64)
+        self.pool_ids = pool_ids
+        self.volume_ids = volume_ids
+
+    @classmethod
+    def from_resources(cls, resources):
+        """Builds a fleet from capacity pool and volume resources
+
+        Args:
+            resources (iterable): CapacityPool and Volume models, e.g.
+                listing.walk_anf_resources, other resources are ignored.
+                Every volume needs its pool among the resources
+
+        Returns:
+            Fleet: Returns the fleet, with pool_ids and volume_ids set
+        """
+
+        pool_ids, pool_size, pool_service_level = [], [], []
+        volume_ids, volume_pool_ids, volume_quota = [], [], []
+        for resource in resources:
+            kind = resource_uri_utils.parse_resource_id(resource.id).kind
+            if kind == 'capacity_pool':
+                pool_ids.append(resource.id)
+                pool_size.append(resource.size)
+                pool_service_level.append(resource.service_level)
+            elif kind == 'volume':
+                volume_ids.append(resource.id)
+                volume_pool_ids.append(
+                    resource.id.rsplit('/volumes/', 1)[0].lower())
+                volume_quota.append(resource.usage_threshold)
+
+        pool_index = dict((pool_id.lower(), index)
+                          for index, pool_id in enumerate(pool_ids))
+        missing = [volume_id for volume_id, pool_id
+                   in zip(volume_ids, volume_pool_ids)
+                   if pool_id not in pool_index]
+        if missing:
+            raise ValueError('The pools of {} volumes are missing, e.g. the '
+                             'pool of {}'.format(len(missing), missing[0]))
+
+        return cls(pool_size,
+                   service_level_codes(pool_service_level)
+                   if pool_service_level else np.zeros(0, dtype=np.int8),
+                   [pool_index[pool_id] for pool_id in volume_pool_ids],
+                   volume_quota, pool_ids, volume_ids)
+
+
+def analyze(fleet):
+    """Computes utilization, headroom and throughput limits of a fleet
+
+    Args:
+        fleet (Fleet): Pools and volumes
+
+    Returns:
+        PoolReport: Returns the per pool and per volume arrays
+    """
+
+    allocated = np.bincount(fleet.volume_pool, weights=fleet.volume_quota,
+                            minlength=len(fleet.pool_size))
+    rate = THROUGHPUT_MIBPS_PER_TIB[fleet.pool_service_level]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        utilization = allocated / fleet.pool_size
+    return PoolReport(
+        allocated=allocated,
+        headroom=fleet.pool_size - allocated,
+        utilization=utilization,
+        throughput_mibps=fleet.pool_size / _TIB * rate,
+        volume_throughput_mibps=fleet.volume_quota / _TIB *
+        rate[fleet.volume_pool])
+
+
+def required_pool_sizes(volume_quota, volume_pool, pool_service_level,
+                        volume_throughput_mibps=None, headroom_ratio=0.0):
+    """Computes the smallest pool sizes fitting a set of volumes
+
+    Every volume needs its quota, or the quota giving it the requested
+    throughput at the service level of its pool if that is larger. Pool
+    sizes are rounded up to whole TiB, with a minimum of
+    preflight.MIN_POOL_SIZE_TIB. Sizes above preflight.MAX_POOL_SIZE_TIB
+    mean the volumes have to be spread over several pools.
+
+    Args:
+        volume_quota (array): Quota of every volume, in bytes
+        volume_pool (array): Index of the planned pool of every volume
+        pool_service_level (array): Service level names or codes of the
+            planned pools
+        volume_throughput_mibps (array): Optional. Throughput every volume
+            needs, in MiB/s
+        headroom_ratio (float): Optional. Extra capacity kept free in every
+            pool, e.g. 0.2 for 20%
+
+    Returns:
+        ndarray: Returns the int64 pool sizes in TiB
+    """
+
+    pool_service_level = np.asarray(pool_service_level)
+    if pool_service_level.dtype.kind in 'US':
+        pool_service_level = service_level_codes(pool_service_level)
+    volume_pool = np.asarray(volume_pool, dtype=np.intp)
+    needed = np.asarray(volume_quota, dtype=np.float64)
+    if volume_throughput_mibps is not None:
+        rate = THROUGHPUT_MIBPS_PER_TIB[pool_service_level[volume_pool]]
+        needed = np.maximum(needed, np.asarray(
+            volume_throughput_mibps, dtype=np.float64) / rate * _TIB)
+
+    total = np.bincount(volume_pool, weights=needed,
+                        minlength=len(pool_service_level))
+    size_tib = np.ceil(total * (1 + headroom_ratio) / _TIB).astype(np.int64)
+    return np.maximum(size_tib, preflight.MIN_POOL_SIZE_TIB)
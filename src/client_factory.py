@@ -0,0 +1,179 @@
+# client_factory.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import threading
+import requests
+import throttling
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from azure.core.pipeline.transport import RequestsTransport
+
+# Number of hosts with a connection pool, management clients only talk to
+# management.azure.com and login.microsoftonline.com
+POOL_CONNECTIONS = 4
+# Maximum number of connections kept open per host
+POOL_MAXSIZE = 32
+CONNECTION_TIMEOUT = 30
+READ_TIMEOUT = 300
+
+_default_factory = None
+_default_factory_lock = threading.Lock()
+
+
+class ClientFactory(object):
+    """Creates management clients sharing one pooled HTTP transport
+
+    Every client created by a factory sends its requests through the same
+    requests session, so TCP connections and TLS sessions are reused across
+    NetAppManagementClient and ResourceManagementClient instances instead of
+    each client opening its own connection pool. Closing a client does not
+    close the shared transport, call close() on the factory instead.
+
+    Every client also paces its requests with a throttling.ThrottlingPolicy,
+    the clients of the same subscription sharing the same governor and
+    therefore the subscription read and write quotas.
+
+    Args:
+        pool_connections (int): Number of per host connection pools to cache
+        pool_maxsize (int): Maximum number of connections kept per host, it
+            should be at least the number of threads issuing requests
+        keep_alive (boolean): If False connections are closed after every
+            request
+        connection_timeout (float): Seconds to wait for a connection
+        read_timeout (float): Seconds to wait for response data
+        governor (ThrottlingGovernor): Optional. Governor of all the clients,
+            whatever their subscription, defaults to the process wide
+            throttling.default_governor of the subscription of each client
+        client_kwargs: Optional keyword arguments given to every client, e.g.
+            per_retry_policies
+    """
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, keep_alive=True,
+                 connection_timeout=CONNECTION_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, governor=None, **client_kwargs):
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            # Retries are handled by the azure-core RetryPolicy
+            max_retries=Retry(total=False, redirect=False,
+                              raise_on_status=False))
+        self.session = requests.Session()
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+        self.transport = RequestsTransport(
+            session=self.session,
+            session_owner=False,
+            connection_timeout=connection_timeout,
+            read_timeout=read_timeout)
+        self.governor = governor
+        self.client_kwargs = client_kwargs
+
+    def governor_for(self, subscription_id):
+        """Gets the governor pacing the clients of a subscription
+
+        Args:
+            subscription_id (string): Subscription id
+
+        Returns:
+            ThrottlingGovernor: Returns the governor
+        """
+        return self.governor or throttling.default_governor(subscription_id)
+
+    def _kwargs(self, subscription_id, kwargs):
+        merged = dict(self.client_kwargs)
+        merged.update(kwargs)
+        merged['transport'] = self.transport
+        # Throttling first, so that the time spent waiting for quota is not
+        # reported as HTTP latency by the tracing policy
+        merged['per_retry_policies'] = [
+            throttling.ThrottlingPolicy(self.governor_for(subscription_id))
+        ] + list(merged.get('per_retry_policies') or [])
+        return merged
+
+    def netapp_client(self, credential, subscription_id, **kwargs):
+        """Creates a NetAppManagementClient using the shared transport
+
+        Args:
+            credential (TokenCredential): Credential, e.g. the one returned by
+                sample_utils.get_credentials
+            subscription_id (string): Subscription id
+            kwargs: Optional keyword arguments for the client constructor
+
+        Returns:
+            NetAppManagementClient: Returns the client
+        """
+        from azure.mgmt.netapp import NetAppManagementClient
+        return NetAppManagementClient(credential, subscription_id,
+                                      **self._kwargs(subscription_id, kwargs))
+
+    def resource_client(self, credential, subscription_id, **kwargs):
+        """Creates a ResourceManagementClient using the shared transport
+
+        Args:
+            credential (TokenCredential): Credential
+            subscription_id (string): Subscription id
+            kwargs: Optional keyword arguments for the client constructor
+
+        Returns:
+            ResourceManagementClient: Returns the client
+        """
+        from azure.mgmt.resource import ResourceManagementClient
+        return ResourceManagementClient(
+            credential, subscription_id,
+            **self._kwargs(subscription_id, kwargs))
+
+    def connection_stats(self):
+        """Gets connection reuse statistics of the shared pool
+
+        Counts cover the connection pools currently cached by the transport.
+
+        Returns:
+            dict: Returns requests, connections (opened, i.e. TCP/TLS
+                handshakes), reused (requests sent on an already open
+                connection) and reuse_ratio
+        """
+        pools = self._adapter.poolmanager.pools
+        request_count = 0
+        connection_count = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                request_count += pool.num_requests
+                connection_count += pool.num_connections
+
+        reused = max(0, request_count - connection_count)
+        return {
+            'requests': request_count,
+            'connections': connection_count,
+            'reused': reused,
+            'reuse_ratio': reused / request_count if request_count else 0.0,
+        }
+
+    def close(self):
+        """Closes the shared transport and all pooled connections"""
+        self.session.close()
+
+
+def default_factory():
+    """Gets the process wide ClientFactory
+
+    The factory is created with default settings on first use and shared by
+    every caller in the process.
+
+    Returns:
+        ClientFactory: Returns the shared factory
+    """
+    global _default_factory
+
+    with _default_factory_lock:
+        if _default_factory is None:
+            _default_factory = ClientFactory()
+        return _default_factory
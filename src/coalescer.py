@@ -0,0 +1,151 @@
+# coalescer.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Seconds intents for the same key are collected before being applied
+WINDOW_IN_SEC = 2.0
+MAX_CONCURRENCY = 8
+
+
+class _Batch(object):
+    __slots__ = ('intent', 'futures', 'deadline', 'context')
+
+    def __init__(self, intent, deadline):
+        self.intent = intent
+        self.futures = []
+        self.deadline = deadline
+        self.context = contextvars.copy_context()
+
+
+class Coalescer(object):
+    """Merges the intents submitted for the same key within a time window
+
+    The first intent submitted for a key opens a window, intents submitted
+    for that key until the window closes are merged into it, then the merged
+    intent is applied once on a worker thread, e.g. with a single long
+    running operation. At most one apply runs per key: intents submitted
+    while it runs open the next window, applied after it. Different keys
+    are applied concurrently.
+
+    Args:
+        merge (function): Called with the pending intent and a new one,
+            returns the merged intent
+        apply (function): Called with the key and the merged intent, its
+            result or exception is given to every submitter of the batch
+        window_in_sec (float): Seconds a batch stays open
+        max_concurrency (int): Maximum number of keys applied at once
+        clock (function): Optional. Defaults to time.monotonic
+    """
+
+    def __init__(self, merge, apply, window_in_sec=WINDOW_IN_SEC,
+                 max_concurrency=MAX_CONCURRENCY, clock=time.monotonic):
+        self.merge = merge
+        self.apply = apply
+        self.window_in_sec = window_in_sec
+        self.clock = clock
+        self.submitted_count = 0
+        self.applied_count = 0
+        self._pending = OrderedDict()
+        self._running = set()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._thread = None
+        self._closed = False
+
+    def submit(self, key, intent):
+        """Adds an intent to the open batch of a key
+
+        Args:
+            key (object): Hashable key, e.g. a resource id
+            intent (object): Intent merged with the others of the batch
+
+        Returns:
+            Future: Returns a future resolved with the result of the apply
+                call of the batch
+        """
+
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('The coalescer is closed')
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = _Batch(
+                    intent, self.clock() + self.window_in_sec)
+            else:
+                batch.intent = self.merge(batch.intent, intent)
+            batch.futures.append(future)
+            self.submitted_count += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch,
+                                                daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+        return future
+
+    def flush(self):
+        """Closes every open window and waits for all batches to be applied"""
+        with self._condition:
+            for batch in self._pending.values():
+                batch.deadline = float('-inf')
+            self._condition.notify_all()
+            while self._pending or self._running:
+                self._condition.wait()
+
+    def close(self):
+        """Applies the open batches and stops the worker threads"""
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _dispatch(self):
+        with self._condition:
+            while not self._closed:
+                now = self.clock()
+                timeout = None
+                for key, batch in list(self._pending.items()):
+                    if key in self._running:
+                        continue
+                    if batch.deadline <= now:
+                        del self._pending[key]
+                        self._running.add(key)
+                        self._executor.submit(batch.context.run,
+                                              self._apply, key, batch)
+                    elif timeout is None or batch.deadline - now < timeout:
+                        timeout = batch.deadline - now
+                self._condition.wait(timeout)
+
+    def _apply(self, key, batch):
+        try:
+            result = self.apply(key, batch.intent)
+        except Exception as ex:
+            for future in batch.futures:
+                future.set_exception(ex)
+        else:
+            for future in batch.futures:
+                future.set_result(result)
+        finally:
+            with self._condition:
+                self._running.discard(key)
+                self.applied_count += 1
+                self._condition.notify_all()
@@ -6,33 +6,40 @@
 # LICENSE file in the root directory of this source tree.
 
 import os
-import time
+import client_factory
+import export_policy
+import inventory
+import journal
+import preflight
 import sample_utils
 import resource_uri_utils
-import azure.mgmt.netapp.models
+import teardown
+import tracing
+import volume_updates
 from haikunator import Haikunator
 from azure.core.exceptions import AzureError
-from azure.identity import ClientSecretCredential
-from azure.mgmt.netapp import NetAppManagementClient
-from azure.mgmt.netapp.models import NetAppAccount, \
-    CapacityPool, \
-    Volume, \
-    Snapshot, \
-    CapacityPoolPatch, \
-    ExportPolicyRule, \
-    VolumePatchPropertiesExportPolicy, \
-    VolumePatch
-from azure.mgmt.resource import ResourceManagementClient
+from anf_resources import create_account, create_capacitypool_async, \
+    create_volume, create_volume_from_snapshot, create_snapshot
+from azure.mgmt.netapp.models import CapacityPoolPatch, ExportPolicyRule
 from sample_utils import console_output, print_header, resource_exists
 
 # Variables to be changed to be in accordance to the environment where this sample will be executed
 SHOULD_CLEANUP = False
+# Optional. File receiving one latency span per SDK call and helper, e.g.
+# 'trace.jsonl', TRACE_FORMAT is either 'jsonl' or 'otlp'
+TRACE_FILE = None
+TRACE_FORMAT = 'jsonl'
 LOCATION = 'eastus2'
 RESOURCE_GROUP_NAME = 'anf01-rg'
 VNET_NAME = 'vnet-02'
 SUBNET_NAME = 'anf-sn'
 VNET_RESOURCE_GROUP_NAME = 'anf01-rg'
-ANF_ACCOUNT_NAME = Haikunator().haikunate(delimiter='')
+# Id of the run. When ANF_SAMPLE_RUN_ID is set, completed steps are journaled
+# under it so that a failed run started again with the same id resumes where
+# it stopped, see journal.RunJournal. Otherwise the id is random and nothing
+# is written
+RUN_ID = journal.get_run_id()
+ANF_ACCOUNT_NAME = Haikunator(seed=RUN_ID).haikunate(delimiter='')
 CAPACITYPOOL_NAME = "Pool01"
 CAPACITYPOOL_SERVICE_LEVEL = "Standard"
 CAPACITYPOOL_SIZE = 4398046511104  # 4TiB
@@ -44,207 +51,38 @@ VOLUME_FROM_SNAPSHOT_NAME = 'Vol-{}'.format(SNAPSHOT_NAME)
 # Resource SDK related (change only if API version is not supported anymore)
 VIRTUAL_NETWORKS_SUBNET_API_VERSION = '2018-11-01'
 
-def create_account(client, resource_group_name, anf_account_name,
-                   location, tags=None):
-    """Creates an Azure NetApp Files Account
-
-    Function that creates an Azure NetApp Account, which requires building the
-    account body object first.
-
-    Args:
-        client (NetAppManagementClient): Azure Resource Provider
-            Client designed to interact with ANF resources
-        resource_group_name (string): Name of the resource group where the
-            account will be created
-        location (string): Azure short name of the region where resource will
-            be deployed
-        tags (object): Optional. Key-value pairs to tag the resource, default
-            value is None. E.g. {'cc':'1234','dept':'IT'}
-
-    Returns:
-        NetAppAccount: Returns the newly created NetAppAccount resource
-    """
-
-    account_body = NetAppAccount(location=location, tags=tags)
-
-    return client.accounts.begin_create_or_update(resource_group_name,
-                                            anf_account_name,
-                                            account_body).result()
-
-
-def create_capacitypool_async(client, resource_group_name,
-                              anf_account_name, capacitypool_name,
-                              service_level, size, location, tags=None):
-    """Creates a capacity pool within an account
-
-    Function that creates a Capacity Pool, capacity pools are needed to define
-    maximum service level and capacity.
-
-    Args:
-        client (NetAppManagementClient): Azure Resource Provider
-            Client designed to interact with ANF resources
-        resource_group_name (string): Name of the resource group where the
-            capacity pool will be created, it needs to be the same as the
-            Account
-        anf_account_name (string): Name of the Azure NetApp Files Account where
-            the capacity pool will be created
-        capacitypool_name (string): Capacity pool name
-        service_level (string): Desired service level for this new capacity
-            pool, valid values are "Ultra","Premium","Standard"
-        size (long): Capacity pool size, values range from 4398046511104
-            (4TiB) to 549755813888000 (500TiB)
-        location (string): Azure short name of the region where resource will
-            be deployed, needs to be the same as the account
-        tags (object): Optional. Key-value pairs to tag the resource, default
-            value is None. E.g. {'cc':'1234','dept':'IT'}
-
-    Returns:
-        CapacityPool: Returns the newly created capacity pool resource
-    """
 
-    capacitypool_body = CapacityPool(
-        location=location,
-        service_level=service_level,
-        size=size,
-        tags=tags)
-
-    return client.pools.begin_create_or_update(resource_group_name, 
-                                               anf_account_name,  
-                                               capacitypool_name,
-                                               capacitypool_body).result()
-
-
-def create_volume(client, resource_group_name, anf_account_name,
-                  capacitypool_name, volume_name, volume_usage_quota,
-                  service_level, subnet_id, location, tags=None):
-    """Creates a volume within a capacity pool
-
-    Function that in this example creates a NFSv3 volume within a capacity
-    pool, as a note service level needs to be the same as the capacity pool.
-    This function also defines the volume body as the configuration settings
-    of the new volume.
-
-    Args:
-        client (NetAppManagementClient): Azure Resource Provider
-            Client designed to interact with ANF resources
-        resource_group_name (string): Name of the resource group where the
-            volume will be created, it needs to be the same as the account
-        anf_account_name (string): Name of the Azure NetApp Files Account where
-            the capacity pool holding the volume exists
-        capacitypool_name (string): Capacity pool name where volume will be
-            created
-        volume_name (string): Volume name
-        volume_usage_quota (long): Volume size in bytes, minimum value is
-            107374182400 (100GiB), maximum value is 109951162777600 (100TiB)
-        service_level (string): Volume service level, needs to be the same as
-            the capacity pool, valid values are "Ultra","Premium","Standard"
-        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
-            subnet
-        location (string): Azure short name of the region where resource will
-            be deployed, needs to be the same as the account
-        tags (object): Optional. Key-value pairs to tag the resource, default
-            value is None. E.g. {'cc':'1234','dept':'IT'}
-
-    Returns:
-        Volume: Returns the newly created volume resource
-    """
+def _list_children(anf_client, anf_inventory, resource_id):
+    """Lists the children of a resource, served from the inventory tree
 
-    volume_body = Volume(
-        usage_threshold=volume_usage_quota,
-        creation_token=volume_name,
-        location=location,
-        service_level=service_level,
-        subnet_id=subnet_id,
-        protocol_types=["NFSv3"],
-        tags=tags)
-
-    return client.volumes.begin_create_or_update(resource_group_name,
-                                           anf_account_name,
-                                           capacitypool_name,
-                                           volume_name,
-                                           volume_body).result()
-
-
-def create_volume_from_snapshot(client, resource_group_name, anf_account_name,
-                                capacitypool_name, volume, snapshot_id,
-                                volume_name, tags=None):
-    """Creates a volume from a snapshot
-
-    Function that creates a volume from an existing snapshot. This example use
-    the previous created volume that had a snapshot taken to gather some
-    important information to create a new volume from the snapshot, noted in
-    the volume_body object.
-
-    Args:
-        client (NetAppManagementClient): Azure Resource Provider
-            Client designed to interact with ANF resources
-        resource_group_name (string): Name of the resource group where the
-            volume will be created, it needs to be the same as the account
-        anf_account_name (string): Name of the Azure NetApp Files Account
-            where the capacity pool holding the volume exists
-        capacitypool_name (string): Capacity pool name where volume will be
-            created
-        volume (Volume): Original volume object where the snapshot was taken
-        snapshot_id (string): UUID v4 name of the snapshot
-        tags (object): Optional. Key-value pairs to tag the resource, default
-            value is None. E.g. {'cc':'1234','dept':'IT'}
-
-    Returns:
-        Volume: Returns the newly created volume resource
+    A resource not in the tree yet, e.g. created after the tree was listed
+    and within its TTL, gets the tree listed again. If it is still missing
+    its children are listed directly.
     """
 
+    node = anf_inventory.get(RESOURCE_GROUP_NAME).find(resource_id)
+    if node is None:
+        node = anf_inventory.get(RESOURCE_GROUP_NAME,
+                                 refresh=True).find(resource_id)
+    if node is not None:
+        return node.child_resources()
 
-    volume_body = Volume(
-        snapshot_id=snapshot_id,
-        export_policy=volume.export_policy,
-        usage_threshold=volume.usage_threshold,
-        creation_token=volume_name,
-        location=volume.location,
-        service_level=volume.service_level,
-        subnet_id=volume.subnet_id,
-        protocol_types=volume.protocol_types,
-        tags=tags)
-
-    return client.volumes.begin_create_or_update(resource_group_name,
-                                           anf_account_name,
-                                           capacitypool_name,
-                                           volume_name,
-                                           volume_body).result()
-
-
-def create_snapshot(client, resource_group_name, anf_account_name,
-                    capacitypool_name, volume_name, snapshot_name,
-                    location):
-    """Creates a volume snapshot
-
-    Function that creates a volume snapshot.
-
-    Args:
-        client (NetAppManagementClient): Azure Resource Provider 
-            Client designed to interact with ANF resources
-        resource_group_name (string): Name of the resource group where the
-            snapshot will be created, it needs to be the same as the account
-        anf_account_name (string): Name of the Azure NetApp Files Account where
-            the capacity pool holding the volume exists
-        capacitypool_name (string): Capacity pool name where volume to be taken
-            the snapshot exists
-        volume_name (string): Name of the volume to take the snapshot
-        snapshot_name (string): Snapshot name
-        location (string): Azure short name of the region where resource will
-            be deployed, needs to be the same as the account
-
-    Returns:
-        Snapshot: Returns the newly created snapshot resource
-    """
+    parsed = resource_uri_utils.parse_resource_id(resource_id)
+    if parsed.kind == 'volume':
+        return list(anf_client.snapshots.list(
+            parsed.resource_group, parsed.account, parsed.capacity_pool,
+            parsed.volume))
+    elif parsed.kind == 'capacity_pool':
+        return list(anf_client.volumes.list(
+            parsed.resource_group, parsed.account, parsed.capacity_pool))
+    return list(anf_client.pools.list(parsed.resource_group, parsed.account))
 
-    snapshot_body = Snapshot(location=location)
 
-    return client.snapshots.begin_create(resource_group_name,
-                                   anf_account_name,
-                                   capacitypool_name,
-                                   volume_name,
-                                   snapshot_name,
-                                   snapshot_body).result()
+def _step_outcome(run_journal, step, done='created'):
+    """Describes how a journaled step completed, for console output"""
+    if step in run_journal.skipped:
+        return 'completed by a previous attempt of the run'
+    return done
 
 
 def run_example():
@@ -256,12 +94,18 @@ def run_example():
 
     # Creating the Azure NetApp Files Client with an Application
     # (service principal) token provider
+    # Both clients share the connection pool of the process wide client
+    # factory
     credentials, subscription_id = sample_utils.get_credentials()
-    anf_client = NetAppManagementClient(
-        credentials, subscription_id)
+    clients = client_factory.default_factory()
+    anf_client = clients.netapp_client(
+        credentials, subscription_id,
+        per_retry_policies=[tracing.TracingPolicy()])
 
     # Checking if vnet/subnet information leads to a valid resource
-    resources_client = ResourceManagementClient(credentials, subscription_id)
+    resources_client = clients.resource_client(
+        credentials, subscription_id,
+        per_retry_policies=[tracing.TracingPolicy()])
     SUBNET_ID = '/subscriptions/{}/resourceGroups/{}/providers/Microsoft.Network/virtualNetworks/{}/subnets/{}'.format(
         subscription_id, VNET_RESOURCE_GROUP_NAME, VNET_NAME, SUBNET_NAME)
 
@@ -275,16 +119,51 @@ def run_example():
         raise Exception("Subnet not found error. Subnet Id {}".format(
             SUBNET_ID))
 
+    # Checking the resources about to be created locally, every violation
+    # of the ANF limits is reported at once before anything is submitted
+    try:
+        preflight.check(
+            accounts=[{'resource_group': RESOURCE_GROUP_NAME,
+                       'name': ANF_ACCOUNT_NAME,
+                       'location': LOCATION}],
+            pools=[{'resource_group': RESOURCE_GROUP_NAME,
+                    'account': ANF_ACCOUNT_NAME,
+                    'name': CAPACITYPOOL_NAME,
+                    'size_tib': sample_utils.get_bytes_in_tib(
+                        CAPACITYPOOL_SIZE),
+                    'service_level': CAPACITYPOOL_SERVICE_LEVEL}],
+            volumes=[{'resource_group': RESOURCE_GROUP_NAME,
+                      'account': ANF_ACCOUNT_NAME,
+                      'pool': CAPACITYPOOL_NAME,
+                      'name': volume_name,
+                      'size_gib': VOLUME_USAGE_QUOTA / 1024 ** 3,
+                      'service_level': CAPACITYPOOL_SERVICE_LEVEL}
+                     for volume_name in (VOLUME_NAME,
+                                         VOLUME_FROM_SNAPSHOT_NAME)],
+            snapshots=[{'resource_group': RESOURCE_GROUP_NAME,
+                        'account': ANF_ACCOUNT_NAME,
+                        'pool': CAPACITYPOOL_NAME,
+                        'volume': VOLUME_NAME,
+                        'name': SNAPSHOT_NAME}])
+    except preflight.PreflightError as ex:
+        for violation in ex.violations:
+            console_output('ERROR: {}'.format(violation))
+        raise
+
+    run_journal = journal.RunJournal(
+        RUN_ID, journal.JOURNAL_DIR if journal.is_resumable() else None)
+    console_output('Run id: {}'.format(RUN_ID))
 
     # Creating an Azure NetApp Account
     console_output('Creating Azure NetApp Files account ...')
     account = None
     try:
-        account = create_account(
-            anf_client, RESOURCE_GROUP_NAME, ANF_ACCOUNT_NAME, LOCATION)
+        account = run_journal.run_step(
+            'account', anf_client, lambda: create_account(
+                anf_client, RESOURCE_GROUP_NAME, ANF_ACCOUNT_NAME, LOCATION))
         console_output(
-            '\tAccount successfully created, resource id: {}'.format(
-                account.id))
+            '\tAccount successfully {}, resource id: {}'.format(
+                _step_outcome(run_journal, 'account'), account.id))
     except AzureError as ex:
         console_output(
             'An error ocurred. Error details: {}'.format(ex.message))
@@ -294,16 +173,18 @@ def run_example():
     console_output('Creating Capacity Pool ...')
     capacity_pool = None
     try:
-        capacity_pool = create_capacitypool_async(
-            anf_client,
-            RESOURCE_GROUP_NAME,
-            account.name,
-            CAPACITYPOOL_NAME,
-            CAPACITYPOOL_SERVICE_LEVEL,
-            CAPACITYPOOL_SIZE, LOCATION)
-
-        console_output('\tCapacity Pool successfully created, resource id: {}'
-                       .format(capacity_pool.id))
+        capacity_pool = run_journal.run_step(
+            'capacity_pool', anf_client, lambda: create_capacitypool_async(
+                anf_client,
+                RESOURCE_GROUP_NAME,
+                account.name,
+                CAPACITYPOOL_NAME,
+                CAPACITYPOOL_SERVICE_LEVEL,
+                CAPACITYPOOL_SIZE, LOCATION))
+
+        console_output('\tCapacity Pool successfully {}, resource id: {}'
+                       .format(_step_outcome(run_journal, 'capacity_pool'),
+                               capacity_pool.id))
     except AzureError as ex:
         console_output(
             'An error ocurred. Error details: {}'.format(ex.message))
@@ -330,17 +211,20 @@ def run_example():
     try:
         pool_name = resource_uri_utils.get_anf_capacity_pool(capacity_pool.id)
 
-        volume = create_volume(anf_client,
-                               RESOURCE_GROUP_NAME,
-                               account.name, pool_name,
-                               VOLUME_NAME,
-                               VOLUME_USAGE_QUOTA,
-                               CAPACITYPOOL_SERVICE_LEVEL,
-                               subnet_id,
-                               LOCATION)
-
-        console_output('\tVolume successfully created, resource id: {}'
-                       .format(volume.id))
+        volume = run_journal.run_step(
+            'volume', anf_client, lambda: create_volume(
+                anf_client,
+                RESOURCE_GROUP_NAME,
+                account.name, pool_name,
+                VOLUME_NAME,
+                VOLUME_USAGE_QUOTA,
+                CAPACITYPOOL_SERVICE_LEVEL,
+                subnet_id,
+                LOCATION))
+
+        console_output('\tVolume successfully {}, resource id: {}'
+                       .format(_step_outcome(run_journal, 'volume'),
+                               volume.id))
     except AzureError as ex:
         console_output(
             'An error ocurred. Error details: {}'.format(ex.message))
@@ -352,19 +236,23 @@ def run_example():
     try:
         volume_name = resource_uri_utils.get_anf_volume(volume.id)
 
-        snapshot = create_snapshot(anf_client,
-                                   RESOURCE_GROUP_NAME,
-                                   account.name,
-                                   pool_name,
-                                   VOLUME_NAME,
-                                   SNAPSHOT_NAME,
-                                   LOCATION)
+        def create_and_wait_snapshot():
+            created = create_snapshot(anf_client,
+                                      RESOURCE_GROUP_NAME,
+                                      account.name,
+                                      pool_name,
+                                      VOLUME_NAME,
+                                      SNAPSHOT_NAME,
+                                      LOCATION)
+            sample_utils.wait_for_anf_resource(anf_client, created.id)
+            return created
 
-        sample_utils.wait_for_anf_resource(anf_client, snapshot.id)
+        snapshot = run_journal.run_step('snapshot', anf_client,
+                                        create_and_wait_snapshot)
 
         console_output(
-            '\tSnapshot successfully created, resource id: {}'
-            .format(snapshot.id))
+            '\tSnapshot successfully {}, resource id: {}'
+            .format(_step_outcome(run_journal, 'snapshot'), snapshot.id))
     except AzureError as ex:
         console_output(
             'An error ocurred. Error details: {}'.format(ex.message))
@@ -381,15 +269,18 @@ def run_example():
         new_volume_name = "Vol-{}".format(
             resource_uri_utils.get_anf_snapshot(snapshot.id))
 
-        volume_from_snapshot = create_volume_from_snapshot(anf_client,
-                                                           RESOURCE_GROUP_NAME,
-                                                           account.name,
-                                                           pool_name,
-                                                           volume,
-                                                           snapshot.snapshot_id,
-                                                           new_volume_name)
+        volume_from_snapshot = run_journal.run_step(
+            'volume_from_snapshot', anf_client,
+            lambda: create_volume_from_snapshot(anf_client,
+                                                RESOURCE_GROUP_NAME,
+                                                account.name,
+                                                pool_name,
+                                                volume,
+                                                snapshot.snapshot_id,
+                                                new_volume_name))
 
-        console_output('\tNew volume from snapshot successfully created, resource id: {}'.format(
+        console_output('\tNew volume from snapshot successfully {}, resource id: {}'.format(
+            _step_outcome(run_journal, 'volume_from_snapshot'),
             volume_from_snapshot.id))
     except AzureError as ex:
         console_output(
@@ -406,12 +297,18 @@ def run_example():
         capacity_pool_patch = CapacityPoolPatch(location=capacity_pool.location,
                                                 size=sample_utils.get_tib_in_bytes(new_capacity_pool_size_tib))
 
-        capacity_pool = anf_client.pools.begin_update(RESOURCE_GROUP_NAME,
-                                                account.name,
-                                                resource_uri_utils.get_anf_capacity_pool(capacity_pool.id),
-                                                capacity_pool_patch).result()
+        def update_pool():
+            with tracing.span('pools.begin_update'):
+                return anf_client.pools.begin_update(RESOURCE_GROUP_NAME,
+                                                     account.name,
+                                                     resource_uri_utils.get_anf_capacity_pool(capacity_pool.id),
+                                                     capacity_pool_patch).result()
+
+        capacity_pool = run_journal.run_step('pool_update', anf_client,
+                                             update_pool)
 
-        console_output('\t\tCapacity Pool successfully updated, new size {}TiB, resource id: {}'.format(
+        console_output('\t\tCapacity Pool successfully {}, new size {}TiB, resource id: {}'.format(
+            _step_outcome(run_journal, 'pool_update', 'updated'),
             sample_utils.get_bytes_in_tib(capacity_pool.size), capacity_pool.id))
     except AzureError as ex:
         console_output(
@@ -424,62 +321,84 @@ def run_example():
         sample_utils.get_bytes_in_tib(volume.usage_threshold), new_volume_size_tib))
 
     # Getting list of export policies and adding a new one at the end
-    rule_list = sorted(volume.export_policy.rules,
-                       key=lambda r: r.rule_index, reverse=True)
-
-    # Currently, ANF's volume export policy supports up to 5 rules
-    export_policies_patch = None
-    if len(rule_list) <= 4:
-        rule_list.append(ExportPolicyRule(
-            allowed_clients="10.0.0.4/32",
-            cifs=False,
-            nfsv3=True,
-            nfsv41=False,
-            rule_index=rule_list[0].rule_index + 1,
-            unix_read_only=False,
-            unix_read_write=True))
-
-        export_policies_patch = VolumePatchPropertiesExportPolicy(
-            rules=rule_list)
-
-    if export_policies_patch is None:
-        volume_patch = VolumePatch(
-            location=volume.location,
-            service_level=volume.service_level,
-            usage_threshold=sample_utils.get_tib_in_bytes(new_volume_size_tib))
-    else:
-        volume_patch = VolumePatch(
-            location=volume.location,
-            service_level=volume.service_level,
-            usage_threshold=sample_utils.get_tib_in_bytes(new_volume_size_tib),
-            export_policy=export_policies_patch)
-
+    rule_list = list(volume.export_policy.rules)
+    rule_list.append(ExportPolicyRule(
+        allowed_clients="10.0.0.4/32",
+        cifs=False,
+        nfsv3=True,
+        nfsv41=False,
+        rule_index=max([r.rule_index for r in rule_list], default=0) + 1,
+        unix_read_only=False,
+        unix_read_write=True))
+
+    # Currently, ANF's volume export policy supports up to 5 rules. The
+    # rules are compiled into the fewest rules granting every client the
+    # same access as before, merging CIDRs and dropping shadowed ones,
+    # see export_policy.compile_rules
+    export_rules = None
+    try:
+        export_rules = export_policy.compile_rules(rule_list)
+        console_output('\tExport policy compiled from {} to {} rules'.format(
+            len(rule_list), len(export_rules)))
+    except ValueError as ex:
+        console_output('\tExport policy left unchanged: {}'.format(ex))
+
+    # Volume patches go through an update queue, which merges the patches
+    # submitted for the same volume within a short window, drops the fields
+    # already at the requested value and starts one update per volume. The
+    # sample is the only submitter, its patch is flushed right away instead
+    # of waiting for the window to close
+    volume_update_queue = volume_updates.VolumeUpdateQueue(anf_client)
+    volume_update_queue.remember(volume)
     try:
-        updated_volume = anf_client.volumes.begin_update(RESOURCE_GROUP_NAME,
-                                                   account.name,
-                                                   resource_uri_utils.get_anf_capacity_pool(
-                                                       capacity_pool.id),
-                                                   resource_uri_utils.get_anf_volume(volume.id),
-                                                   volume_patch).result()
-
-        console_output('\t\tVolume successfully updated, new size: {}TiB, export policy count: {}, resource id: {}'
-                       .format(sample_utils.get_bytes_in_tib(updated_volume.usage_threshold),
+        def update_volume():
+            update = volume_update_queue.submit(
+                RESOURCE_GROUP_NAME,
+                account.name,
+                resource_uri_utils.get_anf_capacity_pool(capacity_pool.id),
+                resource_uri_utils.get_anf_volume(volume.id),
+                usage_threshold=sample_utils.get_tib_in_bytes(
+                    new_volume_size_tib),
+                export_rules=export_rules)
+            volume_update_queue.flush()
+            return update.result()
+
+        updated_volume = run_journal.run_step('volume_update', anf_client,
+                                              update_volume)
+
+        console_output('\t\tVolume successfully {}, new size: {}TiB, export policy count: {}, resource id: {}'
+                       .format(_step_outcome(run_journal, 'volume_update',
+                                             'updated'),
+                               sample_utils.get_bytes_in_tib(updated_volume.usage_threshold),
                                len(updated_volume.export_policy.rules),
                                updated_volume.id))
     except AzureError as ex:
         console_output(
             'An error ocurred. Error details: {}'.format(ex.message))
         raise
+    finally:
+        volume_update_queue.close()
 
     # Retrieving resources
     console_output('Performing retrieval operations ...')
 
+    # Crawling the resource group once, the lists below are served from the
+    # inventory tree. Pools, volumes and snapshots of every parent are listed
+    # concurrently and cached, see inventory.TTL_IN_SEC
+    anf_inventory = inventory.InventoryCache(anf_client)
+    try:
+        inventory_tree = anf_inventory.get(RESOURCE_GROUP_NAME)
+    except AzureError as ex:
+        console_output(
+            'An error ocurred. Error details: {}'.format(ex.message))
+        raise
+
     # Accounts
     # Getting a list of ANF Accounts
     console_output('\tListing accounts...')
     account_list = None
     try:
-        account_list = list(anf_client.accounts.list(RESOURCE_GROUP_NAME))
+        account_list = inventory_tree.child_resources()
 
         for i, retrieved_account in enumerate(account_list):
             console_output('\t\t{} - Account Name: {}, Id: {}'
@@ -510,8 +429,8 @@ def run_example():
                    .format(account.name))
     capacitypool_list = None
     try:
-        capacitypool_list = list(anf_client.pools.list(RESOURCE_GROUP_NAME,
-                                                       resource_uri_utils.get_anf_account(account.id)))
+        capacitypool_list = _list_children(anf_client, anf_inventory,
+                                           account.id)
 
         for i, retrieved_pool in enumerate(capacitypool_list):
             console_output('\t\t{} - Capacity Pool Name: {}, Id: {}'
@@ -545,10 +464,8 @@ def run_example():
         capacity_pool.name))
     volume_list = None
     try:
-        volume_list = list(anf_client.volumes.list(RESOURCE_GROUP_NAME,
-                                                   resource_uri_utils.get_anf_account(
-                                                       account.id),
-                                                   resource_uri_utils.get_anf_capacity_pool(capacity_pool.id)))
+        volume_list = _list_children(anf_client, anf_inventory,
+                                     capacity_pool.id)
 
         for i, retrieved_volume in enumerate(volume_list):
             console_output('\t\t{} - Volume Name: {}, Id: {}'
@@ -584,12 +501,7 @@ def run_example():
         '\tListing snapshots from from volume {}...'.format(volume.name))
     snapshot_list = None
     try:
-        snapshot_list = list(anf_client.snapshots.list(RESOURCE_GROUP_NAME,
-                                                       resource_uri_utils.get_anf_account(
-                                                           account.id),
-                                                       resource_uri_utils.get_anf_capacity_pool(
-                                                           capacity_pool.id),
-                                                       resource_uri_utils.get_anf_volume(volume.id)))
+        snapshot_list = _list_children(anf_client, anf_inventory, volume.id)
 
         for i, retrieved_snapshot in enumerate(snapshot_list):
             console_output('\t\t{} - Snapshot Name: {}, Id: {}'
@@ -627,82 +539,35 @@ def run_example():
     if SHOULD_CLEANUP:
         console_output('Cleaning up...')
 
-        # Cleaning up snapshot
-        console_output(
-            "\tWaiting for 1 minute to let the snapshot used to create a new \
-            volume to complete the split operation therefore not being locked...")
-        time.sleep(60)
-        console_output("\tDeleting Snapshot {}...".format(
-            resource_uri_utils.get_anf_snapshot(snapshot.id)))
-
-        try:
-            anf_client.snapshots.begin_delete(RESOURCE_GROUP_NAME,
-                                        account.name,
-                                        resource_uri_utils.get_anf_capacity_pool(
-                                            capacity_pool.id),
-                                        resource_uri_utils.get_anf_volume(
-                                            volume.id),
-                                        resource_uri_utils.get_anf_snapshot(snapshot.id)).wait()
-
-            # ARM Workaround to wait the deletion complete/propagate
-            sample_utils.wait_for_no_anf_resource(anf_client, snapshot.id)
-
-            console_output('\t\tDeleted Snapshot: {}'.format(snapshot.id))
-        except AzureError as ex:
-            console_output(
-                'An error ocurred. Error details: {}'.format(ex.message))
-            raise
+        resource_ids = [snapshot.id,
+                        volume.id,
+                        volume_from_snapshot.id,
+                        capacity_pool.id,
+                        account.id]
 
-        # Cleaning up volumes
+        # Snapshots, volumes, capacity pools and accounts are deleted by the
+        # teardown engine, each resource right after its nested resources are
+        # gone and independent resources in parallel.
         # Note: Volume deletion operations at the RP level are executed
-        # serially
-        console_output("\tDeleting Volumes...")
+        # serially within a capacity pool
+        # Note: The snapshot used to create a new volume is locked until the
+        # volume is split from it, its deletion starts as soon as the split
+        # completes
         try:
-            volume_ids = [volume.id, volume_from_snapshot.id]
-            for volume_id in volume_ids:
-                console_output("\t\tDeleting {}".format(volume_id))
-                anf_client.volumes.begin_delete(RESOURCE_GROUP_NAME,
-                                          account.name,
-                                          resource_uri_utils.get_anf_capacity_pool(
-                                             capacity_pool.id),
-                                          resource_uri_utils.get_anf_volume(volume_id)).wait()
-
-                sample_utils.wait_for_no_anf_resource(anf_client, volume_id)
-
-                console_output('\t\tDeleted Volume: {}'.format(volume_id))
+            teardown.teardown(anf_client,
+                              resource_ids,
+                              before_delete=teardown.wait_for_snapshot_split(
+                                  anf_client),
+                              on_deleted=lambda resource_id: console_output(
+                                  '\t\tDeleted: {}'.format(resource_id)))
         except AzureError as ex:
             console_output(
                 'An error ocurred. Error details: {}'.format(ex.message))
             raise
 
-        # Cleaning up Capacity Pool
-        console_output("\tDeleting Capacity Pool {} ...".format(
-            resource_uri_utils.get_anf_capacity_pool(capacity_pool.id)))
-        try:
-            anf_client.pools.begin_delete(RESOURCE_GROUP_NAME,
-                                    account.name,
-                                    resource_uri_utils.get_anf_capacity_pool(
-                                        capacity_pool.id)).wait()
-
-            sample_utils.wait_for_no_anf_resource(anf_client, capacity_pool.id)
-
-            console_output(
-                '\t\tDeleted Capacity Pool: {}'.format(capacity_pool.id))
-        except AzureError as ex:
-            console_output(
-                'An error ocurred. Error details: {}'.format(ex.message))
-            raise
-
-        # Cleaning up Account
-        console_output("\tDeleting Account {} ...".format(account.name))
-        try:
-            anf_client.accounts.begin_delete(RESOURCE_GROUP_NAME, account.name)
-            sample_utils.wait_for_no_anf_resource(anf_client, account.id)
-            console_output('\t\tDeleted Account: {}'.format(account.id))
-        except AzureError as ex:
-            console_output(
-                'An error ocurred. Error details: {}'.format(ex.message))
-            raise
+        # The resources of the run are gone, a new run with the same id
+        # starts from scratch
+        run_journal.clear()
 
 
 # This script expects that the following environment var are set:
@@ -714,4 +579,13 @@ def run_example():
 
 if __name__ == "__main__":
 
-    run_example()
+    if TRACE_FILE:
+        tracing.add_exporter(tracing.OtlpJsonExporter(TRACE_FILE)
+                             if TRACE_FORMAT == 'otlp'
+                             else tracing.JsonLinesExporter(TRACE_FILE))
+
+    with tracing.span('run_example'):
+        run_example()
+
+    console_output('HTTP connection reuse: {}'.format(
+        client_factory.default_factory().connection_stats()))
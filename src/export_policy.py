@@ -0,0 +1,202 @@
+# export_policy.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import ipaddress
+from bisect import bisect_right
+import preflight
+from azure.mgmt.netapp.models import ExportPolicyRule
+
+# Fields of ExportPolicyRule defining what a matching client is granted,
+# rules with the same values grant the same access
+ACCESS_FIELDS = ('unix_read_only', 'unix_read_write', 'kerberos5_read_only',
+                 'kerberos5_read_write', 'kerberos5_i_read_only',
+                 'kerberos5_i_read_write', 'kerberos5_p_read_only',
+                 'kerberos5_p_read_write', 'cifs', 'nfsv3', 'nfsv41',
+                 'has_root_access')
+
+
+def parse_allowed_clients(allowed_clients):
+    """Parses the allowed_clients value of an export policy rule
+
+    Args:
+        allowed_clients (string): Comma separated IPv4 addresses and CIDRs
+
+    Returns:
+        list: Returns the (first, last) address ranges, as integers
+    """
+
+    ranges = []
+    for client in (allowed_clients or '').split(','):
+        client = client.strip()
+        if not client:
+            continue
+        try:
+            network = ipaddress.IPv4Network(client, strict=False)
+        except ValueError:
+            raise ValueError('{} is not an IPv4 address or CIDR, only those '
+                             'can be compiled'.format(client))
+        ranges.append((int(network.network_address),
+                       int(network.broadcast_address)))
+    return ranges
+
+
+def _access(rule):
+    return tuple(getattr(rule, field) for field in ACCESS_FIELDS)
+
+
+def _segments(rules):
+    # Splits the address space at every range boundary, each elementary
+    # segment is granted by the first rule, by rule index, containing it.
+    # Returns (first, last, rule) tuples, adjacent segments of the same
+    # rule merged and unmatched segments left out
+    ordered = sorted(rules, key=lambda rule: rule.rule_index)
+    ranges = [parse_allowed_clients(rule.allowed_clients) for rule in ordered]
+    bounds = sorted(set(
+        bound for rule_ranges in ranges
+        for first, last in rule_ranges for bound in (first, last + 1)))
+
+    segments = []
+    for first, end in zip(bounds, bounds[1:]):
+        owner = next((rule for rule, rule_ranges in zip(ordered, ranges)
+                      if any(start <= first <= last
+                             for start, last in rule_ranges)), None)
+        if owner is None:
+            continue
+        if segments and segments[-1][2] is owner \
+                and segments[-1][1] == first - 1:
+            segments[-1] = (segments[-1][0], end - 1, owner)
+        else:
+            segments.append((first, end - 1, owner))
+    return segments
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def compile_rules(rules, max_rules=preflight.MAX_EXPORT_RULES):
+    """Rewrites export policy rules into the fewest equivalent rules
+
+    Rules are evaluated by ascending rule index, the first rule matching a
+    client applies. The compiler computes which access every address is
+    granted, groups the addresses by access and emits one rule per access,
+    in the order the accesses first appear, renumbered from 1. The CIDRs of
+    a rule cover its addresses and may also cover addresses of the rules
+    emitted before it, which match first, so that e.g. a catch-all behind a
+    single address stays 0.0.0.0/0. Adjacent and overlapping ranges are
+    aggregated, shadowed ones dropped, and no client is granted more, or
+    less, than before.
+
+    Args:
+        rules (list): ExportPolicyRule objects, allowed clients being IPv4
+            addresses and CIDRs
+        max_rules (int): Maximum number of rules of the result
+
+    Returns:
+        list: Returns the compiled ExportPolicyRule objects
+
+    Raises:
+        ValueError: The rules grant more than max_rules different accesses,
+            or contain a client that is not an IPv4 address or CIDR
+    """
+
+    groups = {}
+    first_index = {}
+    for first, last, rule in _segments(rules):
+        access = _access(rule)
+        groups.setdefault(access, []).append((first, last))
+        first_index.setdefault(access, rule.rule_index)
+
+    if len(groups) > max_rules:
+        raise ValueError('The rules grant {} different accesses, at most {} '
+                         'rules are supported'.format(len(groups), max_rules))
+
+    compiled = []
+    claimed = []
+    for access in sorted(groups, key=first_index.get):
+        own = groups[access]
+        networks = []
+        for first, last in _merge_ranges(own + claimed):
+            if not any(start <= last and first <= end for start, end in own):
+                continue
+            networks.extend(ipaddress.summarize_address_range(
+                ipaddress.IPv4Address(first), ipaddress.IPv4Address(last)))
+        claimed.extend(own)
+        rule = ExportPolicyRule(
+            rule_index=len(compiled) + 1,
+            allowed_clients=','.join(
+                str(network.network_address) if network.prefixlen == 32
+                else str(network)
+                for network in ipaddress.collapse_addresses(networks)))
+        for field, value in zip(ACCESS_FIELDS, access):
+            setattr(rule, field, value)
+        compiled.append(rule)
+    return compiled
+
+
+class ExportPolicyIndex(object):
+    """Interval index answering which rule of a policy matches a client
+
+    The address space is split into disjoint intervals, each owned by the
+    rule that applies to its clients, so a lookup is one binary search.
+
+    Args:
+        rules (list): ExportPolicyRule objects of one volume
+    """
+
+    __slots__ = ('starts', 'ends', 'rules')
+
+    def __init__(self, rules):
+        segments = _segments(rules)
+        self.starts = [first for first, _, _ in segments]
+        self.ends = [last for _, last, _ in segments]
+        self.rules = [rule for _, _, rule in segments]
+
+    def match_int(self, address):
+        """Gets the rule matching an IPv4 address given as an integer
+
+        Returns:
+            ExportPolicyRule: Returns the rule or None if no rule matches
+        """
+
+        position = bisect_right(self.starts, address) - 1
+        if position >= 0 and address <= self.ends[position]:
+            return self.rules[position]
+        return None
+
+    def match(self, address):
+        """Gets the rule matching an IPv4 address, e.g. "10.0.0.4"
+
+        Returns:
+            ExportPolicyRule: Returns the rule or None if no rule matches
+
+        Raises:
+            ValueError: The address is not a dotted quad IPv4 address
+        """
+
+        return self.match_int(int(ipaddress.IPv4Address(address)))
+
+
+def index_volumes(volumes):
+    """Builds the export policy index of many volumes, e.g. for an audit
+
+    Args:
+        volumes (iterable): Volume models, e.g. listing.walk_anf_resources
+
+    Returns:
+        dict: Returns volume resource id -> ExportPolicyIndex
+    """
+
+    return dict((volume.id, ExportPolicyIndex(
+        volume.export_policy.rules if volume.export_policy is not None
+        else [])) for volume in volumes)
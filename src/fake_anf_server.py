@@ -0,0 +1,579 @@
+# fake_anf_server.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import argparse
+import heapq
+import json
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+FAKE_SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+
+# ARM resource type segment, lower case -> (kind, type name)
+_ANF_TYPES = OrderedDict([
+    ('netappaccounts', ('account', 'netAppAccounts')),
+    ('capacitypools', ('capacity_pool', 'capacityPools')),
+    ('volumes', ('volume', 'volumes')),
+    ('snapshots', ('snapshot', 'snapshots')),
+])
+_TYPE_CHAIN = list(_ANF_TYPES)
+
+# Default export policy rule assigned by the service to new NFS volumes
+_DEFAULT_EXPORT_RULE = {
+    'ruleIndex': 1,
+    'unixReadOnly': False,
+    'unixReadWrite': True,
+    'cifs': False,
+    'nfsv3': True,
+    'nfsv41': False,
+    'allowedClients': '0.0.0.0/0',
+}
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops the connections of bursts of concurrent
+    # requests, e.g. fleet snapshots, which then arrive a second late
+    request_queue_size = 128
+
+
+class FakeAnfServer(object):
+    """Local stand-in for the Microsoft.NetApp ARM resource provider
+
+    In-memory HTTP server implementing the ARM endpoints used by the sample:
+    accounts, capacity pools, volumes and snapshots create/update/get/list/
+    delete, Azure-AsyncOperation long running operation polling, paging of
+    list results and the generic resource HEAD/GET used by
+    sample_utils.resource_exists. Non ANF resources, e.g. the delegated
+    subnet, are reported as existing.
+
+    Args:
+        host (string): Interface to listen on
+        port (int): Port to listen on, 0 picks a free one
+        lro_latency (float or dict): Seconds before a long running operation
+            completes, either one value or kind ("account", "capacity_pool",
+            "volume", "snapshot") -> seconds
+        failure_rate (float): Fraction of long running operations that end in
+            the Failed state
+        split_latency (float or tuple): Seconds a volume created from a
+            snapshot takes to split from it once created, either one value
+            or a (minimum, maximum) range drawn from for every volume. The
+            split progress is reported as cloneProgress and the snapshot
+            can not be deleted until the split completes
+        throttle_rate (float): Fraction of requests randomly answered with
+            429 Too Many Requests
+        retry_after (int): Retry-After seconds sent with 429 responses
+        read_limit (int): Size of the subscription read token bucket
+        write_limit (int): Size of the subscription write token bucket
+        ratelimit_window (float): Seconds it takes to refill an empty bucket,
+            buckets are refilled continuously like ARM does
+        page_size (int): Maximum number of items per list page
+        head_supported (boolean): If False resource HEAD requests are answered
+            with 405, as ARM does for some resource providers
+        seed (int): Optional. Seed of the random generator
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, lro_latency=0.1,
+                 failure_rate=0.0, split_latency=0.0, throttle_rate=0.0,
+                 retry_after=1,
+                 read_limit=12000, write_limit=1200, ratelimit_window=3600,
+                 page_size=100, head_supported=False, seed=None):
+        self.lro_latency = lro_latency
+        self.failure_rate = failure_rate
+        self.split_latency = split_latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.read_limit = read_limit
+        self.write_limit = write_limit
+        self.ratelimit_window = ratelimit_window
+        self.page_size = page_size
+        self.head_supported = head_supported
+        self.random = random.Random(seed)
+        self.request_counts = {}
+
+        self._lock = threading.RLock()
+        self._resources = {}
+        self._children = {}
+        self._operations = {}
+        self._pending = []
+        # Volume key -> split of a volume created from a snapshot
+        self._splits = {}
+        self._base_url = None
+        self._reads = float(read_limit)
+        self._writes = float(write_limit)
+        self._refilled = time.monotonic()
+
+        server = self
+
+        class Handler(_RequestHandler):
+            fake = server
+
+        self._httpd = _Server((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """string: Base URL to give to the management clients"""
+        host, port = self._httpd.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        """Starts serving requests on a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def resource(self, resource_id):
+        """Gets a copy of the stored representation of a resource
+
+        Args:
+            resource_id (string): Resource id
+
+        Returns:
+            dict: Returns the resource JSON or None if not found
+        """
+        with self._lock:
+            self._complete_due_operations()
+            self._update_splits()
+            found = self._resources.get(_key(resource_id))
+            return json.loads(json.dumps(found)) if found else None
+
+    # Request handling, called by _RequestHandler
+
+    def handle(self, method, path, query, body, base_url):
+        with self._lock:
+            self._base_url = base_url
+            self._complete_due_operations()
+            self._update_splits()
+            self.request_counts[method] = \
+                self.request_counts.get(method, 0) + 1
+
+            status, headers, payload = self._dispatch(method, path, query,
+                                                      body)
+            headers.update(self._ratelimit_headers())
+            return status, headers, payload
+
+    def _dispatch(self, method, path, query, body):
+        throttled = self._consume_quota(method)
+        if throttled is not None:
+            return throttled
+
+        if path.startswith('/fake/operations/'):
+            return self._get_operation(path.rsplit('/', 1)[-1])
+
+        segments = path.strip('/').split('/')
+        if len(segments) < 6 or segments[0].lower() != 'subscriptions' \
+                or segments[2].lower() != 'resourcegroups' \
+                or segments[4].lower() != 'providers':
+            return _error(404, 'InvalidResourceId',
+                          'Unsupported path {}'.format(path))
+
+        if segments[5].lower() != 'microsoft.netapp':
+            return self._external_resource(method)
+
+        types = [segment.lower() for segment in segments[6::2]]
+        if not types or types != _TYPE_CHAIN[:len(types)]:
+            return _error(404, 'InvalidResourceType',
+                          'Unsupported path {}'.format(path))
+
+        if len(segments) % 2 == 1:
+            if method != 'GET':
+                return _error(405, 'MethodNotAllowed', method)
+            return self._list(path, query)
+
+        handler = {
+            'GET': self._get,
+            'HEAD': self._head,
+            'PUT': self._put,
+            'PATCH': self._patch,
+            'DELETE': self._delete,
+        }.get(method)
+        if handler is None:
+            return _error(405, 'MethodNotAllowed', method)
+        return handler(path, segments, body)
+
+    def _consume_quota(self, method):
+        now = time.monotonic()
+        elapsed = (now - self._refilled) / self.ratelimit_window
+        self._refilled = now
+        self._reads = min(self.read_limit,
+                          self._reads + elapsed * self.read_limit)
+        self._writes = min(self.write_limit,
+                           self._writes + elapsed * self.write_limit)
+
+        is_read = method in ('GET', 'HEAD')
+        remaining = self._reads if is_read else self._writes
+        if remaining < 1 or self.random.random() < self.throttle_rate:
+            status, headers, payload = _error(
+                429, 'TooManyRequests', 'The request is being throttled.')
+            headers['Retry-After'] = str(self.retry_after)
+            return status, headers, payload
+
+        if is_read:
+            self._reads -= 1
+        else:
+            self._writes -= 1
+        return None
+
+    def _ratelimit_headers(self):
+        return {
+            'x-ms-ratelimit-remaining-subscription-reads':
+                str(max(0, int(self._reads))),
+            'x-ms-ratelimit-remaining-subscription-writes':
+                str(max(0, int(self._writes))),
+        }
+
+    def _external_resource(self, method):
+        if method == 'HEAD':
+            if not self.head_supported:
+                return _error(405, 'MethodNotAllowed', 'HEAD not supported')
+            return 204, {}, None
+        if method == 'GET':
+            return 200, {}, {'properties': {'provisioningState': 'Succeeded'}}
+        return _error(405, 'MethodNotAllowed', method)
+
+    def _get(self, path, segments, body):
+        resource = self._resources.get(_key(path))
+        if resource is None:
+            return _not_found(path)
+        return 200, {}, resource
+
+    def _head(self, path, segments, body):
+        if not self.head_supported:
+            return _error(405, 'MethodNotAllowed', 'HEAD not supported')
+        return (204 if _key(path) in self._resources else 404), {}, None
+
+    def _list(self, path, query):
+        parent = _key(path.rsplit('/', 1)[0])
+        segment_type = path.rstrip('/').rsplit('/', 1)[-1].lower()
+        if len(path.strip('/').split('/')) > 7 \
+                and parent not in self._resources:
+            return _not_found(path.rsplit('/', 1)[0])
+
+        items = [resource for key, resource
+                 in self._children.get(parent, {}).items()
+                 if key.rsplit('/', 2)[-2] == segment_type]
+        skip = int(query.get('$skiptoken', ['0'])[0])
+        page = items[skip:skip + self.page_size]
+        payload = {'value': page}
+        if skip + self.page_size < len(items):
+            payload['nextLink'] = '{}{}?{}'.format(
+                self._base_url, path,
+                urlencode({'api-version': query.get('api-version', [''])[0],
+                           '$skiptoken': skip + self.page_size}))
+        return 200, {}, payload
+
+    def _put(self, path, segments, body):
+        key = _key(path)
+        parent = key.rsplit('/', 2)[0]
+        if len(segments) > 8 and parent not in self._resources:
+            return _not_found('/'.join(segments[:-2]))
+
+        kind, type_name = _ANF_TYPES[segments[-2].lower()]
+        existing = self._resources.get(key)
+        if existing is not None and existing['properties'].get(
+                'provisioningState') in ('Creating', 'Updating', 'Deleting'):
+            return _error(409, 'Conflict',
+                          'Another operation is in progress on {}'.format(
+                              path))
+
+        body = body or {}
+        properties = dict(body.get('properties') or {})
+        if existing is None:
+            properties.update(_generated_properties(kind, properties))
+            resource = {
+                'id': path,
+                'name': '/'.join(segments[7::2]),
+                'type': 'Microsoft.NetApp/{}'.format(
+                    '/'.join(_ANF_TYPES[t][1] for t in _TYPE_CHAIN[
+                        :len(segments[6::2])])),
+                'location': body.get('location'),
+                'tags': body.get('tags'),
+                'properties': properties,
+            }
+            self._resources[key] = resource
+            self._children.setdefault(parent, OrderedDict())[key] = resource
+            if kind == 'volume' and properties.get('snapshotId'):
+                self._start_split(key, properties)
+        else:
+            resource = existing
+            resource['tags'] = body.get('tags', resource.get('tags'))
+            resource['properties'].update(properties)
+
+        resource['properties']['provisioningState'] = \
+            'Creating' if existing is None else 'Updating'
+        headers = self._start_operation(key, kind, 'PUT')
+        return (201 if existing is None else 200), headers, resource
+
+    def _patch(self, path, segments, body):
+        key = _key(path)
+        resource = self._resources.get(key)
+        if resource is None:
+            return _not_found(path)
+
+        body = body or {}
+        if 'tags' in body:
+            resource['tags'] = body['tags']
+        resource['properties'].update(body.get('properties') or {})
+        resource['properties']['provisioningState'] = 'Updating'
+
+        kind = _ANF_TYPES[segments[-2].lower()][0]
+        headers = self._start_operation(key, kind, 'PATCH')
+        return 202, headers, resource
+
+    def _delete(self, path, segments, body):
+        key = _key(path)
+        resource = self._resources.get(key)
+        if resource is None:
+            return 204, {}, None
+        if self._children.get(key):
+            return _error(409, 'CannotDeleteResource',
+                          'Can not delete resource before nested resources '
+                          'are deleted.')
+        for volume_key, split in self._splits.items():
+            if split['snapshot'] == key:
+                return _error(409, 'Conflict',
+                              'Snapshot {} is locked by volume {} being '
+                              'split from it.'.format(path, volume_key))
+
+        resource['properties']['provisioningState'] = 'Deleting'
+        kind = _ANF_TYPES[segments[-2].lower()][0]
+        headers = self._start_operation(key, kind, 'DELETE')
+        headers['Location'] = headers['Azure-AsyncOperation']
+        return 202, headers, None
+
+    def _start_operation(self, key, kind, method):
+        latency = self.lro_latency
+        if isinstance(latency, dict):
+            latency = latency.get(kind, 0)
+
+        operation_id = str(uuid.uuid4())
+        operation = {
+            'key': key,
+            'method': method,
+            'ready_at': time.monotonic() + latency,
+            'status': 'InProgress',
+        }
+        self._operations[operation_id] = operation
+        heapq.heappush(self._pending, (operation['ready_at'], operation_id))
+
+        return {
+            'Azure-AsyncOperation': '{}/fake/operations/{}'.format(
+                self._base_url, operation_id),
+        }
+
+    def _complete_due_operations(self):
+        now = time.monotonic()
+        while self._pending and self._pending[0][0] <= now:
+            operation_id = heapq.heappop(self._pending)[1]
+            operation = self._operations[operation_id]
+            resource = self._resources.get(operation['key'])
+            failed = self.random.random() < self.failure_rate
+
+            operation['status'] = 'Failed' if failed else 'Succeeded'
+            if resource is None:
+                continue
+            if failed:
+                resource['properties']['provisioningState'] = 'Failed'
+            elif operation['method'] == 'DELETE':
+                self._remove(operation['key'])
+            else:
+                resource['properties']['provisioningState'] = 'Succeeded'
+                split = self._splits.get(operation['key'])
+                if split is not None and split['started'] is None:
+                    split['started'] = now
+
+    def _start_split(self, key, properties):
+        snapshot_key = next((
+            snapshot_key for snapshot_key, snapshot in self._resources.items()
+            if snapshot['properties'].get('snapshotId') ==
+            properties['snapshotId'] and snapshot_key.rsplit('/', 2)[-2] ==
+            'snapshots'), None)
+        if snapshot_key is None:
+            return
+
+        duration = self.split_latency
+        if isinstance(duration, (tuple, list)):
+            duration = self.random.uniform(*duration)
+        self._splits[key] = {'snapshot': snapshot_key, 'duration': duration,
+                             'started': None}
+        properties['cloneProgress'] = 0
+
+    def _update_splits(self):
+        now = time.monotonic()
+        for key, split in list(self._splits.items()):
+            if split['started'] is None:
+                continue
+            elapsed = now - split['started']
+            progress = 100 if elapsed >= split['duration'] else \
+                int(100 * elapsed / split['duration'])
+            self._resources[key]['properties']['cloneProgress'] = progress
+            if progress >= 100:
+                del self._splits[key]
+
+    def _remove(self, key):
+        self._resources.pop(key, None)
+        self._splits.pop(key, None)
+        self._children.pop(key, None)
+        siblings = self._children.get(key.rsplit('/', 2)[0])
+        if siblings is not None:
+            siblings.pop(key, None)
+
+    def _get_operation(self, operation_id):
+        operation = self._operations.get(operation_id)
+        if operation is None:
+            return _not_found(operation_id)
+
+        payload = {'name': operation_id, 'status': operation['status']}
+        if operation['status'] == 'Failed':
+            payload['error'] = {'code': 'InternalServerError',
+                                'message': 'Simulated operation failure'}
+        return 200, {}, payload
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        status, headers, payload = self.fake.handle(
+            self.command, url.path, parse_qs(url.query), body,
+            'http://{}'.format(self.headers['Host']))
+        data = json.dumps(payload).encode('utf-8') \
+            if payload is not None else b''
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('x-ms-request-id', str(uuid.uuid4()))
+        if data:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    do_GET = do_HEAD = do_PUT = do_PATCH = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _key(path):
+    return path.rstrip('/').lower()
+
+
+def _error(status, code, message):
+    return status, {}, {'error': {'code': code, 'message': message}}
+
+
+def _not_found(path):
+    return _error(404, 'ResourceNotFound',
+                  'The Resource {} was not found.'.format(path))
+
+
+def _generated_properties(kind, properties):
+    if kind == 'capacity_pool':
+        return {'poolId': str(uuid.uuid4())}
+    if kind == 'volume':
+        generated = {'fileSystemId': str(uuid.uuid4())}
+        if not properties.get('exportPolicy'):
+            generated['exportPolicy'] = {'rules': [dict(_DEFAULT_EXPORT_RULE)]}
+        return generated
+    if kind == 'snapshot':
+        return {'snapshotId': str(uuid.uuid4()),
+                'created': datetime.now(timezone.utc).isoformat()}
+    return {}
+
+
+class FakeCredential(object):
+    """Token credential returning a dummy token, never sent over the wire"""
+
+    def get_token(self, *scopes, **kwargs):
+        from azure.core.credentials import AccessToken
+        return AccessToken('fake-token', int(time.time()) + 3600)
+
+
+def create_clients(base_url, subscription_id=FAKE_SUBSCRIPTION_ID,
+                   polling_interval=0.05, **kwargs):
+    """Creates management clients pointing at a fake resource provider
+
+    Args:
+        base_url (string): Base URL of a running FakeAnfServer
+        subscription_id (string): Subscription id used in resource ids
+        polling_interval (float): Long running operation polling interval
+        kwargs: Optional keyword arguments for the client constructors
+
+    Returns:
+        NetAppManagementClient: Returns the ANF client
+        ResourceManagementClient: Returns the resource management client
+    """
+
+    from azure.core.pipeline.policies import SansIOHTTPPolicy
+    from azure.mgmt.netapp import NetAppManagementClient
+    from azure.mgmt.resource import ResourceManagementClient
+
+    kwargs.setdefault('authentication_policy', SansIOHTTPPolicy())
+    anf_client = NetAppManagementClient(FakeCredential(), subscription_id,
+                                        base_url=base_url,
+                                        polling_interval=polling_interval,
+                                        **kwargs)
+    resources_client = ResourceManagementClient(FakeCredential(),
+                                                subscription_id,
+                                                base_url=base_url,
+                                                polling_interval=polling_interval,
+                                                **kwargs)
+    return anf_client, resources_client
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Local fake Azure NetApp Files resource provider')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--lro-latency', type=float, default=1.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--split-latency', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--head-supported', action='store_true')
+    args = parser.parse_args()
+
+    fake = FakeAnfServer(port=args.port, lro_latency=args.lro_latency,
+                         failure_rate=args.failure_rate,
+                         split_latency=args.split_latency,
+                         throttle_rate=args.throttle_rate,
+                         page_size=args.page_size,
+                         head_supported=args.head_supported)
+    print('Fake Azure NetApp Files resource provider listening on {}'.format(
+        fake.base_url))
+    try:
+        fake._httpd.serve_forever()
+    except KeyboardInterrupt:
+        fake._httpd.server_close()
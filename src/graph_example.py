@@ -0,0 +1,163 @@
+# graph_example.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import client_factory
+import sample_utils
+import resource_uri_utils
+from azure.mgmt.netapp.models import CapacityPoolPatch, VolumePatch
+from example import create_account, create_capacitypool_async, \
+    create_volume, create_snapshot, create_volume_from_snapshot, \
+    ANF_ACCOUNT_NAME, CAPACITYPOOL_NAME, CAPACITYPOOL_SERVICE_LEVEL, \
+    CAPACITYPOOL_SIZE, LOCATION, RESOURCE_GROUP_NAME, SUBNET_NAME, \
+    VNET_NAME, VNET_RESOURCE_GROUP_NAME, VOLUME_USAGE_QUOTA
+from provisioning_graph import ProvisioningGraph
+from sample_utils import console_output, print_header
+
+# Number of volumes (each one with a snapshot and a volume from snapshot)
+VOLUME_COUNT = 3
+# Maximum number of provisioning steps running at the same time
+MAX_CONCURRENCY = 4
+NEW_CAPACITY_POOL_SIZE_TIB = 10
+NEW_VOLUME_SIZE_TIB = 1
+
+
+def _pool_name(results):
+    return resource_uri_utils.get_anf_capacity_pool(results['pool'].id)
+
+
+def build_graph(client, resource_group_name, anf_account_name, subnet_id,
+                location, volume_count=VOLUME_COUNT,
+                max_concurrency=MAX_CONCURRENCY):
+    """Declares the sample provisioning steps and their dependencies
+
+    Account -> pool, then for each volume: volume -> snapshot -> volume from
+    snapshot and volume resize, the pool resize only depends on the pool.
+    Branches of different volumes are independent from each other.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group
+        anf_account_name (string): Name of the account to be created
+        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
+            subnet
+        location (string): Azure short name of the region
+        volume_count (int): Number of volumes to be created
+        max_concurrency (int): Maximum number of steps running at once
+
+    Returns:
+        ProvisioningGraph: Returns the graph, ready to be run
+    """
+
+    graph = ProvisioningGraph(max_concurrency=max_concurrency)
+
+    graph.add('account', lambda results: create_account(
+        client, resource_group_name, anf_account_name, location))
+
+    graph.add('pool', lambda results: create_capacitypool_async(
+        client, resource_group_name, results['account'].name,
+        CAPACITYPOOL_NAME, CAPACITYPOOL_SERVICE_LEVEL, CAPACITYPOOL_SIZE,
+        location), depends_on=['account'])
+
+    graph.add('pool-update', lambda results: client.pools.begin_update(
+        resource_group_name, results['account'].name, _pool_name(results),
+        CapacityPoolPatch(
+            location=results['pool'].location,
+            size=sample_utils.get_tib_in_bytes(NEW_CAPACITY_POOL_SIZE_TIB))
+    ).result(), depends_on=['account', 'pool'])
+
+    for i in range(volume_count):
+        volume_name = 'Vol-{}-{}-{}'.format(anf_account_name,
+                                            CAPACITYPOOL_NAME, i)
+        volume_step = 'volume-{}'.format(i)
+        snapshot_step = 'snapshot-{}'.format(i)
+
+        graph.add(volume_step,
+                  lambda results, volume_name=volume_name: create_volume(
+                      client, resource_group_name, results['account'].name,
+                      _pool_name(results), volume_name, VOLUME_USAGE_QUOTA,
+                      CAPACITYPOOL_SERVICE_LEVEL, subnet_id, location),
+                  depends_on=['account', 'pool'])
+
+        graph.add(snapshot_step,
+                  lambda results, volume_name=volume_name: create_snapshot(
+                      client, resource_group_name, results['account'].name,
+                      _pool_name(results), volume_name,
+                      'Snapshot-{}'.format(volume_name), location),
+                  depends_on=['account', 'pool', volume_step])
+
+        graph.add('volume-from-snapshot-{}'.format(i),
+                  lambda results, volume_step=volume_step,
+                  snapshot_step=snapshot_step: create_volume_from_snapshot(
+                      client, resource_group_name, results['account'].name,
+                      _pool_name(results), results[volume_step],
+                      results[snapshot_step].snapshot_id,
+                      'Vol-{}'.format(resource_uri_utils.get_anf_snapshot(
+                          results[snapshot_step].id))),
+                  depends_on=['account', 'pool', volume_step, snapshot_step])
+
+        # The resize waits for the snapshot so both operations do not race
+        # on the same volume
+        graph.add('volume-update-{}'.format(i),
+                  lambda results, volume_step=volume_step:
+                  client.volumes.begin_update(
+                      resource_group_name, results['account'].name,
+                      _pool_name(results),
+                      resource_uri_utils.get_anf_volume(
+                          results[volume_step].id),
+                      VolumePatch(
+                          location=results[volume_step].location,
+                          service_level=results[volume_step].service_level,
+                          usage_threshold=sample_utils.get_tib_in_bytes(
+                              NEW_VOLUME_SIZE_TIB))).result(),
+                  depends_on=['account', 'pool', volume_step, snapshot_step])
+
+    return graph
+
+
+def run_example():
+    """Azure NetApp Files SDK dependency graph provisioning example."""
+
+    print_header("Azure NetAppFiles Python SDK Sample - dependency graph "
+        "provisioning of an account, a capacity pool and {} volumes"
+        .format(VOLUME_COUNT))
+
+    credentials, subscription_id = sample_utils.get_credentials()
+    anf_client = client_factory.default_factory().netapp_client(
+        credentials, subscription_id)
+    subnet_id = '/subscriptions/{}/resourceGroups/{}/providers/Microsoft.Network/virtualNetworks/{}/subnets/{}'\
+                .format(subscription_id,
+                        VNET_RESOURCE_GROUP_NAME,
+                        VNET_NAME,
+                        SUBNET_NAME)
+
+    graph = build_graph(anf_client, RESOURCE_GROUP_NAME, ANF_ACCOUNT_NAME,
+                        subnet_id, LOCATION)
+    try:
+        graph.run()
+    finally:
+        for node in graph.nodes.values():
+            if node.error is not None:
+                console_output('\t{} failed: {}'.format(node.name,
+                                                         node.error))
+            elif node.duration is not None:
+                console_output('\t{} completed in {:.1f}s'.format(
+                    node.name, node.duration))
+
+    critical_path = graph.critical_path()
+    console_output('Critical path ({:.1f}s): {}'.format(
+        critical_path[-1].finished - critical_path[0].started,
+        ' -> '.join(node.name for node in critical_path)))
+
+
+# This script expects that the following environment var are set:
+#
+# AZURE_AUTH_LOCATION: contains path for azureauth.json file
+
+if __name__ == "__main__":
+
+    run_example()
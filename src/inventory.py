@@ -0,0 +1,297 @@
+# inventory.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import resource_uri_utils
+import tracing
+from azure.core.exceptions import ResourceNotFoundError
+
+# Seconds a listing of each kind of resource is reused before being
+# revalidated, keyed by the kind of the listed resources
+TTL_IN_SEC = {
+    'account': 300,
+    'capacity_pool': 120,
+    'volume': 60,
+    'snapshot': 30,
+}
+MAX_CONCURRENCY = 8
+
+_CHILD_KIND = {
+    'resource_group': 'account',
+    'account': 'capacity_pool',
+    'capacity_pool': 'volume',
+    'volume': 'snapshot',
+}
+
+
+def get_etag(resource):
+    """Gets the version tag of a listed resource
+
+    Uses the resource etag when the API version provides one, otherwise a
+    digest of all its properties, read only ones included, which changes
+    whenever the service reports a change.
+
+    Args:
+        resource (Model): Resource returned by a list call
+
+    Returns:
+        string: Returns the tag
+    """
+
+    etag = getattr(resource, 'etag', None)
+    if etag:
+        return etag
+    return hashlib.sha1(json.dumps(
+        resource.serialize(keep_readonly=True), sort_keys=True,
+        default=str).encode('utf-8')).hexdigest()
+
+
+class InventoryNode(object):
+    """A resource of the inventory tree and its listed children
+
+    Attributes:
+        kind (string): resource_group, account, capacity_pool, volume or
+            snapshot
+        name (string): Resource name, the resource group name for the root
+        resource (Model): Resource as last listed, None for the root
+        etag (string): Version tag of the resource, see get_etag
+        children (OrderedDict): Lower case child name -> InventoryNode
+        listed_at (float): Clock time the children were last listed, None
+            if they have to be listed
+    """
+
+    __slots__ = ('kind', 'name', 'resource', 'etag', 'children', 'listed_at')
+
+    def __init__(self, kind, name, resource=None, etag=None):
+        self.kind = kind
+        self.name = name
+        self.resource = resource
+        self.etag = etag
+        self.children = OrderedDict()
+        self.listed_at = None
+
+    @property
+    def id(self):
+        """string: Resource id, None for the root"""
+        return self.resource.id if self.resource is not None else None
+
+    def child_resources(self):
+        """Returns the listed children as a list of resources"""
+        return [child.resource for child in self.children.values()]
+
+    def walk(self):
+        """Yields every node below this one, parents before their children"""
+        for child in self.children.values():
+            yield child
+            for descendant in child.walk():
+                yield descendant
+
+    def find(self, resource_id):
+        """Gets the node of a resource below this one
+
+        Args:
+            resource_id (string): Account, capacity pool, volume or snapshot
+                resource id
+
+        Returns:
+            InventoryNode: Returns the node or None if it is not in the tree
+        """
+
+        parsed = resource_uri_utils.parse_resource_id(resource_id)
+        node = self
+        for name in (parsed.account, parsed.capacity_pool, parsed.volume,
+                     parsed.snapshot):
+            if name is None:
+                break
+            node = node.children.get(name.lower())
+            if node is None:
+                return None
+        return node if node is not self else None
+
+
+class InventoryCache(object):
+    """Cached tree of the ANF resources of resource groups
+
+    The first get() crawls the whole hierarchy. Every parent is listed on a
+    thread pool as soon as it is known, so the pools of all accounts, the
+    volumes of all pools and the snapshots of all volumes are listed
+    concurrently instead of one list call after another.
+
+    Listings are kept for the TTL of the listed kind, later calls within
+    that window make no network call. Once a listing expires it is
+    revalidated: the parent is listed again and every child whose etag did
+    not change keeps its own cached children, while new or changed children
+    have their children listed right away.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        ttl (dict): Optional. Seconds per listed kind, merged over TTL_IN_SEC
+        max_concurrency (int): Maximum number of list calls in flight
+        clock (function): Optional. Clock used for the TTLs, defaults to
+            time.monotonic
+
+    Attributes:
+        list_calls (int): Number of list calls made
+        cache_hits (int): Number of listings served from the cache
+    """
+
+    def __init__(self, client, ttl=None, max_concurrency=MAX_CONCURRENCY,
+                 clock=time.monotonic):
+        self.client = client
+        self.ttl = dict(TTL_IN_SEC)
+        self.ttl.update(ttl or {})
+        self.max_concurrency = max_concurrency
+        self.clock = clock
+        self.list_calls = 0
+        self.cache_hits = 0
+        self._roots = {}
+        self._crawl_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, resource_group_name, refresh=False):
+        """Gets the inventory tree of a resource group
+
+        Args:
+            resource_group_name (string): Name of the resource group
+            refresh (boolean): True to list every level again
+
+        Returns:
+            InventoryNode: Returns the resource_group root node
+        """
+
+        key = resource_group_name.lower()
+        with self._lock:
+            root = self._roots.get(key)
+            if root is None:
+                root = InventoryNode('resource_group', resource_group_name)
+                self._roots[key] = root
+            crawl_lock = self._crawl_locks.setdefault(key, threading.Lock())
+
+        # Only crawls of the same resource group wait for each other
+        with crawl_lock:
+            with tracing.span('inventory', resource_group=resource_group_name):
+                self._crawl(root, refresh)
+        return root
+
+    def invalidate(self, resource_id=None):
+        """Forces the next get() to list a resource and its children again
+
+        Args:
+            resource_id (string): Optional. Account, capacity pool, volume or
+                snapshot resource id, everything is dropped if None
+        """
+
+        if resource_id is None:
+            with self._lock:
+                self._roots.clear()
+            return
+
+        parsed = resource_uri_utils.parse_resource_id(resource_id)
+        key = (parsed.resource_group or '').lower()
+        with self._lock:
+            root = self._roots.get(key)
+            crawl_lock = self._crawl_locks.get(key)
+        if root is None:
+            return
+
+        # A crawl in progress would mark the nodes listed again
+        with crawl_lock:
+            parent = root if parsed.kind == 'account' \
+                else root.find(resource_id.rsplit('/', 2)[0])
+            for node in (root.find(resource_id), parent):
+                if node is not None:
+                    node.listed_at = None
+
+    def _is_fresh(self, node, now):
+        return node.listed_at is not None and \
+            now - node.listed_at < self.ttl[_CHILD_KIND[node.kind]]
+
+    def _list_children(self, resource_group_name, node):
+        kind = _CHILD_KIND[node.kind]
+        if kind == 'account':
+            pages = self.client.accounts.list(resource_group_name)
+        else:
+            parsed = resource_uri_utils.parse_resource_id(node.id)
+            if kind == 'capacity_pool':
+                pages = self.client.pools.list(resource_group_name,
+                                               parsed.account)
+            elif kind == 'volume':
+                pages = self.client.volumes.list(
+                    resource_group_name, parsed.account, parsed.capacity_pool)
+            else:
+                pages = self.client.snapshots.list(
+                    resource_group_name, parsed.account, parsed.capacity_pool,
+                    parsed.volume)
+
+        try:
+            return list(pages)
+        except ResourceNotFoundError:
+            # Parent deleted since it was listed
+            return []
+
+    def _merge(self, node, resources, now):
+        kind = _CHILD_KIND[node.kind]
+        children = OrderedDict()
+        for resource in resources:
+            name = resource.name.rsplit('/', 1)[-1]
+            etag = get_etag(resource)
+            child = node.children.get(name.lower())
+            if child is None or child.etag != etag:
+                child = InventoryNode(kind, name, resource, etag)
+            else:
+                child.resource = resource
+            children[name.lower()] = child
+        node.children = children
+        node.listed_at = now
+
+    def _crawl(self, root, refresh):
+        now = self.clock()
+        running = {}
+        first_error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+
+            def visit(node):
+                if node.kind not in _CHILD_KIND:
+                    return
+                if not refresh and self._is_fresh(node, now):
+                    with self._lock:
+                        self.cache_hits += 1
+                    for child in node.children.values():
+                        visit(child)
+                    return
+                with self._lock:
+                    self.list_calls += 1
+                running[executor.submit(contextvars.copy_context().run,
+                                        self._list_children, root.name,
+                                        node)] = node
+
+            visit(root)
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        resources = future.result()
+                    except Exception as ex:
+                        if first_error is None:
+                            first_error = ex
+                        continue
+                    self._merge(node, resources, now)
+                    if first_error is None:
+                        for child in node.children.values():
+                            visit(child)
+
+        if first_error is not None:
+            raise first_error
@@ -0,0 +1,142 @@
+# journal.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+import sample_utils
+import tracing
+from azure.core.exceptions import ResourceNotFoundError
+
+# Environment variable holding the run id, e.g. set to the CI build id
+RUN_ID_VARIABLE = 'ANF_SAMPLE_RUN_ID'
+JOURNAL_DIR = '.anf_journal'
+
+
+def get_run_id():
+    """Gets the id of the current provisioning run
+
+    Returns:
+        string: Returns the ANF_SAMPLE_RUN_ID environment variable, or a new
+            random id if it is not set
+    """
+    return os.environ.get(RUN_ID_VARIABLE) or uuid.uuid4().hex[:12]
+
+
+def is_resumable():
+    """Tells whether the run id was supplied, so the run can be resumed
+
+    Returns:
+        boolean: Returns True if ANF_SAMPLE_RUN_ID is set. A random run id
+            cannot be given again, its journal would never be read back
+    """
+    return bool(os.environ.get(RUN_ID_VARIABLE))
+
+
+class RunJournal(object):
+    """Record of the completed steps of a provisioning run
+
+    Every completed step is appended, with the id of the resource it
+    produced, to a JSON lines file named after the run id. When a run is
+    started again with the same id, run_step skips the steps found in the
+    journal once a get call confirms that their resource still exists and
+    succeeded, so a failed run resumes at the step that failed instead of
+    repeating every long running operation.
+
+    Args:
+        run_id (string): Stable id of the run, see get_run_id
+        journal_dir (string): Folder holding the journal files, None keeps
+            the journal in memory only, e.g. for a run that cannot be
+            resumed, see is_resumable
+    """
+
+    def __init__(self, run_id, journal_dir=JOURNAL_DIR):
+        self.run_id = run_id
+        self.path = None
+        self.steps = {}
+        self.skipped = set()
+        self._lock = threading.Lock()
+
+        if journal_dir is None:
+            return
+        self.path = os.path.join(journal_dir, '{}.jsonl'.format(run_id))
+        os.makedirs(journal_dir, exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path) as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Partially written line of an interrupted run
+                        continue
+                    self.steps[entry['step']] = entry['resource_id']
+
+    def record(self, step, resource_id):
+        """Appends a completed step to the journal
+
+        Args:
+            step (string): Step name, unique within the run
+            resource_id (string): Id of the resource created or updated by
+                the step
+        """
+
+        line = json.dumps({
+            'run_id': self.run_id,
+            'step': step,
+            'resource_id': resource_id,
+            'completed': datetime.now().isoformat(),
+        })
+        with self._lock:
+            if self.path is not None:
+                with open(self.path, 'a') as journal_file:
+                    journal_file.write(line + '\n')
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+            self.steps[step] = resource_id
+
+    def run_step(self, step, client, action):
+        """Runs a step unless a previous attempt of the run completed it
+
+        Args:
+            step (string): Step name, unique within the run
+            client (NetAppManagementClient): Azure Resource Provider
+                Client designed to interact with ANF resources, used to check
+                that the resource of a journaled step still exists
+            action (function): Performs the step, returns the ANF resource
+
+        Returns:
+            object: Returns the resource returned by action, or retrieved
+                from the service if the step was skipped
+        """
+
+        resource_id = self.steps.get(step)
+        if resource_id is not None:
+            with tracing.span('journal_check', step=step):
+                try:
+                    resource = sample_utils.get_anf_resource(client,
+                                                             resource_id)
+                except ResourceNotFoundError:
+                    resource = None
+            if resource is not None and getattr(
+                    resource, 'provisioning_state',
+                    'Succeeded') == 'Succeeded':
+                self.skipped.add(step)
+                return resource
+
+        resource = action()
+        self.record(step, resource.id)
+        return resource
+
+    def clear(self):
+        """Deletes the journal, e.g. once the run resources are cleaned up"""
+        with self._lock:
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
+            self.steps.clear()
+            self.skipped.clear()
@@ -0,0 +1,220 @@
+# listing.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import contextvars
+import functools
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import resource_uri_utils
+
+# Number of sibling listings started ahead of the one being consumed
+PREFETCH = 4
+# Maximum number of resources buffered per running listing, one ARM page
+BUFFER_SIZE = 100
+
+_LEVELS = ('account', 'capacity_pool', 'volume', 'snapshot')
+_DONE = object()
+
+
+def iter_accounts(client, resource_group_name):
+    """Yields the accounts of a resource group as pages arrive"""
+    return iter(client.accounts.list(resource_group_name))
+
+
+def iter_capacity_pools(client, account_id):
+    """Yields the capacity pools of an account as pages arrive"""
+    parsed = resource_uri_utils.parse_resource_id(account_id)
+    return iter(client.pools.list(parsed.resource_group, parsed.account))
+
+
+def iter_volumes(client, capacity_pool_id):
+    """Yields the volumes of a capacity pool as pages arrive"""
+    parsed = resource_uri_utils.parse_resource_id(capacity_pool_id)
+    return iter(client.volumes.list(parsed.resource_group, parsed.account,
+                                    parsed.capacity_pool))
+
+
+def iter_snapshots(client, volume_id):
+    """Yields the snapshots of a volume as pages arrive"""
+    parsed = resource_uri_utils.parse_resource_id(volume_id)
+    return iter(client.snapshots.list(parsed.resource_group, parsed.account,
+                                      parsed.capacity_pool, parsed.volume))
+
+
+def iter_resource_groups(resource_client):
+    """Yields the names of the resource groups holding ANF accounts
+
+    Streams the generic resource list of the subscription filtered on the
+    account resource type, every resource group is yielded once.
+
+    Args:
+        resource_client (ResourceManagementClient): Client of the
+            subscription to be searched
+
+    Returns:
+        generator: Yields resource group names
+    """
+
+    seen = set()
+    for resource in resource_client.resources.list(
+            filter="resourceType eq 'Microsoft.NetApp/netAppAccounts'"):
+        resource_group_name = resource_uri_utils.parse_resource_id(
+            resource.id).resource_group
+        if resource_group_name.lower() not in seen:
+            seen.add(resource_group_name.lower())
+            yield resource_group_name
+
+
+class _Failure(object):
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class _Stream(object):
+    """Listing running on a worker ahead of its consumer
+
+    Resources are handed over through a bounded queue, the worker blocks once
+    buffer_size resources wait to be consumed.
+    """
+
+    def __init__(self, executor, items, buffer_size):
+        self._queue = queue.Queue(buffer_size)
+        self._cancelled = False
+        executor.submit(contextvars.copy_context().run, self._produce, items)
+
+    def _put(self, item):
+        while not self._cancelled:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self, items):
+        try:
+            for item in items():
+                if not self._put(item):
+                    return
+        except Exception as ex:
+            self._put(_Failure(ex))
+            return
+        self._put(_DONE)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    def cancel(self):
+        self._cancelled = True
+
+
+def _expand(executor, parents, list_children, depth, prefetch, buffer_size):
+    # Yields every parent followed by its descendants, the children of the
+    # next prefetch parents are already being listed meanwhile. Parents and
+    # children are (client, resource) tuples, the client being the one of
+    # the subscription the resource belongs to
+    window = deque()
+    parents = iter(parents)
+
+    def fill():
+        while len(window) < prefetch:
+            parent = next(parents, _DONE)
+            if parent is _DONE:
+                return
+            stream = None
+            if depth < len(list_children):
+                stream = _Stream(executor, functools.partial(
+                    list_children[depth], *parent), buffer_size)
+            window.append((parent, stream))
+
+    try:
+        fill()
+        while window:
+            parent, stream = window.popleft()
+            fill()
+            if depth > 0:
+                yield parent[1]
+            if stream is not None:
+                try:
+                    for item in _expand(executor, stream, list_children,
+                                        depth + 1, prefetch, buffer_size):
+                        yield item
+                finally:
+                    stream.cancel()
+    finally:
+        for _, stream in window:
+            if stream is not None:
+                stream.cancel()
+
+
+def _children(iterate):
+    def list_children(client, parent):
+        for child in iterate(client, parent.id):
+            yield client, child
+    return list_children
+
+
+def _accounts(anf_account_names):
+    def list_accounts(client, resource_group_name):
+        for account in iter_accounts(client, resource_group_name):
+            if anf_account_names is None or account.name in anf_account_names:
+                yield client, account
+    return list_accounts
+
+
+def walk_anf_resources(scopes, deepest='snapshot', anf_account_names=None,
+                       prefetch=PREFETCH, buffer_size=BUFFER_SIZE):
+    """Yields every ANF resource of many resource groups and subscriptions
+
+    Resources are yielded parents first, e.g. an account, its first pool,
+    the volumes of that pool with their snapshots, the next pool and so on,
+    as soon as their page arrives. Child listings are pipelined: while a
+    parent's children are consumed, the children of the next prefetch
+    siblings are already being listed on worker threads. Every running
+    listing buffers at most buffer_size resources and at most prefetch + 1
+    listings run per level, so memory use does not depend on the number of
+    resources walked.
+
+    Args:
+        scopes (iterable): (NetAppManagementClient, resource group name)
+            tuples, clients of different subscriptions can be mixed, see
+            iter_resource_groups to discover the resource groups
+        deepest (string): Deepest kind of resource walked, account,
+            capacity_pool, volume or snapshot
+        anf_account_names (list): Optional. Restricts the walk to these
+            accounts
+        prefetch (int): Sibling listings started ahead, per level
+        buffer_size (int): Resources buffered per running listing
+
+    Returns:
+        generator: Yields account, capacity pool, volume and snapshot
+            resources. Closing the generator stops the running listings
+    """
+
+    list_children = [_accounts(anf_account_names)] + [
+        _children(iterate) for iterate in (
+            iter_capacity_pools, iter_volumes, iter_snapshots)
+    ][:_LEVELS.index(deepest)]
+
+    with ThreadPoolExecutor(
+            max_workers=(prefetch + 1) * len(list_children)) as executor:
+        walker = _expand(executor, scopes, list_children, 0, prefetch,
+                         buffer_size)
+        try:
+            for resource in walker:
+                yield resource
+        finally:
+            walker.close()
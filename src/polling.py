@@ -0,0 +1,192 @@
+# polling.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+PollResult = namedtuple('PollResult', ['succeeded', 'attempts', 'elapsed'])
+PollResult.__doc__ = """Outcome of poll_until
+
+Attributes:
+    succeeded (boolean): True if the probe reported completion
+    attempts (int): Number of times the probe was called
+    elapsed (float): Seconds spent, measured with the poll clock
+"""
+
+
+class Backoff(object):
+    """Exponential backoff schedule with jitter
+
+    Produces the delay before each retry: initial_in_sec multiplied by factor
+    after every attempt and capped at maximum_in_sec. A random fraction, up to
+    jitter, is taken off every delay so concurrent waiters do not poll in
+    lockstep.
+
+    Args:
+        initial_in_sec (float): Delay after the first probe
+        maximum_in_sec (float): Upper bound of any delay
+        factor (float): Growth factor applied after every attempt
+        jitter (float): Maximum fraction removed from a delay, 0 disables it
+        rand (function): Optional. Returns a float in [0, 1), used for
+            jitter, defaults to random.random
+    """
+
+    def __init__(self, initial_in_sec=1, maximum_in_sec=10, factor=2,
+                 jitter=0.2, rand=random.random):
+        self.initial_in_sec = initial_in_sec
+        self.maximum_in_sec = maximum_in_sec
+        self.factor = factor
+        self.jitter = jitter
+        self.rand = rand
+
+    def delay(self, attempt):
+        """Returns the delay in seconds to wait after a given attempt
+
+        Args:
+            attempt (int): Number of probes performed so far, starting at 1
+
+        Returns:
+            float: Returns the delay in seconds
+        """
+        delay = min(self.maximum_in_sec,
+                    self.initial_in_sec * self.factor ** (attempt - 1))
+        return delay * (1 - self.jitter * self.rand())
+
+
+def get_retry_after(response):
+    """Gets the server requested delay from an HTTP response
+
+    Reads the retry-after-ms, x-ms-retry-after-ms and Retry-After headers, the
+    latter either in seconds or as an HTTP date.
+
+    Args:
+        response (HttpResponse): Azure core response, None is accepted
+
+    Returns:
+        float: Returns the delay in seconds or None if not present
+    """
+
+    if response is None or response.headers is None:
+        return None
+
+    headers = response.headers
+    for header in ('retry-after-ms', 'x-ms-retry-after-ms'):
+        value = headers.get(header)
+        if value:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def poll_until(probe, backoff=None, timeout_in_sec=600, max_attempts=None,
+               clock=time.monotonic, sleep=time.sleep):
+    """Calls a probe until it reports completion
+
+    The probe is called immediately, then again after every delay given by
+    backoff. A Retry-After value returned by the probe takes precedence over
+    a shorter computed delay. Polling stops when the probe succeeds, when
+    max_attempts is reached or when the next delay would go past the overall
+    deadline, in which case one last probe is made at the deadline.
+
+    Args:
+        probe (function): Callable without arguments returning a
+            (done, retry_after_in_sec) tuple, retry_after_in_sec may be None
+        backoff (Backoff): Optional. Delay schedule, defaults to Backoff()
+        timeout_in_sec (float): Overall deadline measured from the first probe
+        max_attempts (int): Optional. Maximum number of probes
+        clock (function): Optional. Monotonic clock, defaults to
+            time.monotonic
+        sleep (function): Optional. Sleep function, defaults to time.sleep
+
+    Returns:
+        PollResult: Returns the polling outcome
+    """
+
+    backoff = backoff or Backoff()
+    start = clock()
+    deadline = start + timeout_in_sec
+    attempts = 0
+
+    while True:
+        attempts += 1
+        done, retry_after = probe()
+        if done:
+            return PollResult(True, attempts, clock() - start)
+
+        remaining = deadline - clock()
+        if remaining <= 0 or (max_attempts and attempts >= max_attempts):
+            return PollResult(False, attempts, clock() - start)
+
+        delay = backoff.delay(attempts)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        sleep(min(delay, remaining))
+
+
+async def poll_until_async(probe, backoff=None, timeout_in_sec=600,
+                           max_attempts=None, clock=time.monotonic,
+                           sleep=None):
+    """Asyncio version of poll_until
+
+    Args:
+        probe (function): Coroutine function without arguments returning a
+            (done, retry_after_in_sec) tuple, retry_after_in_sec may be None
+        backoff (Backoff): Optional. Delay schedule, defaults to Backoff()
+        timeout_in_sec (float): Overall deadline measured from the first probe
+        max_attempts (int): Optional. Maximum number of probes
+        clock (function): Optional. Monotonic clock, defaults to
+            time.monotonic
+        sleep (function): Optional. Coroutine function sleeping, defaults to
+            asyncio.sleep
+
+    Returns:
+        PollResult: Returns the polling outcome
+    """
+
+    if sleep is None:
+        # Imported here, the synchronous waiters do not need asyncio
+        import asyncio
+        sleep = asyncio.sleep
+
+    backoff = backoff or Backoff()
+    start = clock()
+    deadline = start + timeout_in_sec
+    attempts = 0
+
+    while True:
+        attempts += 1
+        done, retry_after = await probe()
+        if done:
+            return PollResult(True, attempts, clock() - start)
+
+        remaining = deadline - clock()
+        if remaining <= 0 or (max_attempts and attempts >= max_attempts):
+            return PollResult(False, attempts, clock() - start)
+
+        delay = backoff.delay(attempts)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        await sleep(min(delay, remaining))
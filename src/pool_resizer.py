@@ -0,0 +1,228 @@
+# pool_resizer.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import threading
+import time
+import coalescer
+import preflight
+import resource_uri_utils
+import sample_utils
+import tracing
+from azure.mgmt.netapp.models import CapacityPoolPatch
+
+# Seconds resize intents of the same pool are collected before the pool is
+# updated once
+WINDOW_IN_SEC = 2.0
+
+
+def required_pool_size(volume_quotas):
+    """Computes the smallest valid size of a pool holding some volumes
+
+    Args:
+        volume_quotas (iterable): Volume quotas (usage thresholds) in bytes
+
+    Returns:
+        int: Returns the size in bytes, a whole number of TiB and at least
+            preflight.MIN_POOL_SIZE_TIB
+    """
+
+    tib = sample_utils.get_tib_in_bytes(1)
+    size_tib = -(-sum(volume_quotas) // tib)
+    return sample_utils.get_tib_in_bytes(
+        max(size_tib, preflight.MIN_POOL_SIZE_TIB))
+
+
+class _ResizeIntent(object):
+    __slots__ = ('shrink',)
+
+    def __init__(self, shrink):
+        self.shrink = shrink
+
+
+def _merge(pending, intent):
+    return _ResizeIntent(pending.shrink or intent.shrink)
+
+
+def _key(*names):
+    # Resource names are case insensitive, every reservation, release and
+    # teardown lookup goes through the same lowercased key
+    return tuple(name.lower() for name in names)
+
+
+class PoolResizer(object):
+    """Keeps capacity pools just large enough for their volumes
+
+    Volumes about to be created are reserved in their pool first, and
+    unreserved once created. The reservations and releases of a pool made
+    within window_in_sec are coalesced into a single pools.begin_update,
+    sized with required_pool_size for the quotas of the volumes listed in
+    the pool plus those reserved and not yet listed. Pools are only shrunk on release,
+    e.g. after volumes are deleted, and only grown on reserve.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        window_in_sec (float): Seconds intents are collected per pool
+        clock (function): Optional. Defaults to time.monotonic
+    """
+
+    def __init__(self, client, window_in_sec=WINDOW_IN_SEC,
+                 clock=time.monotonic):
+        self.client = client
+        self.update_count = 0
+        self._reservations = {}
+        self._names = {}
+        self._lock = threading.Lock()
+        self._coalescer = coalescer.Coalescer(
+            _merge, self._resize, window_in_sec=window_in_sec, clock=clock)
+
+    def reserve(self, resource_group_name, anf_account_name, pool_name,
+                volume_name, usage_threshold):
+        """Reserves room for a volume about to be created
+
+        Args:
+            resource_group_name (string): Name of the resource group
+            anf_account_name (string): Azure NetApp Files Account name
+            pool_name (string): Capacity pool name
+            volume_name (string): Name of the volume to be created
+            usage_threshold (int): Quota of the volume in bytes
+
+        Returns:
+            Future: Returns a future resolved with the CapacityPool once it
+                is large enough for the volume
+        """
+
+        key = self._pool_key(resource_group_name, anf_account_name,
+                             pool_name)
+        with self._lock:
+            self._reservations.setdefault(key, {})[volume_name.lower()] = \
+                usage_threshold
+        return self._coalescer.submit(key, _ResizeIntent(False))
+
+    def unreserve(self, resource_group_name, anf_account_name, pool_name,
+                  volume_name):
+        """Drops the reservation of a volume, once created or if it failed
+
+        Created volumes are counted from the pool listing, a reservation
+        left behind would keep the pool from shrinking once they are gone.
+        """
+        key = self._pool_key(resource_group_name, anf_account_name,
+                             pool_name)
+        with self._lock:
+            self._reservations.get(key, {}).pop(volume_name.lower(), None)
+
+    def release(self, resource_group_name, anf_account_name, pool_name):
+        """Shrinks a pool to what its volumes need, e.g. after deletions
+
+        Returns:
+            Future: Returns a future resolved with the CapacityPool
+        """
+
+        return self._coalescer.submit(
+            self._pool_key(resource_group_name, anf_account_name, pool_name),
+            _ResizeIntent(True))
+
+    def on_deleted(self, resource_id):
+        """Teardown on_deleted hook releasing the pool of deleted volumes"""
+        parsed = resource_uri_utils.parse_resource_id(resource_id)
+        if parsed.kind == 'volume':
+            self.release(parsed.resource_group, parsed.account,
+                         parsed.capacity_pool)
+
+    def teardown_hook(self, resource_ids, on_deleted=None):
+        """Builds the on_deleted hook of a teardown shrinking pools as it goes
+
+        Pools are released as soon as one of their volumes is deleted. Pools
+        deleted by the same teardown, or whose account is, are left alone,
+        their update would conflict with their deletion.
+
+        Args:
+            resource_ids (list): Resource ids given to teardown
+            on_deleted (function): Optional. Called first with the resource
+                id of every deleted resource
+
+        Returns:
+            function: Returns the hook, called with a resource id
+        """
+
+        deleted = set()
+        for parsed in resource_uri_utils.classify_resource_ids(
+                list(resource_ids)):
+            if parsed.kind == 'capacity_pool':
+                deleted.add(_key(parsed.resource_group, parsed.account,
+                                 parsed.capacity_pool))
+            elif parsed.kind == 'account':
+                deleted.add(_key(parsed.resource_group, parsed.account))
+
+        def hook(resource_id):
+            if on_deleted is not None:
+                on_deleted(resource_id)
+            parsed = resource_uri_utils.parse_resource_id(resource_id)
+            if parsed.kind != 'volume':
+                return
+            pool_key = _key(parsed.resource_group, parsed.account,
+                            parsed.capacity_pool)
+            if pool_key not in deleted and pool_key[:2] not in deleted:
+                self.release(parsed.resource_group, parsed.account,
+                             parsed.capacity_pool)
+
+        return hook
+
+    def flush(self):
+        """Applies the pending resizes and waits for them"""
+        self._coalescer.flush()
+
+    def close(self):
+        """Applies the pending resizes and stops the worker threads"""
+        self._coalescer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _pool_key(self, resource_group_name, anf_account_name, pool_name):
+        key = _key(resource_group_name, anf_account_name, pool_name)
+        with self._lock:
+            # Requests use the names as first given
+            self._names.setdefault(
+                key, (resource_group_name, anf_account_name, pool_name))
+        return key
+
+    def _resize(self, key, intent):
+        with self._lock:
+            resource_group_name, anf_account_name, pool_name = \
+                self._names[key]
+        with tracing.span('resize_pool', pool=pool_name,
+                          shrink=intent.shrink) as resize_span:
+            pool = self.client.pools.get(resource_group_name,
+                                         anf_account_name, pool_name)
+            quotas = dict(
+                (volume.name.rsplit('/', 1)[-1].lower(),
+                 volume.usage_threshold)
+                for volume in self.client.volumes.list(
+                    resource_group_name, anf_account_name, pool_name))
+
+            with self._lock:
+                reservations = self._reservations.get(key, {})
+                for volume_name in [name for name in reservations
+                                    if name in quotas]:
+                    del reservations[volume_name]
+                quotas.update(reservations)
+
+            size = required_pool_size(quotas.values())
+            resize_span.set('size', size)
+            if size == pool.size or (size < pool.size and not intent.shrink):
+                return pool
+
+            pool = self.client.pools.begin_update(
+                resource_group_name, anf_account_name, pool_name,
+                CapacityPoolPatch(location=pool.location, size=size)).result()
+            with self._lock:
+                self.update_count += 1
+            return pool
@@ -0,0 +1,335 @@
+# preflight.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from collections import OrderedDict
+import resource_uri_utils
+
+# Azure NetApp Files limits, see
+# https://docs.microsoft.com/en-us/azure/azure-netapp-files/azure-netapp-files-resource-limits
+SERVICE_LEVELS = ('Standard', 'Premium', 'Ultra')
+MIN_POOL_SIZE_TIB = 4
+MAX_POOL_SIZE_TIB = 500
+MIN_VOLUME_SIZE_GIB = 100
+MAX_VOLUME_SIZE_GIB = 100 * 1024
+MAX_EXPORT_RULES = 5
+
+_GIB = 1024 ** 3
+_TIB = 1024 ** 4
+
+_REQUIRED_FIELDS = {
+    'account': ('resource_group', 'name', 'location'),
+    'capacity_pool': ('resource_group', 'account', 'name', 'size_tib',
+                      'service_level'),
+    'volume': ('resource_group', 'account', 'pool', 'name', 'size_gib'),
+    'snapshot': ('resource_group', 'account', 'pool', 'volume', 'name'),
+}
+_SIZE_FIELDS = ('size_tib', 'size_gib')
+
+
+class Violation(object):
+    """A constraint a spec does not satisfy
+
+    Attributes:
+        kind (string): account, capacity_pool, volume or snapshot
+        path (string): Resource group and resource names, separated by /
+        message (string): Description of the violation
+    """
+
+    __slots__ = ('kind', 'path', 'message')
+
+    def __init__(self, kind, path, message):
+        self.kind = kind
+        self.path = path
+        self.message = message
+
+    def __str__(self):
+        return '{} {}: {}'.format(self.kind, self.path, self.message)
+
+    def __repr__(self):
+        return 'Violation({!r}, {!r}, {!r})'.format(self.kind, self.path,
+                                                    self.message)
+
+
+class PreflightError(ValueError):
+    """Raised by check when specs violate Azure NetApp Files constraints
+
+    Attributes:
+        violations (list): Every Violation found
+    """
+
+    def __init__(self, violations):
+        super(PreflightError, self).__init__('\n'.join(
+            str(violation) for violation in violations))
+        self.violations = violations
+
+
+def _get(spec, field):
+    if isinstance(spec, dict):
+        return spec.get(field)
+    return getattr(spec, field, None)
+
+
+def _key(*names):
+    return tuple(name.lower() for name in names)
+
+
+def _rule_field(rule, field):
+    value = _get(rule, field)
+    if value is None and field == 'rule_index':
+        value = _get(rule, 'ruleIndex')
+    elif value is None and field == 'allowed_clients':
+        value = _get(rule, 'allowedClients')
+    return value
+
+
+class _Batch(object):
+    """Specs and existing resources indexed by lower case names"""
+
+    def __init__(self, violations):
+        self.violations = violations
+        self.accounts = OrderedDict()
+        self.pools = OrderedDict()
+        self.volumes = OrderedDict()
+        self.snapshots = OrderedDict()
+        # Key -> (location, service level, size in bytes) of resources
+        # found in the existing listing
+        self.existing = {}
+
+    def add_existing(self, resource):
+        parsed = resource_uri_utils.parse_resource_id(resource.id)
+        if parsed.kind is None or parsed.resource_group is None:
+            return
+        names = [parsed.resource_group, parsed.account]
+        size = None
+        if parsed.kind in ('capacity_pool', 'volume', 'snapshot'):
+            names.append(parsed.capacity_pool)
+        if parsed.kind in ('volume', 'snapshot'):
+            names.append(parsed.volume)
+        if parsed.kind == 'snapshot':
+            names.append(parsed.snapshot)
+        if parsed.kind == 'capacity_pool':
+            size = getattr(resource, 'size', None)
+        elif parsed.kind == 'volume':
+            size = getattr(resource, 'usage_threshold', None)
+        self.existing[_key(*names)] = (
+            getattr(resource, 'location', None),
+            getattr(resource, 'service_level', None), size)
+
+    def add(self, kind, specs, index):
+        required = _REQUIRED_FIELDS[kind]
+        parents = required[:required.index('name')]
+        for spec in specs:
+            values = [_get(spec, field) for field in parents + ('name',)]
+            path = '/'.join(str(value) for value in values
+                            if value is not None)
+            missing = [field for field in required
+                       if _get(spec, field) in (None, '')]
+            if missing:
+                self.violations.append(Violation(
+                    kind, path, 'missing {}'.format(', '.join(missing))))
+                continue
+            invalid = [field for field in _SIZE_FIELDS if field in required
+                       and not isinstance(_get(spec, field), (int, float))]
+            if invalid:
+                self.violations.append(Violation(
+                    kind, path, '{} is not a number'.format(invalid[0])))
+                continue
+            key = _key(*values)
+            if key in index:
+                self.violations.append(Violation(
+                    kind, path, 'declared more than once'))
+                continue
+            index[key] = spec
+
+    def location(self, key):
+        """Gets the location of an account, None if unknown"""
+        if key in self.accounts:
+            return _get(self.accounts[key], 'location')
+        return self.existing.get(key, (None,))[0]
+
+    def is_known(self, key):
+        return any(key in index for index in (
+            self.accounts, self.pools, self.volumes, self.existing))
+
+
+def _check_location(batch, kind, path, spec, account_key):
+    location = _get(spec, 'location')
+    account_location = batch.location(account_key)
+    if location and account_location and \
+            location.replace(' ', '').lower() != \
+            account_location.replace(' ', '').lower():
+        batch.violations.append(Violation(
+            kind, path, 'location {} differs from the account location '
+            '{}'.format(location, account_location)))
+
+
+def _check_parent(batch, kind, path, parent_kind, parent_key, strict):
+    if strict and not batch.is_known(parent_key):
+        batch.violations.append(Violation(
+            kind, path, '{} {} is neither declared nor existing'.format(
+                parent_kind, '/'.join(parent_key))))
+
+
+def _check_pool(batch, key, spec, strict):
+    path = '/'.join(key)
+    _check_parent(batch, 'capacity_pool', path, 'account', key[:2], strict)
+    _check_location(batch, 'capacity_pool', path, spec, key[:2])
+
+    service_level = _get(spec, 'service_level')
+    if service_level not in SERVICE_LEVELS:
+        batch.violations.append(Violation(
+            'capacity_pool', path, 'service level {} is not one of '
+            '{}'.format(service_level, ', '.join(SERVICE_LEVELS))))
+
+    size_tib = _get(spec, 'size_tib')
+    if size_tib != int(size_tib) or \
+            not MIN_POOL_SIZE_TIB <= size_tib <= MAX_POOL_SIZE_TIB:
+        batch.violations.append(Violation(
+            'capacity_pool', path, 'size {} TiB is not a whole number of '
+            'TiB between {} and {} TiB'.format(
+                size_tib, MIN_POOL_SIZE_TIB, MAX_POOL_SIZE_TIB)))
+
+
+def _check_export_rules(batch, path, rules):
+    if len(rules) > MAX_EXPORT_RULES:
+        batch.violations.append(Violation(
+            'volume', path, '{} export policy rules, at most {} are '
+            'supported'.format(len(rules), MAX_EXPORT_RULES)))
+
+    seen = set()
+    for rule in rules:
+        rule_index = _rule_field(rule, 'rule_index')
+        if rule_index in seen:
+            batch.violations.append(Violation(
+                'volume', path, 'export policy rule index {} is used more '
+                'than once'.format(rule_index)))
+        seen.add(rule_index)
+        if not _rule_field(rule, 'allowed_clients'):
+            batch.violations.append(Violation(
+                'volume', path, 'export policy rule {} has no allowed '
+                'clients'.format(rule_index)))
+
+
+def _check_volume(batch, key, spec, strict):
+    path = '/'.join(key)
+    pool_key = key[:3]
+    _check_parent(batch, 'volume', path, 'capacity_pool', pool_key, strict)
+    _check_location(batch, 'volume', path, spec, key[:2])
+
+    size_gib = _get(spec, 'size_gib')
+    if not MIN_VOLUME_SIZE_GIB <= size_gib <= MAX_VOLUME_SIZE_GIB:
+        batch.violations.append(Violation(
+            'volume', path, 'quota {} GiB is not between {} GiB and {} '
+            'TiB'.format(size_gib, MIN_VOLUME_SIZE_GIB,
+                         MAX_VOLUME_SIZE_GIB // 1024)))
+
+    service_level = _get(spec, 'service_level')
+    if pool_key in batch.pools:
+        pool_service_level = _get(batch.pools[pool_key], 'service_level')
+    else:
+        pool_service_level = batch.existing.get(pool_key, (None, None))[1]
+    if service_level and pool_service_level and \
+            service_level.lower() != pool_service_level.lower():
+        batch.violations.append(Violation(
+            'volume', path, 'service level {} does not match the {} service '
+            'level of its capacity pool'.format(service_level,
+                                                pool_service_level)))
+
+    _check_export_rules(batch, path, _get(spec, 'export_rules') or [])
+
+
+def _check_capacity(batch):
+    # Pool key -> volume key -> quota in bytes, batch volumes replace the
+    # existing volumes of the same name
+    quotas = OrderedDict()
+    for key, (_, _, size) in batch.existing.items():
+        if len(key) == 4 and size is not None:
+            quotas.setdefault(key[:3], OrderedDict())[key] = size
+    for key, spec in batch.volumes.items():
+        quotas.setdefault(key[:3], OrderedDict())[key] = \
+            _get(spec, 'size_gib') * _GIB
+
+    for pool_key, volume_quotas in quotas.items():
+        if pool_key in batch.pools:
+            pool_size = _get(batch.pools[pool_key], 'size_tib') * _TIB
+        else:
+            pool_size = batch.existing.get(pool_key, (None, None, None))[2]
+        total = sum(volume_quotas.values())
+        if pool_size is not None and total > pool_size:
+            batch.violations.append(Violation(
+                'capacity_pool', '/'.join(pool_key),
+                '{} volumes need {:g} GiB, the pool provides {:g} '
+                'GiB'.format(len(volume_quotas), total / _GIB,
+                             pool_size / _GIB)))
+
+
+def validate(accounts=(), pools=(), volumes=(), snapshots=(),
+             existing=None):
+    """Checks a batch of specs against Azure NetApp Files constraints
+
+    Runs locally, before anything is submitted, and reports every violation
+    at once: missing fields and duplicates, service levels, pool sizes
+    (4 to 500 TiB in 1 TiB steps), volume quotas (100 GiB to 100 TiB),
+    export policy rules (at most 5, unique indices), locations, parents and
+    whether the summed volume quotas of every capacity pool fit its size.
+
+    Specs are dicts or objects with the following fields, names and sizes
+    as in batch_provision.VolumeSpec:
+        accounts: resource_group, name, location
+        pools: resource_group, account, name, size_tib, service_level,
+            location (optional)
+        volumes: resource_group, account, pool, name, size_gib,
+            service_level (optional), location (optional), export_rules
+            (optional list of ExportPolicyRule or dicts)
+        snapshots: resource_group, account, pool, volume, name
+
+    Args:
+        accounts (list): Account specs
+        pools (list): Capacity pool specs
+        volumes (list): Volume specs, e.g. batch_provision.load_specs
+        snapshots (list): Snapshot specs
+        existing (iterable): Optional. Already deployed accounts, pools and
+            volumes, e.g. listing.walk_anf_resources. When given, parents
+            must be declared or existing, and existing volumes count
+            against the capacity of their pool
+
+    Returns:
+        list: Returns the Violation objects, empty if the batch is valid
+    """
+
+    violations = []
+    batch = _Batch(violations)
+    for resource in existing or ():
+        batch.add_existing(resource)
+    batch.add('account', accounts, batch.accounts)
+    batch.add('capacity_pool', pools, batch.pools)
+    batch.add('volume', volumes, batch.volumes)
+    batch.add('snapshot', snapshots, batch.snapshots)
+    strict = existing is not None
+
+    for key, spec in batch.pools.items():
+        _check_pool(batch, key, spec, strict)
+    for key, spec in batch.volumes.items():
+        _check_volume(batch, key, spec, strict)
+    for key in batch.snapshots:
+        _check_parent(batch, 'snapshot', '/'.join(key), 'volume', key[:4],
+                      strict)
+    _check_capacity(batch)
+
+    return violations
+
+
+def check(accounts=(), pools=(), volumes=(), snapshots=(), existing=None):
+    """Raises PreflightError if validate finds any violation
+
+    Args:
+        See validate
+    """
+
+    violations = validate(accounts, pools, volumes, snapshots, existing)
+    if violations:
+        raise PreflightError(violations)
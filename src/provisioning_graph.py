@@ -0,0 +1,196 @@
+# provisioning_graph.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import contextvars
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class GraphNode(object):
+    """A provisioning step and the steps it depends on
+
+    Args:
+        name (string): Unique name of the step
+        action (function): Callable receiving a dict with the results of all
+            completed steps, keyed by step name, and returning this step
+            result, e.g. a lambda calling example.create_volume
+        depends_on (list): Names of the steps that must complete first
+        limited_by (list): Concurrency limit keys the step counts against,
+            see ProvisioningGraph.limit
+    """
+
+    __slots__ = ('name', 'action', 'depends_on', 'limited_by', 'result',
+                 'error', 'started', 'finished')
+
+    def __init__(self, name, action, depends_on=None, limited_by=None):
+        self.name = name
+        self.action = action
+        self.depends_on = list(depends_on or [])
+        self.limited_by = tuple(limited_by or ())
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        """float: Seconds the step took, None if it did not run"""
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+class ProvisioningGraph(object):
+    """Dependency graph executor for provisioning steps
+
+    Steps are declared with their dependencies and executed on a thread pool,
+    every step whose dependencies are satisfied is started right away, up to
+    max_concurrency steps at a time. End to end time is therefore bound by
+    the longest dependency chain instead of the sum of all steps.
+
+    Args:
+        max_concurrency (int): Maximum number of steps running at once
+        clock (function): Optional. Clock used to time the steps, defaults to
+            time.monotonic
+    """
+
+    def __init__(self, max_concurrency=4, clock=time.monotonic):
+        self.max_concurrency = max_concurrency
+        self.clock = clock
+        self.nodes = OrderedDict()
+        self.limits = {}
+
+    def limit(self, key, max_concurrency):
+        """Bounds the number of running steps sharing a limit key
+
+        Steps over their limit are not started, so they do not hold a worker
+        while waiting and ready steps with other keys can run meanwhile.
+
+        Args:
+            key (string): Limit key, e.g. a capacity pool resource id
+            max_concurrency (int): Maximum number of steps limited by key
+                running at once
+        """
+
+        self.limits[key] = max_concurrency
+
+    def add(self, name, action, depends_on=None, limited_by=None):
+        """Declares a step
+
+        Args:
+            name (string): Unique name of the step
+            action (function): See GraphNode
+            depends_on (list): Names of previously declared steps this one
+                depends on
+            limited_by (list): Optional. Limit keys declared with limit()
+                the step counts against
+
+        Returns:
+            GraphNode: Returns the declared step
+        """
+
+        if name in self.nodes:
+            raise ValueError('Step {} already declared'.format(name))
+        for dependency in depends_on or []:
+            if dependency not in self.nodes:
+                raise ValueError('Step {} depends on undeclared step {}'
+                                 .format(name, dependency))
+        for key in limited_by or []:
+            if key not in self.limits:
+                raise ValueError('Step {} is limited by undeclared key {}'
+                                 .format(name, key))
+
+        node = GraphNode(name, action, depends_on, limited_by)
+        self.nodes[name] = node
+        return node
+
+    def run(self):
+        """Executes all steps
+
+        Steps are started as soon as their dependencies complete. When a step
+        fails, steps depending on it are not started, steps already running
+        are allowed to finish and the first error is raised.
+
+        Returns:
+            dict: Returns step name -> step result
+        """
+
+        results = {}
+        remaining = OrderedDict(self.nodes)
+        running = {}
+        running_per_key = dict((key, 0) for key in self.limits)
+        first_error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while remaining or running:
+                if first_error is None:
+                    for name, node in list(remaining.items()):
+                        if len(running) >= self.max_concurrency:
+                            break
+                        if any(running_per_key[key] >= self.limits[key]
+                               for key in node.limited_by):
+                            continue
+                        if all(dependency in results
+                               for dependency in node.depends_on):
+                            del remaining[name]
+                            for key in node.limited_by:
+                                running_per_key[key] += 1
+                            node.started = self.clock()
+                            # Steps run within a copy of the caller context,
+                            # e.g. to nest their tracing spans
+                            running[executor.submit(
+                                contextvars.copy_context().run,
+                                node.action, dict(results))] = node
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    node.finished = self.clock()
+                    for key in node.limited_by:
+                        running_per_key[key] -= 1
+                    try:
+                        node.result = future.result()
+                        results[node.name] = node.result
+                    except Exception as ex:
+                        node.error = ex
+                        if first_error is None:
+                            first_error = ex
+
+        if first_error is not None:
+            raise first_error
+        if remaining:
+            raise ValueError('Steps {} could not be scheduled'.format(
+                ', '.join(remaining)))
+
+        return results
+
+    def critical_path(self):
+        """Gets the chain of steps that determined the end to end time
+
+        Walks back from the step that finished last, through the dependency
+        that finished last at every level.
+
+        Returns:
+            list: Returns the GraphNode objects of the critical path, in
+                execution order
+        """
+
+        finished = [node for node in self.nodes.values()
+                    if node.finished is not None]
+        if not finished:
+            return []
+
+        path = [max(finished, key=lambda node: node.finished)]
+        while path[-1].depends_on:
+            path.append(max((self.nodes[name] for name in path[-1].depends_on),
+                            key=lambda node: node.finished or 0))
+
+        return list(reversed(path))
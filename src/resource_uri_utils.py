@@ -6,6 +6,115 @@
 # LICENSE file in the root directory of this source tree.
 
 
+import re
+from collections import OrderedDict
+from functools import lru_cache
+
+# Maximum number of distinct resource ids kept by parse_resource_id
+PARSE_CACHE_SIZE = 4096
+
+# Lower case ARM resource type segment -> ResourceId attribute/kind
+_ANF_SEGMENTS = {
+    'netappaccounts': 'account',
+    'capacitypools': 'capacity_pool',
+    'volumes': 'volume',
+    'snapshots': 'snapshot',
+}
+
+# Canonical ANF account/pool/volume/snapshot id, used by the batch helpers
+_ANF_ID_PATTERN = re.compile(
+    r'^/?subscriptions/([^/]+)/resourceGroups/([^/]+)'
+    r'/providers/(Microsoft\.NetApp)/netAppAccounts/([^/]+)'
+    r'(?:/capacityPools/([^/]+)(?:/volumes/([^/]+)'
+    r'(?:/snapshots/([^/]+))?)?)?/?$',
+    re.IGNORECASE)
+
+_ANF_KINDS = (None, 'account', 'capacity_pool', 'volume', 'snapshot')
+
+
+class ResourceId(object):
+    """Segments of a resource id/uri
+
+    Compact record holding every segment that the helpers of this module are
+    able to extract from a resource id/uri. Instances are cached and shared by
+    parse_resource_id, they must be treated as read only.
+
+    Attributes:
+        subscription (string): Subscription id (GUID)
+        resource_group (string): Resource group name
+        provider (string): Resource provider namespace, e.g. Microsoft.NetApp
+        account (string): ANF account name
+        capacity_pool (string): Capacity pool name
+        volume (string): Volume name
+        snapshot (string): Snapshot name
+        kind (string): ANF resource type referenced by the id, one of
+            "account", "capacity_pool", "volume", "snapshot" or None when
+            the id is not an ANF account/pool/volume/snapshot
+    """
+
+    __slots__ = ('subscription', 'resource_group', 'provider', 'account',
+                 'capacity_pool', 'volume', 'snapshot', 'kind')
+
+    def __init__(self, subscription=None, resource_group=None, provider=None,
+                 account=None, capacity_pool=None, volume=None,
+                 snapshot=None, kind=None):
+        self.subscription = subscription
+        self.resource_group = resource_group
+        self.provider = provider
+        self.account = account
+        self.capacity_pool = capacity_pool
+        self.volume = volume
+        self.snapshot = snapshot
+        self.kind = kind
+
+    def __repr__(self):
+        return 'ResourceId({})'.format(', '.join(
+            '{}={!r}'.format(name, getattr(self, name))
+            for name in self.__slots__))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_resource_id(resource_uri):
+    """Parses a resource id/uri
+
+    Function that tokenizes a resource id/uri once and returns all of its
+    segments. Segment names are matched case insensitively while values keep
+    their original casing. Results are kept in a bounded LRU cache since the
+    same ids are parsed over and over while polling.
+
+    Args:
+        resource_uri (string): resource id/uri
+
+    Returns:
+        ResourceId: Returns the parsed resource id segments
+    """
+
+    parsed = ResourceId()
+    segments = resource_uri.strip().strip('/').split('/')
+    last_type = None
+
+    for i in range(0, len(segments) - 1, 2):
+        segment_type = segments[i].lower()
+        value = segments[i + 1]
+
+        if segment_type == 'subscriptions':
+            parsed.subscription = value
+        elif segment_type == 'resourcegroups':
+            parsed.resource_group = value
+        elif segment_type == 'providers':
+            parsed.provider = value
+        elif segment_type in _ANF_SEGMENTS:
+            setattr(parsed, _ANF_SEGMENTS[segment_type], value)
+
+        last_type = segment_type
+
+    if parsed.provider is not None \
+            and parsed.provider.lower() == 'microsoft.netapp':
+        parsed.kind = _ANF_SEGMENTS.get(last_type)
+
+    return parsed
+
+
 def get_resource_value(resource_uri, resource_name):
     """Gets the resource name based on resource type
 
@@ -83,7 +192,7 @@ def get_resource_group(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/resourceGroups')
+    return parse_resource_id(resource_uri).resource_group
 
 
 def get_subscription(resource_uri):
@@ -101,7 +210,7 @@ def get_subscription(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/subscriptions')
+    return parse_resource_id(resource_uri).subscription
 
 
 def get_anf_account(resource_uri):
@@ -119,7 +228,7 @@ def get_anf_account(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/netAppAccounts')
+    return parse_resource_id(resource_uri).account
 
 
 def get_anf_capacity_pool(resource_uri):
@@ -137,7 +246,7 @@ def get_anf_capacity_pool(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/capacityPools')
+    return parse_resource_id(resource_uri).capacity_pool
 
 
 def get_anf_volume(resource_uri):
@@ -155,7 +264,7 @@ def get_anf_volume(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/volumes')
+    return parse_resource_id(resource_uri).volume
 
 
 def get_anf_snapshot(resource_uri):
@@ -173,7 +282,7 @@ def get_anf_snapshot(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/snapshots')
+    return parse_resource_id(resource_uri).snapshot
 
 
 def is_anf_resource(resource_uri):
@@ -208,10 +317,10 @@ def is_anf_snapshot(resource_uri):
         boolean: Returns true if resource is a snapshot
     """
 
-    if (not resource_uri.strip()) or (not is_anf_resource(resource_uri)):
+    if not resource_uri.strip():
         return False
 
-    return resource_uri.rfind('/snapshots/') > -1
+    return parse_resource_id(resource_uri).kind == 'snapshot'
 
 
 def is_anf_volume(resource_uri):
@@ -226,16 +335,11 @@ def is_anf_volume(resource_uri):
     Returns:
         boolean: Returns true if resource is a volume
     """
-    
-    if (not resource_uri.strip()) or (not is_anf_resource(resource_uri)):
-        return False
 
-    # return (resource_uri.rfind('/snapshots/') == -1) \
-    #     and (resource_uri.rfind('/volumes/') > -1)
+    if not resource_uri.strip():
+        return False
 
-        
-    return (not is_anf_snapshot(resource_uri)) \
-        and (resource_uri.rfind('/volumes/') > -1)
+    return parse_resource_id(resource_uri).kind == 'volume'
 
 
 def is_anf_capacity_pool(resource_uri):
@@ -251,12 +355,10 @@ def is_anf_capacity_pool(resource_uri):
         boolean: Returns true if resource is a capacity pool
     """
 
-    if (not resource_uri.strip()) or (not is_anf_resource(resource_uri)):
+    if not resource_uri.strip():
         return False
 
-    return (not is_anf_snapshot(resource_uri)) \
-        and (not is_anf_volume(resource_uri)) \
-        and (resource_uri.rfind('/capacityPools/') > -1)
+    return parse_resource_id(resource_uri).kind == 'capacity_pool'
 
 
 def is_anf_account(resource_uri):
@@ -272,11 +374,86 @@ def is_anf_account(resource_uri):
         boolean: Returns true if resource is an account
     """
 
-    if (not resource_uri.strip()) or (not is_anf_resource(resource_uri)):
+    if not resource_uri.strip():
         return False
 
-    return (not is_anf_snapshot(resource_uri)) \
-        and (not is_anf_volume(resource_uri)) \
-        and (not is_anf_capacity_pool(resource_uri)) \
-        and (resource_uri.rfind('/backupPolicies/') == -1) \
-        and (resource_uri.rfind('/netAppAccounts/') > -1)
+    return parse_resource_id(resource_uri).kind == 'account'
+
+
+def classify_resource_ids(resource_uris):
+    """Parses and classifies a batch of resource ids/uris
+
+    Function that parses many resource ids/uris in a single pass, e.g. the ids
+    returned by volumes.list or snapshots.list. Canonical ANF ids are matched
+    by one precompiled expression, anything else falls back to
+    parse_resource_id. Results bypass the parse_resource_id cache so large
+    inventories do not evict the ids being polled.
+
+    Args:
+        resource_uris (iterable): resource ids/uris
+
+    Returns:
+        list: Returns one ResourceId per resource id/uri, in the same order
+    """
+
+    match = _ANF_ID_PATTERN.match
+    results = []
+
+    for resource_uri in resource_uris:
+        matched = match(resource_uri.strip())
+        if matched is None:
+            results.append(parse_resource_id.__wrapped__(resource_uri))
+            continue
+
+        segments = matched.groups()
+        kind = _ANF_KINDS[len(segments) - segments.count(None) - 3]
+        results.append(ResourceId(*segments, kind=kind))
+
+    return results
+
+
+def group_resource_ids(resource_uris, level):
+    """Groups resource ids/uris by one of their ANF parents
+
+    Function that groups resource ids/uris under the account, capacity pool or
+    volume they belong to. Ids that do not have a segment for the requested
+    level are left out.
+
+    Args:
+        resource_uris (iterable): resource ids/uris
+        level (string): Parent level, one of "account", "capacity_pool" or
+            "volume"
+
+    Returns:
+        OrderedDict: Returns a (subscription, resource group, account[, pool
+            [, volume]]) tuple -> list of resource ids/uris mapping
+    """
+
+    depth = ('account', 'capacity_pool', 'volume').index(level) + 1
+    resource_uris = list(resource_uris)
+    groups = OrderedDict()
+
+    for resource_uri, parsed in zip(resource_uris,
+                                    classify_resource_ids(resource_uris)):
+        key = (parsed.subscription, parsed.resource_group, parsed.account,
+               parsed.capacity_pool, parsed.volume)[:depth + 2]
+        if key[-1] is None:
+            continue
+        groups.setdefault(key, []).append(resource_uri)
+
+    return groups
+
+
+def group_by_account(resource_uris):
+    """Groups resource ids/uris by ANF account, see group_resource_ids"""
+    return group_resource_ids(resource_uris, 'account')
+
+
+def group_by_capacity_pool(resource_uris):
+    """Groups resource ids/uris by capacity pool, see group_resource_ids"""
+    return group_resource_ids(resource_uris, 'capacity_pool')
+
+
+def group_by_volume(resource_uris):
+    """Groups resource ids/uris by volume, see group_resource_ids"""
+    return group_resource_ids(resource_uris, 'volume')
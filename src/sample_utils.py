@@ -9,11 +9,11 @@ import sys
 import os
 import json
 import time
+import polling
 import resource_uri_utils
+import tracing
 from azure.core.exceptions import HttpResponseError, \
     ResourceNotFoundError
-from azure.identity import ClientSecretCredential
-from azure.mgmt.netapp import NetAppManagementClient
 from datetime import datetime
 
 
@@ -22,30 +22,85 @@ def print_header(header_string):
     print('-' * len(header_string))
 
 
-def get_credentials():
+def _load_credential_file():
+    credential_file = os.environ.get('AZURE_AUTH_LOCATION')
+
+    with open(credential_file) as credential_file_contents:
+        return json.load(credential_file_contents)
+
+
+def get_credentials(token_cache_location=None):
     """Gets the file system secured secret
 
     Gets the service principal credential file from a folder path defined the
     AZURE_AUTH_LOCATION environment variable to perform authentication.
 
+    When a token cache location is given, or defined by the
+    AZURE_TOKEN_CACHE_LOCATION environment variable, access tokens are kept
+    encrypted in that file and reused by later runs until they are about to
+    expire, see token_cache.CachedTokenCredential.
+
+    Args:
+        token_cache_location (string): Optional. Path of the token cache file
+
     Returns:
         ClientSecretCredential: Returns the Service Principal Credential object
         string: Returns the subscription id associated by default to the service principal
     """
 
-    credential_file = os.environ.get('AZURE_AUTH_LOCATION')
-
-    with open(credential_file) as credential_file_contents:
-        credential_info = json.load(credential_file_contents)
+    credential_info = _load_credential_file()
 
     subscription_id = credential_info['subscriptionId']
 
-    credentials = ClientSecretCredential(
+    def create_credentials():
+        # azure.identity takes a large share of the startup time, it is only
+        # imported once a token has to be requested
+        from azure.identity import ClientSecretCredential
+        return ClientSecretCredential(
+            client_id=credential_info['clientId'],
+            client_secret=credential_info['clientSecret'],
+            tenant_id=credential_info['tenantId']
+        )
+
+    token_cache_location = token_cache_location or \
+        os.environ.get('AZURE_TOKEN_CACHE_LOCATION')
+    if not token_cache_location:
+        return create_credentials(), subscription_id
+
+    import token_cache
+    credentials = token_cache.CachedTokenCredential(
+        create_credentials,
+        token_cache_location,
+        tenant_id=credential_info['tenantId'],
+        client_id=credential_info['clientId'],
+        client_secret=credential_info['clientSecret'])
+
+    return credentials, subscription_id
+
+
+def get_async_credentials():
+    """Gets the file system secured secret for asyncio clients
+
+    Same as get_credentials but returns the azure.identity.aio credential
+    expected by the azure.mgmt.netapp.aio clients.
+
+    Returns:
+        ClientSecretCredential: Returns the asyncio Service Principal
+            Credential object, it must be closed by the caller
+        string: Returns the subscription id associated by default to the service principal
+    """
+
+    from azure.identity.aio import ClientSecretCredential as \
+        AsyncClientSecretCredential
+
+    credential_info = _load_credential_file()
+
+    credentials = AsyncClientSecretCredential(
         client_id=credential_info['clientId'],
         client_secret=credential_info['clientSecret'],
         tenant_id=credential_info['tenantId']
     )
-    return credentials, subscription_id
+    return credentials, credential_info['subscriptionId']
 
 
 def console_output(message):
@@ -87,105 +142,374 @@ def get_tib_in_bytes(size):
     return size * 1024 * 1024 * 1024 * 1024
 
 
+def get_anf_resource(client, resource_id, **kwargs):
+    """Gets an ANF resource by its resource id
+
+    Function that dispatches to the get operation matching the type of the
+    ANF resource referenced by the resource id/uri.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be retrieved
+        kwargs: Optional keyword arguments forwarded to the get operation,
+            e.g. cls
+
+    Returns:
+        object: Returns the NetAppAccount, CapacityPool, Volume or Snapshot
+    """
+
+    parsed = resource_uri_utils.parse_resource_id(resource_id)
+
+    if parsed.kind == 'snapshot':
+        return client.snapshots.get(parsed.resource_group, parsed.account,
+                                    parsed.capacity_pool, parsed.volume,
+                                    parsed.snapshot, **kwargs)
+    elif parsed.kind == 'volume':
+        return client.volumes.get(parsed.resource_group, parsed.account,
+                                  parsed.capacity_pool, parsed.volume,
+                                  **kwargs)
+    elif parsed.kind == 'capacity_pool':
+        return client.pools.get(parsed.resource_group, parsed.account,
+                                parsed.capacity_pool, **kwargs)
+    elif parsed.kind == 'account':
+        return client.accounts.get(parsed.resource_group, parsed.account,
+                                   **kwargs)
+
+    raise ValueError('{} is not an ANF account, capacity pool, volume or '
+                     'snapshot resource id'.format(resource_id))
+
+
+def _with_response(pipeline_response, deserialized, headers):
+    return pipeline_response.http_response
+
+
+def _record_poll_result(waiter_span, result):
+    waiter_span.set('poll_count', result.attempts)
+    waiter_span.set('succeeded', result.succeeded)
+
+
 def wait_for_no_anf_resource(client, resource_id, interval_in_sec=10,
-                             retries=60):
+                             retries=60, backoff=None, **poll_kwargs):
     """Waits for specific anf resource don't exist
 
     This function checks if a specific ANF resource that was recently delete
-    stops existing. It breaks the wait if resource is not found anymore or
-    if polling reached out maximum retries.
+    stops existing. The first check happens immediately, then checks are
+    spaced with exponential backoff capped at interval_in_sec, honouring any
+    Retry-After header. It breaks the wait if resource is not found anymore
+    or if interval_in_sec * retries seconds have elapsed.
 
     Args:
         client (NetAppManagementClient): Azure Resource Provider
             Client designed to interact with ANF resources
         resource_id (string): Resource Id of the resource to be checked upon
-        interval_in_sec (int): Interval used between checks
-        retires (int): Number of times a poll will be performed
+        interval_in_sec (int): Maximum interval used between checks
+        retires (int): Number of maximum intervals before giving up
+        backoff (Backoff): Optional. Custom delay schedule
+        poll_kwargs: Optional keyword arguments for polling.poll_until, e.g.
+            clock and sleep
+
+    Returns:
+        PollResult: Returns the polling outcome
     """
 
-    for i in range(0, retries):
-        time.sleep(interval_in_sec)
-        try:
-            if resource_uri_utils.is_anf_snapshot(resource_id):
-                client.snapshots.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id),
-                    resource_uri_utils.get_anf_volume(resource_id),
-                    resource_uri_utils.get_anf_snapshot(resource_id)
-                )
-            elif resource_uri_utils.is_anf_volume(resource_id):
-                client.volumes.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id),
-                    resource_uri_utils.get_anf_volume(resource_id)
-                )
-            elif resource_uri_utils.is_anf_capacity_pool(resource_id):
-                client.pools.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id)
-                )
-            elif resource_uri_utils.is_anf_account(resource_id):
-                client.accounts.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id)
-                )
-        except ResourceNotFoundError as ex:
-            break
-
-
-def wait_for_anf_resource(client, resource_id, interval_in_sec=10, retries=60):
+    def probe():
+        with tracing.span('poll'):
+            try:
+                response = get_anf_resource(client, resource_id,
+                                            cls=_with_response)
+                return False, polling.get_retry_after(response)
+            except ResourceNotFoundError:
+                return True, None
+
+    with tracing.span('wait_for_no_anf_resource',
+                      resource_id=resource_id) as waiter_span:
+        result = polling.poll_until(
+            probe,
+            backoff=backoff or polling.Backoff(maximum_in_sec=interval_in_sec),
+            timeout_in_sec=interval_in_sec * retries,
+            **poll_kwargs)
+        _record_poll_result(waiter_span, result)
+
+    return result
+
+
+def wait_for_anf_resource(client, resource_id, interval_in_sec=10, retries=60,
+                          backoff=None, **poll_kwargs):
     """Waits for specific anf resource start existing
 
     This function checks if a specific ANF resource that was recently created
-    is already being able to be polled. It breaks the wait if resource is found
-    or if polling reached out maximum retries.
+    is already being able to be polled. The first check happens immediately,
+    then checks are spaced with exponential backoff capped at
+    interval_in_sec, honouring any Retry-After header. It breaks the wait if
+    resource is found or if interval_in_sec * retries seconds have elapsed.
 
     Args:
         client (NetAppManagementClient): Azure Resource Provider
             Client designed to interact with ANF resources
         resource_id (string): Resource Id of the resource to be checked upon
-        interval_in_sec (int): Interval used between checks
-        retires (int): Number of times a poll will be performed
+        interval_in_sec (int): Maximum interval used between checks
+        retires (int): Number of maximum intervals before giving up
+        backoff (Backoff): Optional. Custom delay schedule
+        poll_kwargs: Optional keyword arguments for polling.poll_until, e.g.
+            clock and sleep
+
+    Returns:
+        PollResult: Returns the polling outcome
     """
 
-    for i in range(0, retries):
-        time.sleep(interval_in_sec)
-        try:
-            if resource_uri_utils.is_anf_snapshot(resource_id):
-                client.snapshots.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id),
-                    resource_uri_utils.get_anf_volume(resource_id),
-                    resource_uri_utils.get_anf_snapshot(resource_id)
-                )
-                break
-            elif resource_uri_utils.is_anf_volume(resource_id):
-                client.volumes.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id),
-                    resource_uri_utils.get_anf_volume(resource_id)
-                )
-                break
-            elif resource_uri_utils.is_anf_capacity_pool(resource_id):
-                client.pools.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id)
-                )
-                break
-            elif resource_uri_utils.is_anf_account(resource_id):
-                client.accounts.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id)
-                )
-                break
-        except ResourceNotFoundError as ex:
-            pass
+    def probe():
+        with tracing.span('poll'):
+            try:
+                get_anf_resource(client, resource_id)
+                return True, None
+            except ResourceNotFoundError as ex:
+                return False, polling.get_retry_after(ex.response)
+
+    with tracing.span('wait_for_anf_resource',
+                      resource_id=resource_id) as waiter_span:
+        result = polling.poll_until(
+            probe,
+            backoff=backoff or polling.Backoff(maximum_in_sec=interval_in_sec),
+            timeout_in_sec=interval_in_sec * retries,
+            **poll_kwargs)
+        _record_poll_result(waiter_span, result)
+
+    return result
+
+
+def _list_anf_children(client, kind, parent, **kwargs):
+    subscription, resource_group, account, pool, volume = parent
+
+    if kind == 'snapshot':
+        return client.snapshots.list(resource_group, account, pool, volume,
+                                     **kwargs)
+    elif kind == 'volume':
+        return client.volumes.list(resource_group, account, pool, **kwargs)
+    elif kind == 'capacity_pool':
+        return client.pools.list(resource_group, account, **kwargs)
+    return client.accounts.list(resource_group, **kwargs)
+
+
+def wait_for_many(client, resource_ids, present=True, interval_in_sec=10,
+                  retries=60, backoff=None, **poll_kwargs):
+    """Waits for many anf resources to start or stop existing
+
+    This function groups the resource ids by parent (resource group, account,
+    capacity pool or volume) and, on every poll round, issues a single list
+    call per parent that still has pending resources, resolving all of its
+    children from that one response. E.g. 200 volumes spread across 4 pools
+    cost 4 volumes.list calls per round instead of 200 gets. Rounds follow
+    the same schedule as wait_for_anf_resource, honouring the longest
+    Retry-After of the list responses of a round.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_ids (list): Resource Ids of the resources to be checked upon,
+            accounts, capacity pools, volumes and snapshots can be mixed,
+            all of them in the subscription of client
+        present (boolean): True to wait for the resources to exist, False to
+            wait for them to be gone
+        interval_in_sec (int): Maximum interval used between poll rounds
+        retires (int): Number of maximum intervals before giving up
+        backoff (Backoff): Optional. Custom delay schedule
+        poll_kwargs: Optional keyword arguments for polling.poll_until, e.g.
+            clock and sleep
+
+    Returns:
+        dict: Returns resource id -> boolean, True if the resource reached
+            the requested state before the wait ended
+
+    Raises:
+        ValueError: A resource id is not an ANF resource id, or the ids span
+            more than one subscription
+    """
+
+    resource_ids = list(resource_ids)
+    pending = {}
+    subscriptions = set()
+
+    for resource_id, parsed in zip(
+            resource_ids,
+            resource_uri_utils.classify_resource_ids(resource_ids)):
+        if parsed.kind is None:
+            raise ValueError('{} is not an ANF account, capacity pool, volume '
+                             'or snapshot resource id'.format(resource_id))
+        subscriptions.add(parsed.subscription.lower())
+        parent = (parsed.subscription, parsed.resource_group, parsed.account,
+                  parsed.capacity_pool, parsed.volume)
+        depth = ('account', 'capacity_pool', 'volume',
+                 'snapshot').index(parsed.kind) + 2
+        name = getattr(parsed, parsed.kind).lower()
+        pending.setdefault((parsed.kind, parent[:depth] +
+                            (None,) * (5 - depth)), {})[name] = resource_id
+
+    # Every list call goes through the one client, i.e. one subscription
+    if len(subscriptions) > 1:
+        raise ValueError('The resource ids span subscriptions {}, wait for '
+                         'the resources of each subscription with its own '
+                         'client'.format(', '.join(sorted(subscriptions))))
+
+    resolved = dict.fromkeys(resource_ids, False)
+
+    def probe():
+        with tracing.span('poll'):
+            return poll_round()
+
+    def poll_round():
+        retry_afters = []
+
+        def record_retry_after(pipeline_response):
+            retry_afters.append(polling.get_retry_after(
+                pipeline_response.http_response))
+
+        for (kind, parent), children in list(pending.items()):
+            try:
+                listed = resource_uri_utils.classify_resource_ids(
+                    [resource.id for resource in _list_anf_children(
+                        client, kind, parent,
+                        raw_response_hook=record_retry_after)])
+                existing = set(getattr(parsed, kind).lower()
+                               for parsed in listed
+                               if getattr(parsed, kind) is not None)
+            except ResourceNotFoundError as ex:
+                retry_afters.append(polling.get_retry_after(ex.response))
+                existing = set()
+
+            for name in list(children):
+                if (name in existing) == present:
+                    resolved[children.pop(name)] = True
+            if not children:
+                del pending[(kind, parent)]
+
+        return not pending, max(
+            (retry_after for retry_after in retry_afters
+             if retry_after is not None), default=None)
+
+    with tracing.span('wait_for_many', resource_count=len(resource_ids),
+                      parent_count=len(pending)) as waiter_span:
+        result = polling.poll_until(
+            probe,
+            backoff=backoff or polling.Backoff(maximum_in_sec=interval_in_sec),
+            timeout_in_sec=interval_in_sec * retries,
+            **poll_kwargs)
+        _record_poll_result(waiter_span, result)
+
+    return resolved
+
+
+class _EstimatedBackoff(object):
+    """Backoff shortened to an estimate of the remaining wait, if known"""
+
+    def __init__(self, backoff):
+        self.backoff = backoff
+        self.estimate = None
+
+    def delay(self, attempt):
+        delay = self.backoff.delay(attempt)
+        if self.estimate is not None:
+            delay = min(delay, max(self.estimate,
+                                   self.backoff.initial_in_sec))
+        return delay
+
+
+def wait_for_snapshot_split(client, snapshot_id, clone_volume_ids=None,
+                            interval_in_sec=10, retries=60, backoff=None,
+                            **poll_kwargs):
+    """Waits for the volumes created from a snapshot to release it
+
+    A snapshot can not be deleted while a volume created from it is being
+    provisioned or split from it. This function finds these volumes, the
+    volumes of the snapshot capacity pool whose snapshot_id matches, and
+    polls them until they are provisioned and, when the API version reports
+    it, until their cloneProgress reaches 100. Checks are spaced with
+    exponential backoff capped at interval_in_sec, shortened when the split
+    progress predicts an earlier end. It breaks the wait when every volume
+    is split or gone, or if interval_in_sec * retries seconds have elapsed.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        snapshot_id (string): Resource Id of the snapshot
+        clone_volume_ids (list): Optional. Resource Ids of the volumes
+            created from the snapshot, found by listing the capacity pool
+            volumes if not given
+        interval_in_sec (int): Maximum interval used between checks
+        retries (int): Number of maximum intervals before giving up
+        backoff (Backoff): Optional. Custom delay schedule
+        poll_kwargs: Optional keyword arguments for polling.poll_until, e.g.
+            clock and sleep
+
+    Returns:
+        PollResult: Returns the polling outcome
+    """
+
+    with tracing.span('wait_for_snapshot_split',
+                      resource_id=snapshot_id) as waiter_span:
+        if clone_volume_ids is None:
+            parsed = resource_uri_utils.parse_resource_id(snapshot_id)
+            try:
+                snapshot = get_anf_resource(client, snapshot_id)
+            except ResourceNotFoundError:
+                return polling.PollResult(True, 0, 0.0)
+            clone_volume_ids = [
+                volume.id for volume in client.volumes.list(
+                    parsed.resource_group, parsed.account,
+                    parsed.capacity_pool)
+                if volume.snapshot_id == snapshot.snapshot_id]
+        waiter_span.set('clone_count', len(clone_volume_ids))
+
+        clock = poll_kwargs.get('clock', time.monotonic)
+        schedule = _EstimatedBackoff(
+            backoff or polling.Backoff(maximum_in_sec=interval_in_sec))
+        pending = list(clone_volume_ids)
+        # Volume id -> (clock, progress) of the first progress reading
+        first_progress = {}
+
+        def probe():
+            with tracing.span('poll'):
+                retry_after = None
+                estimates = []
+                for volume_id in list(pending):
+                    try:
+                        response = get_anf_resource(client, volume_id,
+                                                    cls=_with_response)
+                    except ResourceNotFoundError:
+                        pending.remove(volume_id)
+                        continue
+                    retry_after = polling.get_retry_after(response)
+                    properties = json.loads(response.text()).get(
+                        'properties') or {}
+                    progress = properties.get('cloneProgress')
+                    if properties.get('provisioningState') == 'Succeeded' \
+                            and (progress is None or progress >= 100):
+                        pending.remove(volume_id)
+                        continue
+
+                    # Linear extrapolation of the progress seen so far
+                    now = clock()
+                    started, start_progress = first_progress.setdefault(
+                        volume_id, (now, progress))
+                    if progress is not None and start_progress is not None \
+                            and progress > start_progress:
+                        estimates.append((now - started) * (100 - progress)
+                                         / (progress - start_progress))
+                    else:
+                        estimates.append(None)
+
+                schedule.estimate = max(estimates) \
+                    if estimates and None not in estimates else None
+                return not pending, retry_after
+
+        result = polling.poll_until(
+            probe,
+            backoff=schedule,
+            timeout_in_sec=interval_in_sec * retries,
+            **poll_kwargs)
+        _record_poll_result(waiter_span, result)
+
+    return result
 
 
 def resource_exists(resource_client, resource_id, api_version):
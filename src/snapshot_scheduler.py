@@ -0,0 +1,385 @@
+# snapshot_scheduler.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import polling
+import resource_uri_utils
+import teardown
+import tracing
+from azure.core.exceptions import ResourceNotFoundError
+from azure.mgmt.netapp.models import Snapshot
+
+# Maximum number of snapshot requests in flight at once
+MAX_CONCURRENCY = 64
+# Prefix of the names of the snapshots taken by the scheduler, retention only
+# ever considers snapshots named after it
+SNAPSHOT_PREFIX = 'fleet'
+
+_NAME_FORMAT = '%Y%m%d-%H%M%S'
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def snapshot_name(prefix=SNAPSHOT_PREFIX, now=None):
+    """Builds the name shared by the snapshots of one fleet snapshot
+
+    Args:
+        prefix (string): Name prefix, see RetentionPolicy
+        now (datetime): Optional. Defaults to the current UTC time
+
+    Returns:
+        string: Returns e.g. "fleet-20211018-101500"
+    """
+
+    now = now or datetime.now(timezone.utc)
+    return '{}-{}'.format(prefix, now.strftime(_NAME_FORMAT))
+
+
+class VolumeSnapshot(object):
+    """Outcome of the snapshot of one volume
+
+    Attributes:
+        volume_id (string): Resource id of the volume
+        snapshot_id (string): Resource id of the snapshot, None on error
+        issued (float): Clock time begin_create was sent
+        accepted (float): Clock time the service accepted the request
+        confirmed (float): Clock time the snapshot was listed as Succeeded
+        created (datetime): Creation time of the snapshot, set by the service
+        skew (float): Seconds between the earliest creation time of the
+            fleet snapshot and the creation time of this snapshot
+        error (Exception): Error of the snapshot, None on success
+    """
+
+    __slots__ = ('volume_id', 'snapshot_id', 'issued', 'accepted',
+                 'confirmed', 'created', 'skew', 'error')
+
+    def __init__(self, volume_id):
+        self.volume_id = volume_id
+        self.snapshot_id = None
+        self.issued = None
+        self.accepted = None
+        self.confirmed = None
+        self.created = None
+        self.skew = None
+        self.error = None
+
+    @property
+    def succeeded(self):
+        """boolean: True if the snapshot was confirmed"""
+        return self.confirmed is not None and self.error is None
+
+
+class FleetSnapshot(object):
+    """Outcome of a point-in-time snapshot of many volumes
+
+    Attributes:
+        name (string): Name of the snapshots
+        volumes (list): VolumeSnapshot objects in volume order
+        started (float): Clock time the first request was sent
+        finished (float): Clock time the last snapshot was confirmed or
+            given up
+    """
+
+    __slots__ = ('name', 'volumes', 'started', 'finished')
+
+    def __init__(self, name, volumes):
+        self.name = name
+        self.volumes = volumes
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        """float: Seconds from the first request to the last confirmation"""
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    @property
+    def issue_window(self):
+        """float: Seconds between the first and last request sent"""
+        issued = [volume.issued for volume in self.volumes
+                  if volume.issued is not None]
+        return max(issued) - min(issued) if issued else None
+
+    @property
+    def max_skew(self):
+        """float: Largest creation time skew across the volumes"""
+        skews = [volume.skew for volume in self.volumes
+                 if volume.skew is not None]
+        return max(skews) if skews else None
+
+    @property
+    def failed(self):
+        """list: VolumeSnapshot objects that did not succeed"""
+        return [volume for volume in self.volumes if not volume.succeeded]
+
+
+def _volume_names(volume_id):
+    parsed = resource_uri_utils.parse_resource_id(volume_id)
+    if parsed.kind != 'volume':
+        raise ValueError('{} is not an ANF volume resource id'.format(
+            volume_id))
+    return (parsed.resource_group, parsed.account, parsed.capacity_pool,
+            parsed.volume)
+
+
+def _snapshot_name(snapshot):
+    return snapshot.name.rsplit('/', 1)[-1]
+
+
+def _issue(client, volume, name, location, gate, clock):
+    # Workers are started upfront and blocked on the gate, so that the
+    # requests leave together instead of trickling out as threads spawn
+    gate.wait()
+    volume.issued = clock()
+    # polling=False: the snapshots are confirmed by list rounds, not by one
+    # poller thread per long running operation
+    client.snapshots.begin_create(
+        *(_volume_names(volume.volume_id) + (name,
+                                             Snapshot(location=location))),
+        polling=False)
+    volume.accepted = clock()
+
+
+def create_fleet_snapshot(client, volumes, name=None,
+                          max_concurrency=MAX_CONCURRENCY, interval_in_sec=10,
+                          retries=60, backoff=None, clock=time.monotonic,
+                          **poll_kwargs):
+    """Takes consistent point-in-time snapshots of many volumes
+
+    The snapshot requests of all volumes are sent concurrently, released
+    together by up to max_concurrency workers, so that they land within the
+    tightest possible window. They are then confirmed by poll rounds listing
+    the snapshots of the volumes still unconfirmed, in parallel, instead of
+    waiting on every long running operation. The creation times reported by
+    the service give the skew of every volume against the earliest snapshot.
+    A failed volume is reported and does not stop the others.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        volumes (list): Volume models to snapshot, e.g. from
+            listing.walk_anf_resources
+        name (string): Optional. Snapshot name, defaults to snapshot_name()
+        max_concurrency (int): Maximum number of requests at once
+        interval_in_sec (int): Maximum interval used between poll rounds
+        retries (int): Number of maximum intervals before giving up
+        backoff (Backoff): Optional. Custom delay schedule
+        clock (function): Optional. Clock used to time the snapshots,
+            defaults to time.monotonic
+        poll_kwargs: Optional keyword arguments for polling.poll_until
+
+    Returns:
+        FleetSnapshot: Returns the per volume outcome and timings
+    """
+
+    name = name or snapshot_name()
+    volumes = list(volumes)
+    fleet = FleetSnapshot(name, [VolumeSnapshot(volume.id)
+                                 for volume in volumes])
+    if not volumes:
+        return fleet
+
+    gate = threading.Event()
+    with tracing.span('create_fleet_snapshot', snapshot=name,
+                      volume_count=len(volumes)) as fleet_span, \
+            ThreadPoolExecutor(max_workers=min(
+                max_concurrency, len(volumes))) as executor:
+        issues = [executor.submit(contextvars.copy_context().run, _issue,
+                                  client, snapshot, name, volume.location,
+                                  gate, clock)
+                  for snapshot, volume in zip(fleet.volumes, volumes)]
+        fleet.started = clock()
+        gate.set()
+
+        pending = OrderedDict()
+        for snapshot, issue in zip(fleet.volumes, issues):
+            try:
+                issue.result()
+                pending[snapshot.volume_id] = snapshot
+            except Exception as ex:
+                snapshot.error = ex
+
+        def list_snapshots(snapshot):
+            try:
+                return list(client.snapshots.list(
+                    *_volume_names(snapshot.volume_id)))
+            except ResourceNotFoundError as ex:
+                return ex
+
+        def probe():
+            with tracing.span('poll', volume_count=len(pending)):
+                snapshots = list(pending.values())
+                listings = [executor.submit(contextvars.copy_context().run,
+                                            list_snapshots, snapshot)
+                            for snapshot in snapshots]
+                for snapshot, listing in zip(snapshots, listings):
+                    listed = listing.result()
+                    if isinstance(listed, Exception):
+                        snapshot.error = listed
+                        del pending[snapshot.volume_id]
+                        continue
+                    found = next((item for item in listed
+                                  if _snapshot_name(item) == name), None)
+                    if found is None:
+                        continue
+                    if found.provisioning_state == 'Failed':
+                        snapshot.error = RuntimeError(
+                            'Snapshot {} failed'.format(found.id))
+                    elif found.provisioning_state == 'Succeeded':
+                        snapshot.snapshot_id = found.id
+                        snapshot.created = found.created
+                        snapshot.confirmed = clock()
+                    else:
+                        continue
+                    del pending[snapshot.volume_id]
+            return not pending, None
+
+        if pending:
+            polling.poll_until(
+                probe,
+                backoff=backoff or polling.Backoff(
+                    maximum_in_sec=interval_in_sec),
+                timeout_in_sec=interval_in_sec * retries,
+                **poll_kwargs)
+        for snapshot in pending.values():
+            snapshot.error = TimeoutError(
+                'Snapshot {} of {} was not confirmed within {} '
+                'seconds'.format(name, snapshot.volume_id,
+                                 interval_in_sec * retries))
+        fleet.finished = clock()
+
+        created = [snapshot.created for snapshot in fleet.volumes
+                   if snapshot.succeeded and snapshot.created is not None]
+        if created:
+            earliest = min(created)
+            for snapshot in fleet.volumes:
+                if snapshot.succeeded and snapshot.created is not None:
+                    snapshot.skew = (snapshot.created -
+                                     earliest).total_seconds()
+        fleet_span.set('failed_count', len(fleet.failed))
+        fleet_span.set('issue_window', fleet.issue_window)
+        fleet_span.set('max_skew', fleet.max_skew)
+
+    return fleet
+
+
+class RetentionPolicy(object):
+    """Which scheduler snapshots of a volume are kept
+
+    Only snapshots whose name starts with the prefix followed by a hyphen
+    are considered, others are never pruned. A snapshot expires when it is
+    not among the keep_last most recent ones, or when it is older than
+    max_age_in_sec. Snapshots without a creation time count as the most
+    recent.
+
+    Args:
+        keep_last (int): Optional. Number of most recent snapshots kept
+        max_age_in_sec (float): Optional. Age past which snapshots expire
+        prefix (string): Name prefix of the scheduler snapshots
+    """
+
+    __slots__ = ('keep_last', 'max_age_in_sec', 'prefix')
+
+    def __init__(self, keep_last=None, max_age_in_sec=None,
+                 prefix=SNAPSHOT_PREFIX):
+        if keep_last is None and max_age_in_sec is None:
+            raise ValueError('A retention policy needs keep_last, '
+                             'max_age_in_sec or both')
+        if keep_last is not None and keep_last < 1:
+            raise ValueError('keep_last must be at least 1, got {}'.format(
+                keep_last))
+        self.keep_last = keep_last
+        self.max_age_in_sec = max_age_in_sec
+        self.prefix = prefix
+
+    def expired(self, snapshots, now=None):
+        """Selects the expired snapshots of one volume
+
+        Args:
+            snapshots (list): Snapshot models of the volume
+            now (datetime): Optional. Defaults to the current UTC time
+
+        Returns:
+            list: Returns the expired Snapshot models, most recent first
+        """
+
+        now = now or datetime.now(timezone.utc)
+        owned = [snapshot for snapshot in snapshots
+                 if _snapshot_name(snapshot).startswith(self.prefix + '-')]
+        owned.sort(key=lambda snapshot: (snapshot.created is None,
+                                         snapshot.created or _EPOCH),
+                   reverse=True)
+
+        expired = []
+        for position, snapshot in enumerate(owned):
+            if self.keep_last is not None and position >= self.keep_last:
+                expired.append(snapshot)
+            elif self.max_age_in_sec is not None and \
+                    snapshot.created is not None and \
+                    (now - snapshot.created).total_seconds() > \
+                    self.max_age_in_sec:
+                expired.append(snapshot)
+        return expired
+
+
+def prune_snapshots(client, volume_ids, policy, max_concurrency=MAX_CONCURRENCY,
+                    now=None, dry_run=False, on_deleted=None):
+    """Deletes the snapshots expired under a retention policy
+
+    The snapshots of all volumes are listed in parallel, then the expired
+    ones are deleted in parallel with teardown, up to max_concurrency at
+    once. Deletions rejected because a volume is still being split from the
+    snapshot are retried, see teardown.LOCKED_SNAPSHOT_TIMEOUT_IN_SEC.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        volume_ids (list): Resource ids of the volumes
+        policy (RetentionPolicy): Snapshots kept per volume
+        max_concurrency (int): Maximum number of list or delete calls at once
+        now (datetime): Optional. Defaults to the current UTC time
+        dry_run (boolean): True to only report the expired snapshots
+        on_deleted (function): Optional. Called with the resource id of
+            every deleted snapshot
+
+    Returns:
+        list: Returns the resource ids of the expired snapshots
+    """
+
+    volume_ids = list(volume_ids)
+    now = now or datetime.now(timezone.utc)
+
+    def expired(volume_id):
+        try:
+            snapshots = list(client.snapshots.list(*_volume_names(volume_id)))
+        except ResourceNotFoundError:
+            return []
+        return [snapshot.id for snapshot in policy.expired(snapshots, now)]
+
+    with tracing.span('prune_snapshots',
+                      volume_count=len(volume_ids)) as prune_span:
+        with ThreadPoolExecutor(
+                max_workers=max(1, min(max_concurrency,
+                                       len(volume_ids)))) as executor:
+            listings = [executor.submit(contextvars.copy_context().run,
+                                        expired, volume_id)
+                        for volume_id in volume_ids]
+            expired_ids = [snapshot_id for listing in listings
+                           for snapshot_id in listing.result()]
+        prune_span.set('expired_count', len(expired_ids))
+
+        if expired_ids and not dry_run:
+            teardown.teardown(client, expired_ids,
+                              max_concurrency={'snapshot': max_concurrency},
+                              on_deleted=on_deleted)
+    return expired_ids
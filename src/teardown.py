@@ -0,0 +1,265 @@
+# teardown.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import inventory
+import polling
+import resource_uri_utils
+import sample_utils
+import tracing
+from azure.core.exceptions import HttpResponseError
+from provisioning_graph import ProvisioningGraph
+
+# Default maximum number of concurrent deletions per resource level
+MAX_CONCURRENCY = {
+    'snapshot': 8,
+    'volume': 4,
+    'capacity_pool': 2,
+    'account': 2,
+}
+# Volume deletions are executed serially by the RP within a capacity pool
+PER_POOL_VOLUME_CONCURRENCY = 1
+# Seconds a snapshot deletion is retried while the snapshot is locked, e.g.
+# by a volume being split from it
+LOCKED_SNAPSHOT_TIMEOUT_IN_SEC = 600
+
+_LEVELS = ('account', 'capacity_pool', 'volume', 'snapshot')
+
+
+def delete_anf_resource(client, resource_id):
+    """Deletes an ANF resource by its resource id
+
+    Function that starts the delete operation matching the type of the ANF
+    resource and waits for it, including the ARM workaround of waiting for
+    the resource to stop being returned.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be deleted
+    """
+
+    with tracing.span('delete_anf_resource', resource_id=resource_id):
+        _delete_anf_resource(client, resource_id)
+
+
+def _delete_anf_resource(client, resource_id):
+    parsed = resource_uri_utils.parse_resource_id(resource_id)
+
+    if parsed.kind == 'snapshot':
+        poller = _begin_delete_unlocked(lambda: client.snapshots.begin_delete(
+            parsed.resource_group, parsed.account, parsed.capacity_pool,
+            parsed.volume, parsed.snapshot))
+    elif parsed.kind == 'volume':
+        poller = client.volumes.begin_delete(
+            parsed.resource_group, parsed.account, parsed.capacity_pool,
+            parsed.volume)
+    elif parsed.kind == 'capacity_pool':
+        poller = client.pools.begin_delete(
+            parsed.resource_group, parsed.account, parsed.capacity_pool)
+    elif parsed.kind == 'account':
+        poller = client.accounts.begin_delete(
+            parsed.resource_group, parsed.account)
+    else:
+        raise ValueError('{} is not an ANF account, capacity pool, volume or '
+                         'snapshot resource id'.format(resource_id))
+
+    poller.wait()
+
+    # ARM Workaround to wait the deletion complete/propagate
+    sample_utils.wait_for_no_anf_resource(client, resource_id)
+
+
+def _begin_delete_unlocked(begin_delete):
+    # A locked snapshot rejects its deletion with 409 Conflict, the deletion
+    # is retried with backoff until the lock is released
+    outcome = {}
+
+    def probe():
+        try:
+            outcome['poller'] = begin_delete()
+            return True, None
+        except HttpResponseError as ex:
+            if ex.status_code != 409:
+                raise
+            outcome['error'] = ex
+            return False, polling.get_retry_after(ex.response)
+
+    with tracing.span('begin_delete_unlocked') as delete_span:
+        result = polling.poll_until(
+            probe, timeout_in_sec=LOCKED_SNAPSHOT_TIMEOUT_IN_SEC)
+        delete_span.set('conflict_count', result.attempts - 1)
+    if not result.succeeded:
+        raise outcome['error']
+    return outcome['poller']
+
+
+def wait_for_snapshot_split(client, **wait_kwargs):
+    """Builds a before_delete hook waiting for snapshots to be unlocked
+
+    The returned function, given to teardown as before_delete, calls
+    sample_utils.wait_for_snapshot_split before every snapshot deletion so
+    that a snapshot is deleted as soon as the volumes created from it are
+    split from it, instead of after a fixed delay. Deletions still rejected
+    because the snapshot is locked are retried for up to
+    LOCKED_SNAPSHOT_TIMEOUT_IN_SEC.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        wait_kwargs: Optional keyword arguments for
+            sample_utils.wait_for_snapshot_split, e.g. interval_in_sec
+
+    Returns:
+        function: Returns the hook, called with a resource id
+    """
+
+    def before_delete(resource_id):
+        if resource_uri_utils.parse_resource_id(resource_id).kind == \
+                'snapshot':
+            sample_utils.wait_for_snapshot_split(client, resource_id,
+                                                 **wait_kwargs)
+
+    return before_delete
+
+
+def collect_resource_ids(client, resource_group_name, anf_account_names=None):
+    """Lists every ANF resource of a resource group
+
+    The hierarchy is crawled with inventory.InventoryCache, listing the
+    children of all accounts, pools and volumes concurrently.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group
+        anf_account_names (list): Optional. Restricts the inventory to these
+            accounts
+
+    Returns:
+        list: Returns the resource ids of the accounts and all their capacity
+            pools, volumes and snapshots
+    """
+
+    root = inventory.InventoryCache(client).get(resource_group_name)
+
+    resource_ids = []
+    for account in root.children.values():
+        if anf_account_names is not None \
+                and account.name not in anf_account_names:
+            continue
+        resource_ids.append(account.id)
+        resource_ids.extend(node.id for node in account.walk())
+
+    return resource_ids
+
+
+def build_teardown_graph(client, resource_ids, max_concurrency=None,
+                         per_pool_volume_concurrency=PER_POOL_VOLUME_CONCURRENCY,
+                         before_delete=None, on_deleted=None):
+    """Builds the snapshot->volume->pool->account deletion graph
+
+    Every resource is deleted only after all of its descendants present in
+    resource_ids are gone, leaves are deleted in parallel. Concurrency is
+    bound per level and volume deletions are additionally serialized per
+    capacity pool, while different pools and accounts proceed in parallel.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_ids (list): Resource ids of the resources to be deleted
+        max_concurrency (dict): Optional. Level ("snapshot", "volume",
+            "capacity_pool", "account") -> maximum concurrent deletions,
+            missing levels use MAX_CONCURRENCY
+        per_pool_volume_concurrency (int): Maximum concurrent volume
+            deletions within one capacity pool
+        before_delete (function): Optional. Called with the resource id right
+            before its deletion starts, e.g. to wait for a snapshot to be
+            unlocked
+        on_deleted (function): Optional. Called with the resource id once the
+            resource is gone
+
+    Returns:
+        ProvisioningGraph: Returns the graph, steps are named after the
+            resource ids
+    """
+
+    limits = dict(MAX_CONCURRENCY)
+    limits.update(max_concurrency or {})
+
+    resource_ids = list(dict.fromkeys(resource_ids))
+    keys = {}
+    for resource_id, parsed in zip(
+            resource_ids,
+            resource_uri_utils.classify_resource_ids(resource_ids)):
+        if parsed.kind is None:
+            raise ValueError('{} is not an ANF account, capacity pool, volume '
+                             'or snapshot resource id'.format(resource_id))
+        depth = _LEVELS.index(parsed.kind) + 1
+        keys[resource_id] = tuple(
+            (value or '').lower() for value in (
+                parsed.subscription, parsed.resource_group, parsed.account,
+                parsed.capacity_pool, parsed.volume,
+                parsed.snapshot))[:depth + 2]
+
+    by_key = dict((key, resource_id) for resource_id, key in keys.items())
+    children = dict((resource_id, []) for resource_id in resource_ids)
+    for resource_id, key in keys.items():
+        for ancestor_depth in range(len(key) - 1, 2, -1):
+            ancestor = by_key.get(key[:ancestor_depth])
+            if ancestor is not None:
+                children[ancestor].append(resource_id)
+                break
+
+    def delete(resource_id, kind):
+        def action(results):
+            if before_delete is not None:
+                before_delete(resource_id)
+            delete_anf_resource(client, resource_id)
+            if on_deleted is not None:
+                on_deleted(resource_id)
+            return resource_id
+        return action
+
+    # Limits are enforced when dispatching, a volume waiting for its pool
+    # does not hold a worker, so other pools keep draining meanwhile
+    graph = ProvisioningGraph(max_concurrency=sum(limits.values()))
+    for level, limit in limits.items():
+        graph.limit(level, limit)
+    for kind in reversed(_LEVELS):
+        for resource_id, key in keys.items():
+            if len(key) != _LEVELS.index(kind) + 3:
+                continue
+            limited_by = [kind]
+            if kind == 'volume':
+                pool = '/'.join(key[:-1])
+                if pool not in graph.limits:
+                    graph.limit(pool, per_pool_volume_concurrency)
+                limited_by.append(pool)
+            graph.add(resource_id, delete(resource_id, kind),
+                      depends_on=children[resource_id],
+                      limited_by=limited_by)
+
+    return graph
+
+
+def teardown(client, resource_ids, **kwargs):
+    """Deletes ANF resources in dependency order, in parallel
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_ids (list): Resource ids of the resources to be deleted
+        kwargs: Optional keyword arguments for build_teardown_graph
+
+    Returns:
+        ProvisioningGraph: Returns the executed graph, with per resource
+            timings
+    """
+
+    graph = build_teardown_graph(client, resource_ids, **kwargs)
+    graph.run()
+    return graph
@@ -0,0 +1,14 @@
+# conftest.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# The sample modules live flat in src, make them importable from the tests
+# whichever folder pytest is started from.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
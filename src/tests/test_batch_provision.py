@@ -0,0 +1,47 @@
+# test_batch_provision.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Checks the validation of batch_provision spec files.
+
+import pytest
+import batch_provision
+
+HEADER = ('name,resource_group,account,pool,size_gib,service_level,'
+          'subnet_id,location,tags\n')
+
+
+def write_csv(tmp_path, *rows):
+    path = tmp_path / 'volumes.csv'
+    path.write_text(HEADER + ''.join(row + '\n' for row in rows))
+    return str(path)
+
+
+def test_csv_tags_are_parsed(tmp_path):
+    path = write_csv(tmp_path,
+                     'vol1,rg,account,pool,100,Standard,/s,eastus,'
+                     'team=x;env = dev',
+                     'vol2,rg,account,pool,100,Standard,/s,eastus,')
+
+    specs = batch_provision.load_specs(path)
+
+    assert [spec.tags for spec in specs] == [{'team': 'x', 'env': 'dev'},
+                                             None]
+    assert specs[0].size_gib == 100
+
+
+def test_invalid_size_names_the_entry(tmp_path):
+    path = write_csv(tmp_path,
+                     'vol1,rg,account,pool,100,Standard,/s,eastus,',
+                     'vol2,rg,account,pool,100GiB,Standard,/s,eastus,')
+
+    with pytest.raises(ValueError, match='entry 2: size_gib'):
+        batch_provision.load_specs(path)
+
+
+def test_entries_must_be_mappings():
+    with pytest.raises(ValueError, match='entry 1: expected a mapping'):
+        batch_provision._build_specs(['vol1'], {}, 'volumes.yaml')
@@ -0,0 +1,49 @@
+# test_import_budget.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Runs the anf_cli.py entry point under python -X importtime in fresh
+# interpreters and checks it against the budgets of
+# benchmarks/import_budget.py. Set IMPORT_BUDGET_SCALE on slow machines.
+
+import os
+from benchmarks import import_budget
+
+SCALE = float(os.environ.get('IMPORT_BUDGET_SCALE', '1.0'))
+RUNS = 3
+
+
+def budget(name):
+    for entry_name, code, milliseconds, forbidden in import_budget.BUDGETS:
+        if entry_name == name:
+            return code, milliseconds * SCALE, forbidden
+    raise KeyError(name)
+
+
+def lazily_loaded(modules, forbidden):
+    return sorted(module for module in modules
+                  if any(module == prefix or module.startswith(prefix + '.')
+                         for prefix in forbidden))
+
+
+def test_cli_help_is_within_budget():
+    _, milliseconds, forbidden = budget('cli')
+
+    measured, modules = import_budget.measure(
+        None, RUNS, argv=['anf_cli.py', '--help'])
+
+    assert lazily_loaded(modules, forbidden) == []
+    assert measured <= milliseconds
+
+
+def test_provision_does_not_import_the_sample():
+    code, milliseconds, forbidden = budget('provision')
+
+    measured, modules = import_budget.measure(code, RUNS)
+
+    assert 'example' not in modules
+    assert lazily_loaded(modules, forbidden) == []
+    assert measured <= milliseconds
@@ -0,0 +1,57 @@
+# test_inventory.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Crawls inventory.InventoryCache trees with a fake client whose account
+# listings can be held back.
+
+import threading
+import types
+import inventory
+
+
+class FakeAccounts(object):
+    def __init__(self):
+        self.listing = threading.Event()
+        self.release = threading.Event()
+
+    def list(self, resource_group_name):
+        if resource_group_name == 'slow-rg':
+            self.listing.set()
+            self.release.wait(5)
+        return []
+
+
+def test_resource_groups_are_crawled_concurrently():
+    accounts = FakeAccounts()
+    cache = inventory.InventoryCache(types.SimpleNamespace(accounts=accounts))
+    slow = threading.Thread(target=cache.get, args=('slow-rg',))
+    slow.start()
+    try:
+        assert accounts.listing.wait(5)
+
+        # Served while the crawl of the other resource group is held back
+        root = cache.get('fast-rg')
+
+        assert root.children == {}
+        assert slow.is_alive()
+    finally:
+        accounts.release.set()
+        slow.join()
+    assert cache.list_calls == 2
+
+
+def test_listings_are_served_from_the_cache_until_invalidated():
+    accounts = FakeAccounts()
+    cache = inventory.InventoryCache(types.SimpleNamespace(accounts=accounts))
+
+    cache.get('rg')
+    cache.get('rg')
+    assert (cache.list_calls, cache.cache_hits) == (1, 1)
+
+    cache.invalidate()
+    cache.get('rg')
+    assert cache.list_calls == 2
@@ -0,0 +1,272 @@
+# test_polling.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Drives polling.poll_until and the sample_utils waiters with a fake clock,
+# so no test sleeps, and compares them with the former fixed 10 seconds
+# polling loop.
+
+import asyncio
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+import polling
+import sample_utils
+
+ACCOUNT_ID = ('/subscriptions/00000000-0000-0000-0000-000000000000/'
+              'resourceGroups/rg/providers/Microsoft.NetApp/'
+              'netAppAccounts/account')
+
+
+class FakeClock(object):
+    """Clock whose sleep only moves the time forward"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse(object):
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class FakePipelineResponse(object):
+    def __init__(self, http_response):
+        self.http_response = http_response
+
+
+class FakeResource(object):
+    def __init__(self, resource_id):
+        self.id = resource_id
+
+
+class FakeAccounts(object):
+    """accounts operations of an account existing from present_at to gone_at
+
+    Every response carries retry_after as a Retry-After header, if set.
+    """
+
+    def __init__(self, clock, present_at=0.0, gone_at=float('inf'),
+                 retry_after=None):
+        self.clock = clock
+        self.present_at = present_at
+        self.gone_at = gone_at
+        self.retry_after = retry_after
+        self.get_count = 0
+        self.list_count = 0
+
+    def get(self, resource_group_name, account_name, cls=None):
+        self.get_count += 1
+        response = FakeResponse(
+            {} if self.retry_after is None
+            else {'Retry-After': str(self.retry_after)})
+        if not self.present_at <= self.clock() < self.gone_at:
+            error = ResourceNotFoundError('Not found')
+            error.response = response
+            raise error
+        return response if cls is not None else object()
+
+    def list(self, resource_group_name, raw_response_hook=None):
+        self.list_count += 1
+        response = FakeResponse(
+            {} if self.retry_after is None
+            else {'Retry-After': str(self.retry_after)})
+        if raw_response_hook is not None:
+            raw_response_hook(FakePipelineResponse(response))
+        if self.present_at <= self.clock() < self.gone_at:
+            return [FakeResource(ACCOUNT_ID)]
+        return []
+
+
+class FakeClient(object):
+    def __init__(self, accounts):
+        self.accounts = accounts
+
+
+def fixed_interval_wait(client, resource_id, clock, interval_in_sec=10,
+                        retries=60):
+    """Former wait_for_anf_resource: sleeps interval_in_sec before every GET"""
+    start = clock()
+    for attempt in range(1, retries + 1):
+        clock.sleep(interval_in_sec)
+        try:
+            sample_utils.get_anf_resource(client, resource_id)
+            return polling.PollResult(True, attempt, clock() - start)
+        except ResourceNotFoundError:
+            pass
+    return polling.PollResult(False, retries, clock() - start)
+
+
+def no_jitter(maximum_in_sec=10):
+    return polling.Backoff(maximum_in_sec=maximum_in_sec, jitter=0)
+
+
+def test_backoff_grows_exponentially_up_to_the_cap():
+    backoff = no_jitter(maximum_in_sec=10)
+    assert [backoff.delay(attempt) for attempt in range(1, 7)] == \
+        [1, 2, 4, 8, 10, 10]
+
+
+def test_backoff_jitter_only_shortens_delays():
+    backoff = polling.Backoff(jitter=0.2, rand=lambda: 0.5)
+    assert backoff.delay(1) == pytest.approx(0.9)
+
+
+def test_poll_until_probes_immediately():
+    clock = FakeClock()
+    result = polling.poll_until(lambda: (True, None), clock=clock,
+                                sleep=clock.sleep)
+    assert result == polling.PollResult(True, 1, 0.0)
+    assert clock.sleeps == []
+
+
+def test_poll_until_follows_the_backoff():
+    clock = FakeClock()
+    result = polling.poll_until(lambda: (clock() >= 7, None),
+                                backoff=no_jitter(), clock=clock,
+                                sleep=clock.sleep)
+    assert result.succeeded
+    assert result.attempts == 4
+    assert result.elapsed == 7
+    assert clock.sleeps == [1, 2, 4]
+
+
+def test_retry_after_takes_precedence_over_a_shorter_backoff():
+    clock = FakeClock()
+    result = polling.poll_until(lambda: (clock() >= 10, 5),
+                                backoff=no_jitter(), clock=clock,
+                                sleep=clock.sleep)
+    assert clock.sleeps == [5, 5]
+    assert result == polling.PollResult(True, 3, 10)
+
+
+def test_longer_backoff_takes_precedence_over_retry_after():
+    clock = FakeClock()
+    polling.poll_until(lambda: (clock() >= 6, 0.5), backoff=no_jitter(),
+                       clock=clock, sleep=clock.sleep)
+    assert clock.sleeps == [1, 2, 4]
+
+
+def test_poll_until_probes_one_last_time_at_the_deadline():
+    clock = FakeClock()
+    result = polling.poll_until(lambda: (False, None), backoff=no_jitter(),
+                                timeout_in_sec=5, clock=clock,
+                                sleep=clock.sleep)
+    assert clock.sleeps == [1, 2, 2]
+    assert result == polling.PollResult(False, 4, 5)
+
+
+def test_poll_until_stops_after_max_attempts():
+    clock = FakeClock()
+    result = polling.poll_until(lambda: (False, None), backoff=no_jitter(),
+                                max_attempts=3, clock=clock,
+                                sleep=clock.sleep)
+    assert result == polling.PollResult(False, 3, 3)
+
+
+def test_poll_until_async_follows_the_backoff_and_retry_after():
+    clock = FakeClock()
+
+    async def probe():
+        return clock() >= 9, 3 if clock() >= 1 else None
+
+    async def sleep(seconds):
+        clock.sleep(seconds)
+
+    result = asyncio.run(polling.poll_until_async(
+        probe, backoff=no_jitter(), clock=clock, sleep=sleep))
+    assert clock.sleeps == [1, 3, 4, 8]
+    assert result == polling.PollResult(True, 5, 16)
+
+
+def test_wait_for_anf_resource_returns_once_the_resource_exists():
+    clock = FakeClock()
+    accounts = FakeAccounts(clock, present_at=2.5)
+    result = sample_utils.wait_for_anf_resource(
+        FakeClient(accounts), ACCOUNT_ID, backoff=no_jitter(), clock=clock,
+        sleep=clock.sleep)
+    assert result == polling.PollResult(True, 3, 3)
+    assert accounts.get_count == 3
+
+
+def test_wait_for_anf_resource_gives_up_after_interval_times_retries():
+    clock = FakeClock()
+    accounts = FakeAccounts(clock, present_at=float('inf'))
+    result = sample_utils.wait_for_anf_resource(
+        FakeClient(accounts), ACCOUNT_ID, interval_in_sec=2, retries=3,
+        backoff=no_jitter(maximum_in_sec=2), clock=clock, sleep=clock.sleep)
+    assert not result.succeeded
+    assert result.elapsed == 6
+    assert accounts.get_count == result.attempts == 5
+
+
+def test_wait_for_no_anf_resource_honours_retry_after():
+    clock = FakeClock()
+    accounts = FakeAccounts(clock, gone_at=20, retry_after=8)
+    result = sample_utils.wait_for_no_anf_resource(
+        FakeClient(accounts), ACCOUNT_ID, backoff=no_jitter(), clock=clock,
+        sleep=clock.sleep)
+    assert clock.sleeps == [8, 8, 8]
+    assert result == polling.PollResult(True, 4, 24)
+
+
+def test_fast_resource_is_found_sooner_than_with_fixed_polling():
+    # A resource ready after 1 second used to cost a full 10 seconds
+    old_clock = FakeClock()
+    old = fixed_interval_wait(FakeClient(FakeAccounts(old_clock,
+                                                      present_at=1)),
+                              ACCOUNT_ID, old_clock)
+
+    clock = FakeClock()
+    new = sample_utils.wait_for_anf_resource(
+        FakeClient(FakeAccounts(clock, present_at=1)), ACCOUNT_ID,
+        clock=clock, sleep=clock.sleep)
+
+    assert old.elapsed == 10
+    assert new.succeeded and new.elapsed <= 3
+
+
+def test_throttled_wait_issues_fewer_gets_than_fixed_polling():
+    # The service asks for 30 seconds between polls, the former loop ignored
+    # it and polled every 10 seconds
+    old_clock = FakeClock()
+    old_accounts = FakeAccounts(old_clock, present_at=60, retry_after=30)
+    old = fixed_interval_wait(FakeClient(old_accounts), ACCOUNT_ID,
+                              old_clock)
+
+    clock = FakeClock()
+    accounts = FakeAccounts(clock, present_at=60, retry_after=30)
+    new = sample_utils.wait_for_anf_resource(
+        FakeClient(accounts), ACCOUNT_ID, clock=clock, sleep=clock.sleep)
+
+    assert old_accounts.get_count == 6
+    assert accounts.get_count == new.attempts == 3
+    assert new.elapsed <= old.elapsed
+
+
+def test_wait_for_many_honours_retry_after_of_list_calls():
+    clock = FakeClock()
+    accounts = FakeAccounts(clock, present_at=20, retry_after=8)
+    resolved = sample_utils.wait_for_many(
+        FakeClient(accounts), [ACCOUNT_ID], backoff=no_jitter(),
+        clock=clock, sleep=clock.sleep)
+    assert resolved == {ACCOUNT_ID: True}
+    assert clock.sleeps == [8, 8, 8]
+    assert accounts.list_count == 4
+
+
+def test_wait_for_many_rejects_ids_of_several_subscriptions():
+    other_id = ACCOUNT_ID.replace('00000000-0000-0000-0000-000000000000',
+                                  '11111111-1111-1111-1111-111111111111')
+    with pytest.raises(ValueError):
+        sample_utils.wait_for_many(FakeClient(None), [ACCOUNT_ID, other_id])
@@ -0,0 +1,66 @@
+# test_pool_resizer.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Drives pool_resizer.PoolResizer against a fake client holding one pool.
+
+import types
+import pool_resizer
+
+TIB = 1024 ** 4
+POOL_ID = ('/subscriptions/00000000-0000-0000-0000-000000000000/'
+           'resourceGroups/RG/providers/Microsoft.NetApp/'
+           'netAppAccounts/Account/capacityPools/Pool01')
+
+
+class FakePools(object):
+    def __init__(self, size):
+        self.pool = types.SimpleNamespace(size=size, location='eastus')
+        self.requests = []
+
+    def get(self, resource_group_name, anf_account_name, pool_name):
+        self.requests.append((resource_group_name, anf_account_name,
+                              pool_name))
+        return self.pool
+
+    def begin_update(self, resource_group_name, anf_account_name, pool_name,
+                     body):
+        self.pool = types.SimpleNamespace(size=body.size, location='eastus')
+        return types.SimpleNamespace(result=lambda: self.pool)
+
+
+class FakeClient(object):
+    def __init__(self, pool_size, volume_quotas):
+        self.pools = FakePools(pool_size)
+        self.volumes = types.SimpleNamespace(list=lambda *names: [
+            types.SimpleNamespace(name='Account/Pool01/{}'.format(name),
+                                  usage_threshold=quota)
+            for name, quota in volume_quotas.items()])
+
+
+def test_names_differing_in_case_share_one_pool():
+    client = FakeClient(4 * TIB, {'vol1': 2 * TIB})
+    with pool_resizer.PoolResizer(client, window_in_sec=0.05) as resizer:
+        resizer.reserve('RG', 'Account', 'Pool01', 'Vol2', 3 * TIB)
+        # Released through a lowercased resource id, the reservation above
+        # still counts and the pool is not shrunk below it
+        hook = resizer.teardown_hook([])
+        hook(POOL_ID.lower() + '/volumes/vol3')
+        resizer.flush()
+
+    assert client.pools.pool.size == 5 * TIB
+    # One coalesced resize, requested with the names as first given
+    assert client.pools.requests == [('RG', 'Account', 'Pool01')]
+
+
+def test_teardown_hook_skips_deleted_pools():
+    client = FakeClient(8 * TIB, {})
+    with pool_resizer.PoolResizer(client, window_in_sec=0.05) as resizer:
+        hook = resizer.teardown_hook([POOL_ID])
+        hook(POOL_ID.lower() + '/volumes/vol1')
+        resizer.flush()
+
+    assert client.pools.requests == []
@@ -0,0 +1,72 @@
+# test_teardown.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Runs the teardown graph with a fake deletion recording when every resource
+# is deleted.
+
+import threading
+import time
+import teardown
+
+POOL_ID = ('/subscriptions/00000000-0000-0000-0000-000000000000/'
+           'resourceGroups/rg/providers/Microsoft.NetApp/'
+           'netAppAccounts/account/capacityPools/{}')
+VOLUME_ID = POOL_ID + '/volumes/{}'
+
+DELETE_DURATION_IN_SEC = 0.05
+
+
+def record_deletions(monkeypatch):
+    deletions = []
+    lock = threading.Lock()
+
+    def delete_anf_resource(client, resource_id):
+        started = time.monotonic()
+        time.sleep(DELETE_DURATION_IN_SEC)
+        with lock:
+            deletions.append((resource_id, started, time.monotonic()))
+
+    monkeypatch.setattr(teardown, 'delete_anf_resource', delete_anf_resource)
+    return deletions
+
+
+def test_pools_drain_concurrently(monkeypatch):
+    deletions = record_deletions(monkeypatch)
+    busy_pool = [VOLUME_ID.format('pool-a', 'volume-{}'.format(index))
+                 for index in range(10)]
+    other_pool = [VOLUME_ID.format('pool-b', 'volume-{}'.format(index))
+                  for index in range(2)]
+
+    teardown.teardown(None, busy_pool + other_pool)
+
+    started = dict((resource_id, start)
+                   for resource_id, start, _ in deletions)
+    busy_pool_starts = sorted(started[volume] for volume in busy_pool)
+    # Volumes of the busy pool waiting for their turn must not hold the
+    # other pool back, it drains while the busy pool is still deleting
+    assert max(started[volume] for volume in other_pool) < busy_pool_starts[3]
+
+
+def test_volumes_are_serialized_per_pool(monkeypatch):
+    deletions = record_deletions(monkeypatch)
+    volumes = [VOLUME_ID.format(pool, 'volume-{}'.format(index))
+               for pool in ('pool-a', 'pool-b') for index in range(3)]
+
+    teardown.teardown(None, volumes + [POOL_ID.format('pool-a')])
+
+    for pool in ('pool-a', 'pool-b'):
+        spans = sorted((start, end) for resource_id, start, end in deletions
+                       if '/capacityPools/{}/volumes/'.format(pool)
+                       in resource_id)
+        assert len(spans) == 3
+        for previous, current in zip(spans, spans[1:]):
+            assert previous[1] <= current[0]
+    pool_deleted = [start for resource_id, start, _ in deletions
+                    if resource_id == POOL_ID.format('pool-a')]
+    assert pool_deleted[0] >= max(
+        end for resource_id, _, end in deletions
+        if '/capacityPools/pool-a/volumes/' in resource_id)
@@ -0,0 +1,150 @@
+# test_token_cache.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Drives token_cache.CachedTokenCredential against a fake credential and a
+# fake clock, with the cache file in a temporary folder.
+
+import json
+import os
+import threading
+import time
+import pytest
+
+pytest.importorskip('cryptography')
+
+import token_cache
+from azure.core.credentials import AccessToken
+
+SCOPE = 'https://management.azure.com/.default'
+TENANT_ID = 'tenant'
+CLIENT_ID = 'client'
+SECRET = 'secret'
+TOKEN_LIFETIME_IN_SEC = 3600
+
+
+class FakeClock(object):
+    def __init__(self, now=1000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCredential(object):
+    """Credential issuing numbered tokens valid for an hour"""
+
+    def __init__(self, clock, delay=0.0):
+        self.clock = clock
+        self.delay = delay
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            number = self.calls
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return AccessToken('token-{}'.format(number),
+                           int(self.clock() + TOKEN_LIFETIME_IN_SEC))
+
+
+def unused_credential():
+    raise AssertionError('credential built although the token is cached')
+
+
+def cached(credential, path, clock, secret=SECRET):
+    return token_cache.CachedTokenCredential(
+        credential, str(path), TENANT_ID, CLIENT_ID, secret, clock=clock)
+
+
+def test_cold_start_writes_the_cache_file(tmp_path):
+    clock = FakeClock()
+    credential = FakeCredential(clock)
+    path = tmp_path / 'tokens.json'
+
+    token = cached(credential, path, clock).get_token(SCOPE)
+
+    assert token.token == 'token-1'
+    assert credential.calls == 1
+    entries = json.loads(path.read_text())
+    assert len(entries) == 1
+    # The token is only stored encrypted
+    assert 'token-1' not in path.read_text()
+    if os.name == 'posix':
+        assert os.stat(str(path)).st_mode & 0o777 == 0o600
+
+
+def test_warm_start_reuses_the_cached_token(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / 'tokens.json'
+    cached(FakeCredential(clock), path, clock).get_token(SCOPE)
+
+    # A new run only finds the file, the credential is never built
+    token = cached(unused_credential, path, clock).get_token(SCOPE)
+
+    assert token.token == 'token-1'
+
+
+def test_token_within_the_refresh_margin_is_refreshed(tmp_path):
+    clock = FakeClock()
+    credential = FakeCredential(clock)
+    cache = cached(credential, tmp_path / 'tokens.json', clock)
+    cache.get_token(SCOPE)
+
+    clock.now += TOKEN_LIFETIME_IN_SEC - token_cache.REFRESH_MARGIN_IN_SEC - 1
+    assert cache.get_token(SCOPE).token == 'token-1'
+
+    clock.now += 2
+    assert cache.get_token(SCOPE).token == 'token-2'
+    assert credential.calls == 2
+
+
+def test_cache_encrypted_with_another_secret_is_ignored(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / 'tokens.json'
+    cached(FakeCredential(clock), path, clock,
+           secret='former').get_token(SCOPE)
+    credential = FakeCredential(clock)
+
+    token = cached(credential, path, clock).get_token(SCOPE)
+
+    assert token.token == 'token-1'
+    assert credential.calls == 1
+    assert cached(unused_credential, path, clock).get_token(SCOPE) == token
+
+
+def test_concurrent_writers_are_serialized_by_the_file_lock(tmp_path):
+    clock = FakeClock()
+    credential = FakeCredential(clock, delay=0.05)
+    path = tmp_path / 'tokens.json'
+    # One cache object per writer, as separate processes would have, so
+    # only the lock file serializes them
+    caches = [cached(credential, path, clock) for _ in range(8)]
+    tokens = []
+    barrier = threading.Barrier(len(caches))
+
+    def get_token(cache):
+        barrier.wait()
+        tokens.append(cache.get_token(SCOPE).token)
+
+    threads = [threading.Thread(target=get_token, args=(cache,))
+               for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert credential.max_running == 1
+    assert credential.calls == 1
+    assert tokens == ['token-1'] * len(caches)
+    assert len(json.loads(path.read_text())) == 1
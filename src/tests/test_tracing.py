@@ -0,0 +1,51 @@
+# test_tracing.py Tests
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+# Checks the spans handed over to the tracing exporters.
+
+import time
+import pytest
+import tracing
+
+
+class MemoryExporter(object):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span.to_dict())
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def exporter():
+    exporter = MemoryExporter()
+    tracing.add_exporter(exporter)
+    yield exporter
+    tracing.remove_exporter(exporter)
+
+
+def test_lro_submission_time_is_not_exported(exporter):
+    with tracing.span('create_volume') as operation:
+        operation.set('lro.submitted_at', time.time_ns())
+
+    attributes = exporter.spans[0]['attributes']
+    assert 'lro.submitted_at' not in attributes
+    assert attributes['lro.duration_ms'] >= 0
+
+
+def test_spans_nest_within_the_calling_context(exporter):
+    with tracing.span('outer', pool='pool1'):
+        with tracing.span('inner'):
+            pass
+
+    inner, outer = exporter.spans
+    assert inner['parent_id'] == outer['span_id']
+    assert inner['trace_id'] == outer['trace_id']
+    assert outer['attributes'] == {'pool': 'pool1'}
@@ -0,0 +1,238 @@
+# throttling.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import asyncio
+import threading
+import time
+import polling
+from azure.core.pipeline.policies import AsyncHTTPPolicy, HTTPPolicy
+
+# Subscription token buckets of Azure Resource Manager, per region
+READ_BUCKET_SIZE = 250
+READ_REFILL_PER_SEC = 25
+WRITE_BUCKET_SIZE = 200
+WRITE_REFILL_PER_SEC = 10
+# Fraction of the remaining quota left untouched for other clients of the
+# subscription, e.g. the portal
+RESERVE_RATIO = 0.1
+
+_READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Subscription id -> process wide governor of the subscription
+_default_governors = {}
+_default_governor_lock = threading.Lock()
+
+
+class TokenBucket(object):
+    """Client side model of one ARM request quota
+
+    Every request takes a token, tokens are refilled at refill_per_sec up to
+    the bucket size. When no token is left the request is given one in
+    advance and waits until the bucket has refilled it, requests are thus
+    paced in arrival order. The bucket follows the quota reported by ARM:
+    every response resets the token count to the remaining quota minus the
+    requests still in flight, so other clients of the subscription are
+    accounted for, and the bucket grows if ARM reports a larger quota.
+
+    Args:
+        size (int): Initial bucket size, i.e. maximum burst
+        refill_per_sec (float): Tokens added per second
+        reserve_ratio (float): Fraction of the bucket never used
+        clock (function): Optional. Defaults to time.monotonic
+    """
+
+    def __init__(self, size, refill_per_sec, reserve_ratio=RESERVE_RATIO,
+                 clock=time.monotonic):
+        self.size = size
+        self.refill_per_sec = refill_per_sec
+        self.reserve_ratio = reserve_ratio
+        self.clock = clock
+        self.tokens = float(size)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttled_count = 0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.size, self.tokens +
+                          (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+    def reserve(self):
+        """Takes a token for a request about to be sent
+
+        Returns:
+            float: Returns the seconds to wait before sending it
+        """
+
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1
+            self.in_flight += 1
+            reserve = self.size * self.reserve_ratio
+            delay = 0.0
+            if self.tokens < reserve:
+                delay = (reserve - self.tokens) / self.refill_per_sec
+            return max(delay, self.paused_until - now)
+
+    def observe(self, remaining, retry_after=None):
+        """Accounts for the response of a request taken with reserve()
+
+        Args:
+            remaining (int): Remaining quota reported by ARM, None if the
+                response did not carry it
+            retry_after (float): Seconds requested by a 429 response, None
+                if the request was not throttled
+        """
+
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.in_flight = max(0, self.in_flight - 1)
+            if remaining is not None:
+                self.size = max(self.size, remaining)
+                self.tokens = remaining - self.in_flight
+            if retry_after is not None:
+                self.throttled_count += 1
+                self.tokens = min(self.tokens, -self.in_flight)
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+    def cancel(self):
+        """Returns the token of a request that got no response"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.tokens += 1
+
+
+class ThrottlingGovernor(object):
+    """Paces reads and writes to stay within the subscription ARM limits
+
+    One governor is meant to be shared by every client of a subscription,
+    across threads and asyncio tasks, see default_governor.
+
+    Args:
+        reads (TokenBucket): Optional. Bucket of GET and HEAD requests
+        writes (TokenBucket): Optional. Bucket of all other requests
+        sleep (function): Optional. Used by synchronous clients to wait,
+            defaults to time.sleep
+    """
+
+    def __init__(self, reads=None, writes=None, sleep=time.sleep):
+        self.reads = reads or TokenBucket(READ_BUCKET_SIZE,
+                                          READ_REFILL_PER_SEC)
+        self.writes = writes or TokenBucket(WRITE_BUCKET_SIZE,
+                                            WRITE_REFILL_PER_SEC)
+        self.sleep = sleep
+
+    def bucket(self, method):
+        """Gets the bucket a request method is counted against"""
+        return self.reads if method.upper() in _READ_METHODS else self.writes
+
+    def observe(self, method, response):
+        """Updates the bucket of a request from its HTTP response"""
+        is_read = method.upper() in _READ_METHODS
+        remaining = response.headers.get(
+            'x-ms-ratelimit-remaining-subscription-reads' if is_read
+            else 'x-ms-ratelimit-remaining-subscription-writes')
+        try:
+            remaining = int(remaining) if remaining is not None else None
+        except ValueError:
+            remaining = None
+
+        retry_after = None
+        if response.status_code == 429:
+            retry_after = polling.get_retry_after(response)
+            if retry_after is None:
+                retry_after = 1.0
+        self.bucket(method).observe(remaining, retry_after)
+
+
+def default_governor(subscription_id=None):
+    """Gets the process wide ThrottlingGovernor of a subscription
+
+    ARM quotas are per subscription, every subscription gets its own
+    governor, shared by all the clients of that subscription.
+
+    Args:
+        subscription_id (string): Optional. Subscription id, clients not
+            giving one share a governor of their own
+
+    Returns:
+        ThrottlingGovernor: Returns the shared governor
+    """
+
+    key = subscription_id.lower() if subscription_id else None
+    with _default_governor_lock:
+        governor = _default_governors.get(key)
+        if governor is None:
+            governor = _default_governors[key] = ThrottlingGovernor()
+        return governor
+
+
+class ThrottlingPolicy(HTTPPolicy):
+    """Pipeline policy delaying requests according to a ThrottlingGovernor
+
+    Must be installed as a per retry policy so that retried attempts are
+    counted, e.g. NetAppManagementClient(..., per_retry_policies=[
+    ThrottlingPolicy()]), client_factory.ClientFactory does it for every
+    client it creates.
+
+    Args:
+        governor (ThrottlingGovernor): Optional. Governor of the
+            subscription of the client, see default_governor. Defaults to
+            the process wide governor of clients not giving a subscription
+    """
+
+    def __init__(self, governor=None):
+        super(ThrottlingPolicy, self).__init__()
+        self.governor = governor or default_governor()
+
+    def send(self, request):
+        method = request.http_request.method
+        bucket = self.governor.bucket(method)
+        delay = bucket.reserve()
+        if delay > 0:
+            self.governor.sleep(delay)
+        try:
+            response = self.next.send(request)
+        except Exception:
+            bucket.cancel()
+            raise
+        self.governor.observe(method, response.http_response)
+        return response
+
+
+class AsyncThrottlingPolicy(AsyncHTTPPolicy):
+    """ThrottlingPolicy for the azure.mgmt.netapp.aio clients
+
+    Shares the governor, and therefore the quota, with synchronous clients.
+
+    Args:
+        governor (ThrottlingGovernor): Optional. Governor of the
+            subscription of the client, see default_governor. Defaults to
+            the process wide governor of clients not giving a subscription
+    """
+
+    def __init__(self, governor=None):
+        super(AsyncThrottlingPolicy, self).__init__()
+        self.governor = governor or default_governor()
+
+    async def send(self, request):
+        method = request.http_request.method
+        bucket = self.governor.bucket(method)
+        delay = bucket.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            response = await self.next.send(request)
+        except Exception:
+            bucket.cancel()
+            raise
+        self.governor.observe(method, response.http_response)
+        return response
@@ -0,0 +1,204 @@
+# token_cache.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from azure.core.credentials import AccessToken
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Tokens expiring within this many seconds are refreshed before being used
+REFRESH_MARGIN_IN_SEC = 300
+
+
+class _FileLock(object):
+    """Exclusive lock shared between processes, held on a side file"""
+
+    def __init__(self, path):
+        self._path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self._path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *args):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+
+
+class CachedTokenCredential(object):
+    """Credential wrapper keeping access tokens in an encrypted file
+
+    Tokens obtained from the wrapped credential are stored in cache_path,
+    encrypted with a key derived from the client secret, and keyed by tenant,
+    client and scopes. Every process using the same file reuses the cached
+    tokens, so short lived runs skip the AAD round trip. Tokens are refreshed
+    refresh_margin_in_sec before they expire, and concurrent refreshes from
+    several processes are serialized by a lock file so only one of them
+    calls AAD.
+
+    Args:
+        credential (TokenCredential): Credential used to obtain new tokens,
+            e.g. ClientSecretCredential, or a function returning it. A
+            function is only called once a token has to be requested, so the
+            credential library is not even imported while cached tokens are
+            valid
+        cache_path (string): Path of the cache file, created with owner only
+            permissions
+        tenant_id (string): Tenant id of the service principal
+        client_id (string): Client (application) id of the service principal
+        client_secret (string): Secret the cache encryption key is derived
+            from
+        refresh_margin_in_sec (int): Seconds before expiry a token is
+            refreshed
+        clock (function): Optional. Returns the current epoch time, defaults
+            to time.time
+    """
+
+    def __init__(self, credential, cache_path, tenant_id, client_id,
+                 client_secret, refresh_margin_in_sec=REFRESH_MARGIN_IN_SEC,
+                 clock=time.time):
+        self._credential = credential
+        self._cache_path = cache_path
+        self._tenant_id = tenant_id
+        self._client_id = client_id
+        self._refresh_margin_in_sec = refresh_margin_in_sec
+        self._clock = clock
+        self._fernet = Fernet(_derive_key(client_secret, tenant_id,
+                                          client_id))
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        """Gets an access token for the scopes
+
+        Args:
+            scopes (string): Token scopes
+            kwargs: Optional keyword arguments for the wrapped credential,
+                requests with claims bypass the cache
+
+        Returns:
+            AccessToken: Returns the token
+        """
+
+        if kwargs.get('claims'):
+            return self._get_credential().get_token(*scopes, **kwargs)
+
+        key = self._key(scopes, kwargs.get('tenant_id'))
+        token = self._memory.get(key)
+        if self._is_fresh(token):
+            return token
+
+        with self._lock, _FileLock(self._cache_path + '.lock'):
+            entries = self._read()
+            token = self._decrypt(entries.get(key))
+            if not self._is_fresh(token):
+                token = self._get_credential().get_token(*scopes, **kwargs)
+                entries[key] = {
+                    'token': self._fernet.encrypt(
+                        token.token.encode('utf-8')).decode('ascii'),
+                    'expires_on': token.expires_on,
+                }
+                self._write(self._prune(entries))
+            self._memory[key] = token
+
+        return token
+
+    def close(self):
+        """Closes the wrapped credential"""
+        if callable(self._credential) and \
+                not hasattr(self._credential, 'get_token'):
+            return
+        close = getattr(self._credential, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get_credential(self):
+        if callable(self._credential) and \
+                not hasattr(self._credential, 'get_token'):
+            self._credential = self._credential()
+        return self._credential
+
+    def _key(self, scopes, tenant_id=None):
+        return hashlib.sha256('\n'.join(
+            [tenant_id or self._tenant_id, self._client_id] +
+            sorted(scopes)).encode('utf-8')).hexdigest()
+
+    def _is_fresh(self, token):
+        return token is not None and \
+            token.expires_on - self._clock() > self._refresh_margin_in_sec
+
+    def _decrypt(self, entry):
+        if not entry:
+            return None
+        try:
+            return AccessToken(
+                self._fernet.decrypt(entry['token'].encode('ascii'))
+                .decode('utf-8'),
+                entry['expires_on'])
+        except (InvalidToken, KeyError, ValueError):
+            # Written with another secret or corrupted, refresh it
+            return None
+
+    def _prune(self, entries):
+        now = self._clock()
+        return dict((key, entry) for key, entry in entries.items()
+                    if entry.get('expires_on', 0) > now)
+
+    def _read(self):
+        try:
+            with open(self._cache_path) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        directory = os.path.dirname(os.path.abspath(self._cache_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tokens')
+        try:
+            with os.fdopen(fd, 'w') as cache_file:
+                json.dump(entries, cache_file)
+            os.chmod(temp_path, 0o600)
+            os.replace(temp_path, self._cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def _derive_key(secret, tenant_id, client_id):
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32,
+                salt='{}/{}'.format(tenant_id, client_id).encode('utf-8'),
+                info=b'anf-sample-token-cache')
+    return base64.urlsafe_b64encode(hkdf.derive(secret.encode('utf-8')))
@@ -0,0 +1,323 @@
+# tracing.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import contextvars
+import functools
+import json
+import random
+import threading
+import time
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+_current_span = contextvars.ContextVar('anf_sample_current_span',
+                                       default=None)
+_exporters = []
+_exporters_lock = threading.Lock()
+
+# Long running operation status URL -> span that started the operation
+_operations = {}
+# Resource URL of a PUT or PATCH operation -> span that started it, the
+# poller issues a final GET on it once the operation ends
+_final_gets = {}
+# Thread id -> spans whose status URL the thread polled, only their poller
+# threads have their final GET counted, not other readers of the resource
+_pollers = {}
+_operations_lock = threading.Lock()
+
+
+class Span(object):
+    """A timed operation, possibly nested within another span
+
+    Attributes:
+        name (string): Operation name, e.g. create_volume
+        trace_id (string): 32 hex digits id shared by all nested spans
+        span_id (string): 16 hex digits id of this span
+        parent_id (string): span_id of the parent span or None
+        start (int): Start time, nanoseconds since the epoch
+        end (int): End time, nanoseconds since the epoch, None while running
+        attributes (dict): Recorded values, e.g. lro.poll_count
+        error (string): Error description if the operation failed
+    """
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start', 'end',
+                 'attributes', 'error', '_lock')
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None \
+            else '{:032x}'.format(random.getrandbits(128))
+        self.span_id = '{:016x}'.format(random.getrandbits(64))
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def duration_ms(self):
+        """float: Duration in milliseconds, None while running"""
+        if self.end is None:
+            return None
+        return (self.end - self.start) / 1e6
+
+    def set(self, key, value):
+        """Records an attribute"""
+        with self._lock:
+            self.attributes[key] = value
+
+    def increment(self, key, amount=1):
+        """Adds amount to a numeric attribute, starting from 0"""
+        with self._lock:
+            self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def finish(self):
+        """Ends the span and hands it over to the exporters"""
+        self.end = time.time_ns()
+        # Internal timestamp in nanoseconds, only lro.duration_ms is exported
+        submitted = self.attributes.pop('lro.submitted_at', None)
+        if submitted is not None:
+            self.attributes['lro.duration_ms'] = (self.end - submitted) / 1e6
+            with _operations_lock:
+                for urls in (_operations, _final_gets):
+                    for url in [url for url, span in urls.items()
+                                if span is self]:
+                        del urls[url]
+                for thread_id, spans in list(_pollers.items()):
+                    spans.discard(self)
+                    if not spans:
+                        del _pollers[thread_id]
+
+        with _exporters_lock:
+            exporters = list(_exporters)
+        for exporter in exporters:
+            exporter.export(self)
+
+    def to_dict(self):
+        """Returns the span as a JSON serializable dict"""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'end': self.end,
+            'duration_ms': self.duration_ms,
+            'attributes': dict(self.attributes),
+            'error': self.error,
+        }
+
+
+def current_span():
+    """Gets the innermost running span of the calling context
+
+    Returns:
+        Span: Returns the span or None
+    """
+    return _current_span.get()
+
+
+class span(object):
+    """Context manager running its block inside a new nested span
+
+    Args:
+        name (string): Operation name
+        attributes: Optional. Initial attributes of the span
+    """
+
+    def __init__(self, name, **attributes):
+        self._name = name
+        self._attributes = attributes
+        self._span = None
+        self._token = None
+
+    def __enter__(self):
+        self._span = Span(self._name, _current_span.get(), self._attributes)
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current_span.reset(self._token)
+        if exc is not None:
+            self._span.error = '{}: {}'.format(exc_type.__name__, exc)
+        self._span.finish()
+        return False
+
+
+def traced(name=None):
+    """Decorator running every call of a function inside a new span
+
+    Args:
+        name (string): Optional. Span name, defaults to the function name
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_exporter(exporter):
+    """Registers an exporter receiving every finished span"""
+    with _exporters_lock:
+        _exporters.append(exporter)
+
+
+def remove_exporter(exporter):
+    """Unregisters an exporter and closes it"""
+    with _exporters_lock:
+        _exporters.remove(exporter)
+    exporter.close()
+
+
+class TracingPolicy(SansIOHTTPPolicy):
+    """Pipeline policy recording every HTTP request as a span
+
+    Must be installed as a per retry policy, e.g.
+    NetAppManagementClient(..., per_retry_policies=[TracingPolicy()]), so
+    that every attempt is seen. Each request becomes a child span of the
+    calling span. When a request starts a long running operation the calling
+    span gets lro.submit_latency_ms, and the status polls issued later by the
+    SDK poller, from its own thread, are counted in lro.poll_count and
+    nested under it. Retried attempts are counted in http.retries.
+    """
+
+    def on_request(self, request):
+        http_request = request.http_request
+        thread_id = threading.get_ident()
+        with _operations_lock:
+            parent = _operations.get(http_request.url)
+            if parent is not None:
+                _pollers.setdefault(thread_id, set()).add(parent)
+            elif http_request.method == 'GET':
+                parent = _final_gets.get(http_request.url)
+                if parent not in _pollers.get(thread_id, ()):
+                    parent = None
+        if parent is not None:
+            parent.increment('lro.poll_count')
+        else:
+            parent = _current_span.get()
+
+        attempts = request.context.get('tracing_attempts', 0) + 1
+        request.context['tracing_attempts'] = attempts
+        if attempts > 1 and parent is not None:
+            parent.increment('http.retries')
+
+        request.context['tracing_span'] = Span(
+            'HTTP {}'.format(http_request.method), parent,
+            {'http.method': http_request.method,
+             'http.url': http_request.url.split('?', 1)[0],
+             'http.attempt': attempts})
+        request.context['tracing_parent'] = parent
+
+    def on_response(self, request, response):
+        http_span = request.context.pop('tracing_span', None)
+        if http_span is None:
+            return
+
+        http_response = response.http_response
+        http_span.set('http.status_code', http_response.status_code)
+        http_span.finish()
+
+        parent = request.context.get('tracing_parent')
+        status_url = http_response.headers.get('Azure-AsyncOperation') \
+            or http_response.headers.get('Location')
+        if parent is not None and status_url \
+                and request.http_request.method != 'GET' \
+                and 'lro.submitted_at' not in parent.attributes:
+            parent.set('lro.submitted_at', http_span.end)
+            parent.set('lro.submit_latency_ms',
+                       (http_span.end - parent.start) / 1e6)
+            with _operations_lock:
+                _operations[status_url] = parent
+                if request.http_request.method in ('PUT', 'PATCH'):
+                    _final_gets[request.http_request.url] = parent
+
+    def on_exception(self, request):
+        http_span = request.context.pop('tracing_span', None)
+        if http_span is not None:
+            http_span.error = 'connection error'
+            http_span.finish()
+
+
+class JsonLinesExporter(object):
+    """Writes every finished span as one JSON object per line
+
+    Args:
+        path (string): Output file, appended to
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'a')
+        self._lock = threading.Lock()
+
+    def export(self, finished_span):
+        line = json.dumps(finished_span.to_dict())
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class OtlpJsonExporter(JsonLinesExporter):
+    """Writes spans in the OpenTelemetry OTLP/JSON file format
+
+    Every line is an ExportTraceServiceRequest holding one span, the format
+    read by the OpenTelemetry collector file receiver.
+
+    Args:
+        path (string): Output file, appended to
+        service_name (string): Value of the service.name resource attribute
+    """
+
+    def __init__(self, path, service_name='anf-python-sdk-sample'):
+        super(OtlpJsonExporter, self).__init__(path)
+        self.service_name = service_name
+
+    def export(self, finished_span):
+        otlp_span = {
+            'traceId': finished_span.trace_id,
+            'spanId': finished_span.span_id,
+            'name': finished_span.name,
+            'kind': 3 if finished_span.name.startswith('HTTP ') else 1,
+            'startTimeUnixNano': str(finished_span.start),
+            'endTimeUnixNano': str(finished_span.end),
+            'attributes': [{'key': key, 'value': _otlp_value(value)}
+                           for key, value
+                           in finished_span.attributes.items()],
+            'status': {'code': 2, 'message': finished_span.error}
+            if finished_span.error else {'code': 1},
+        }
+        if finished_span.parent_id:
+            otlp_span['parentSpanId'] = finished_span.parent_id
+
+        line = json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [{
+                'key': 'service.name',
+                'value': {'stringValue': self.service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'anf-sample'},
+                            'spans': [otlp_span]}],
+        }]})
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
@@ -0,0 +1,191 @@
+# volume_updates.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import threading
+import time
+import coalescer
+import inventory
+import resource_uri_utils
+import tracing
+from azure.mgmt.netapp.models import VolumePatch, \
+    VolumePatchPropertiesExportPolicy
+
+# Seconds patches of the same volume are collected before being applied
+WINDOW_IN_SEC = 2.0
+
+
+class _VolumeChange(object):
+    __slots__ = ('names', 'usage_threshold', 'export_rules', 'tags')
+
+    def __init__(self, names, usage_threshold=None, export_rules=None,
+                 tags=None):
+        self.names = names
+        self.usage_threshold = usage_threshold
+        self.export_rules = export_rules
+        self.tags = tags
+
+
+def _merge(pending, change):
+    # Sizes and export rules of later patches win, tags are merged key by key
+    tags = None
+    if pending.tags is not None or change.tags is not None:
+        tags = dict(pending.tags or {})
+        tags.update(change.tags or {})
+    return _VolumeChange(
+        pending.names,
+        change.usage_threshold if change.usage_threshold is not None
+        else pending.usage_threshold,
+        change.export_rules if change.export_rules is not None
+        else pending.export_rules,
+        tags)
+
+
+def _key(*names):
+    return tuple(name.lower() for name in names)
+
+
+def _serialize_rules(rules):
+    return sorted((rule.serialize() for rule in rules or []),
+                  key=lambda rule: rule.get('ruleIndex', 0))
+
+
+class VolumeUpdateQueue(object):
+    """Coalesces concurrent updates of the same volumes
+
+    Patches submitted for a volume within window_in_sec are merged, then
+    diffed against the last known state of the volume: fields already at
+    the requested value are dropped and a patch left empty is not sent at
+    all. What remains is applied with one volumes.begin_update per volume,
+    instead of one conflicting long running operation per caller. The
+    state of a volume is read with volumes.get unless the queue updated or
+    read it within the volume TTL of inventory.TTL_IN_SEC.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        window_in_sec (float): Seconds patches are collected per volume
+        ttl_in_sec (float): Seconds the known state of a volume is trusted
+        clock (function): Optional. Defaults to time.monotonic
+    """
+
+    def __init__(self, client, window_in_sec=WINDOW_IN_SEC,
+                 ttl_in_sec=inventory.TTL_IN_SEC['volume'],
+                 clock=time.monotonic):
+        self.client = client
+        self.ttl_in_sec = ttl_in_sec
+        self.clock = clock
+        self.update_count = 0
+        self.skipped_count = 0
+        self._states = {}
+        self._lock = threading.Lock()
+        self._coalescer = coalescer.Coalescer(
+            _merge, self._update, window_in_sec=window_in_sec, clock=clock)
+
+    @property
+    def submitted_count(self):
+        """int: Number of patches submitted"""
+        return self._coalescer.submitted_count
+
+    def submit(self, resource_group_name, anf_account_name, pool_name,
+               volume_name, usage_threshold=None, export_rules=None,
+               tags=None):
+        """Queues a patch of a volume
+
+        Args:
+            resource_group_name (string): Name of the resource group
+            anf_account_name (string): Azure NetApp Files Account name
+            pool_name (string): Capacity pool name
+            volume_name (string): Volume name
+            usage_threshold (int): Optional. New quota in bytes
+            export_rules (list): Optional. ExportPolicyRule objects
+                replacing the export policy
+            tags (dict): Optional. Tags added or changed, other tags are
+                kept
+
+        Returns:
+            Future: Returns a future resolved with the Volume once the
+                merged patch is applied, or with its last known state if
+                the merged patch changes nothing
+        """
+
+        names = (resource_group_name, anf_account_name, pool_name,
+                 volume_name)
+        return self._coalescer.submit(
+            _key(*names),
+            _VolumeChange(names, usage_threshold, export_rules, tags))
+
+    def remember(self, volume):
+        """Records the state of a volume read elsewhere, e.g. just created"""
+        parsed = resource_uri_utils.parse_resource_id(volume.id)
+        key = _key(parsed.resource_group, parsed.account,
+                   parsed.capacity_pool, parsed.volume)
+        with self._lock:
+            self._states[key] = (volume, self.clock())
+
+    def flush(self):
+        """Applies the pending patches and waits for them"""
+        self._coalescer.flush()
+
+    def close(self):
+        """Applies the pending patches and stops the worker threads"""
+        self._coalescer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _state(self, key, names):
+        with self._lock:
+            volume, read_at = self._states.get(key, (None, None))
+        if volume is None or self.clock() - read_at > self.ttl_in_sec:
+            volume = self.client.volumes.get(*names)
+            with self._lock:
+                self._states[key] = (volume, self.clock())
+        return volume
+
+    def _update(self, key, change):
+        with tracing.span('update_volume', volume=key[-1]) as update_span:
+            volume = self._state(key, change.names)
+            patch = VolumePatch(location=volume.location,
+                                service_level=volume.service_level)
+            changed = []
+
+            if change.usage_threshold is not None and \
+                    change.usage_threshold != volume.usage_threshold:
+                patch.usage_threshold = change.usage_threshold
+                changed.append('usage_threshold')
+
+            current_rules = volume.export_policy.rules \
+                if volume.export_policy is not None else []
+            if change.export_rules is not None and \
+                    _serialize_rules(change.export_rules) != \
+                    _serialize_rules(current_rules):
+                patch.export_policy = VolumePatchPropertiesExportPolicy(
+                    rules=change.export_rules)
+                changed.append('export_policy')
+
+            if change.tags is not None:
+                tags = dict(volume.tags or {})
+                tags.update(change.tags)
+                if tags != (volume.tags or {}):
+                    patch.tags = tags
+                    changed.append('tags')
+
+            update_span.set('changed', ','.join(changed))
+            if not changed:
+                with self._lock:
+                    self.skipped_count += 1
+                return volume
+
+            volume = self.client.volumes.begin_update(
+                *(change.names + (patch,))).result()
+            with self._lock:
+                self._states[key] = (volume, self.clock())
+                self.update_count += 1
+            return volume